@@ -0,0 +1,35 @@
+import pytest
+
+from .generator import generate
+
+DEFAULT_SIZES = "1000"
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--processes",
+        default=DEFAULT_SIZES,
+        help="Comma-separated numbers of processes in generated files, e.g. `1000,10000,100000`",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "generated_file" in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption("processes").split(",")]
+        metafunc.parametrize("generated_file", sizes, indirect=True, ids=lambda n: f"{n}p")
+
+
+@pytest.fixture(scope="session")
+def generated_files():
+    """Cache of generated files, so each size is only written once per session"""
+    return {}
+
+
+@pytest.fixture
+def generated_file(request, generated_files, tmp_path_factory):
+    """Path and size (`lines`, `bytes`) of a generated file with `request.param` processes"""
+    processes = request.param
+    if processes not in generated_files:
+        filepath = tmp_path_factory.mktemp("simapro") / f"generated-{processes}.csv"
+        generated_files[processes] = (filepath, generate(filepath, processes=processes))
+    return generated_files[processes]
@@ -0,0 +1,334 @@
+"""Deterministic generator of synthetic SimaPro CSV process exports.
+
+The generated files are not meant to be realistic LCA data, but they have the same shape as real
+exports: metadata, products, technosphere inputs linking to other processes in the file,
+elementary flows with uncertainty, dataset parameters, formulas (including `Iff` expressions)
+referring to dataset, database, and project parameters, a units block with unit conversions, and
+the flow lists at the end of the file.
+
+Example usage:
+
+... code-block:: bash
+
+    python -m benchmarks.generator export.csv --processes 10000 --delimiter ";"
+
+"""
+
+import argparse
+import csv
+import random
+from pathlib import Path
+from typing import Optional, TextIO, Union
+
+import ftfy.bad_codecs  # noqa: F401
+
+DELIMITER_LABELS = {";": "Semicolon", ",": "Comma", "\t": "Tab"}
+
+DEFAULT_UNCERTAINTY_MIX = {
+    "Undefined": 0.6,
+    "Lognormal": 0.25,
+    "Normal": 0.05,
+    "Triangle": 0.05,
+    "Uniform": 0.05,
+}
+
+# name, quantity, conversion factor, reference unit
+UNITS = [
+    ("kg", "Mass", 1, "kg"),
+    ("g", "Mass", 0.001, "kg"),
+    ("ton", "Mass", 1000, "kg"),
+    ("MJ", "Energy", 1, "MJ"),
+    ("kWh", "Energy", 3.6, "MJ"),
+    ("m", "Length", 1, "m"),
+    ("km", "Length", 1000, "m"),
+    ("p", "Amount", 1, "p"),
+]
+REFERENCE_UNITS = [unit for unit in UNITS if unit[0] == unit[3]]
+
+# category in process, category in flow list at the end of the file, subcompartments
+BIOSPHERE_CATEGORIES = [
+    ("Emissions to air", "Airborne emissions", ["high. pop.", "low. pop.", ""]),
+    ("Emissions to water", "Waterborne emissions", ["river", "lake", ""]),
+    ("Emissions to soil", "Emissions to soil", ["agricultural", "industrial", ""]),
+    ("Resources", "Raw materials", ["in ground", "in air", ""]),
+]
+BIOSPHERE_FLOWS_PER_CATEGORY = 50
+
+GLOBAL_PARAMETERS = 10
+METADATA = [
+    ("Category type", "material"),
+    ("Type", "Unit process"),
+    ("Status", "Draft"),
+    ("Time period", "Unspecified"),
+    ("Geography", "Unspecified"),
+    ("Technology", "Unspecified"),
+    ("Representativeness", "Unspecified"),
+    ("Multiple output allocation", "Unspecified"),
+    ("Substitution allocation", "Unspecified"),
+    ("Cut off rules", "Unspecified"),
+    ("Capital goods", "Unspecified"),
+    ("Boundary with nature", "Unspecified"),
+    ("Infrastructure", "No"),
+    ("Date", "01.01.2024"),
+    ("Record", "generated by: bw_simapro_csv benchmarks"),
+    ("Comment", "Synthetic process"),
+]
+
+
+class Generator:
+    """Write a synthetic SimaPro CSV export.
+
+    * `processes`: Number of `Process` blocks.
+    * `exchanges`: Number of technosphere and biosphere exchanges per process, in addition to the
+      single product.
+    * `parameter_density`: Share of exchange amounts given as formulas. Each process also gets
+      input and calculated parameters in proportion to the number of formulas.
+    * `iff_share`: Share of formulas which are `Iff` expressions.
+    * `unit_conversions`: Use units which have to be converted to their reference unit. Otherwise
+      only reference units are used.
+    * `uncertainty_mix`: Relative weights of SimaPro uncertainty types for amounts and input
+      parameters.
+    * `delimiter`: CSV delimiter; one of `;`, `,`, or tab.
+    * `decimal_separator`: `,` or `.`; must differ from `delimiter`.
+    * `seed`: Random seed. The same options and seed always give the same file.
+
+    """
+
+    def __init__(
+        self,
+        processes: int = 1000,
+        exchanges: int = 10,
+        parameter_density: float = 0.2,
+        iff_share: float = 0.1,
+        unit_conversions: bool = True,
+        uncertainty_mix: Optional[dict] = None,
+        delimiter: str = ";",
+        decimal_separator: str = ",",
+        seed: int = 42,
+    ):
+        if delimiter not in DELIMITER_LABELS:
+            raise ValueError(f"Unsupported delimiter {delimiter}")
+        if decimal_separator not in {",", "."} or decimal_separator == delimiter:
+            raise ValueError(f"Unsupported decimal separator {decimal_separator}")
+        self.processes = processes
+        self.exchanges = exchanges
+        self.parameter_density = parameter_density
+        self.iff_share = iff_share
+        self.units = UNITS if unit_conversions else REFERENCE_UNITS
+        self.uncertainty_mix = uncertainty_mix or DEFAULT_UNCERTAINTY_MIX
+        self.delimiter = delimiter
+        self.decimal_separator = decimal_separator
+        # `Iff` arguments are separated with `;` if the decimal separator is `,`
+        self.argument_separator = ";" if decimal_separator == "," else ","
+        self.seed = seed
+
+    def number(self, value: float) -> str:
+        return f"{value:.6g}".replace(".", self.decimal_separator)
+
+    def uncertainty(self, amount: float) -> list:
+        """Return uncertainty type and the three uncertainty fields for `amount`"""
+        kind = self.rng.choices(
+            list(self.uncertainty_mix), weights=list(self.uncertainty_mix.values())
+        )[0]
+        if kind == "Lognormal":
+            # Squared geometric standard deviation
+            return [kind, self.number(self.rng.uniform(1.05, 2)), "0", "0"]
+        elif kind == "Normal":
+            # Variance
+            return [kind, self.number(abs(amount) * 0.1), "0", "0"]
+        elif kind in ("Triangle", "Uniform"):
+            return [kind, "0", self.number(amount * 0.5), self.number(amount * 1.5)]
+        return ["Undefined", "0", "0", "0"]
+
+    def formula(self, names: list) -> str:
+        """Random formula using `names`"""
+        a, b = self.rng.choice(names), self.rng.choice(names)
+        factor = self.number(self.rng.uniform(0.1, 10))
+        if self.rng.random() < self.iff_share:
+            sep = self.argument_separator
+            return f"Iff({a} > {factor}{sep} {a} * {factor}{sep} {b} / {factor})"
+        operator = self.rng.choice(["*", "+", "/"])
+        return f"({a} {operator} {b}) * {factor}"
+
+    def amount(self, names: list) -> tuple:
+        """Return amount (number or formula as string) and uncertainty fields"""
+        value = self.rng.uniform(0.01, 100)
+        if names and self.rng.random() < self.parameter_density:
+            return self.formula(names), ["Undefined", "0", "0", "0"]
+        return self.number(value), self.uncertainty(value)
+
+    def write(self, stream: TextIO) -> int:
+        """Write the export to `stream`; returns the number of lines written"""
+        self.rng = random.Random(self.seed)
+        writer = csv.writer(stream, delimiter=self.delimiter, lineterminator="\n")
+        lines = self.write_header(stream)
+
+        for index in range(self.processes):
+            lines += self.write_process(writer, index)
+
+        lines += self.write_global_parameters(writer)
+        lines += self.write_flow_lists(writer)
+        return lines
+
+    def write_header(self, stream: TextIO) -> int:
+        header = [
+            "{SimaPro 9.6.0.1}",
+            "{processes}",
+            "{Date: 01.01.2024}",
+            "{Time: 12:00:00}",
+            "{Project: Benchmark}",
+            "{CSV Format version: 9.0.0}",
+            f"{{CSV separator: {DELIMITER_LABELS[self.delimiter]}}}",
+            f"{{Decimal separator: {self.decimal_separator}}}",
+            "{Date separator: .}",
+            "{Short date format: dd.MM.yyyy}",
+            "",
+        ]
+        stream.write("\n".join(header) + "\n")
+        return len(header)
+
+    def write_process(self, writer: csv.writer, index: int) -> int:
+        rows = [["Process"], []]
+        for key, value in METADATA:
+            rows.extend([[key], [value], []])
+        rows.extend(
+            [
+                ["Process identifier"],
+                [f"BENCH{index:08d}"],
+                [],
+                ["Process name"],
+                [f"Synthetic process {index}"],
+                [],
+            ]
+        )
+
+        n_formulas = round(self.exchanges * self.parameter_density)
+        input_names = [f"input_{index}_{i}" for i in range(max(1, n_formulas // 2))]
+        calculated_names = [f"calc_{index}_{i}" for i in range(max(1, n_formulas // 2))]
+        global_names = [f"db_input_{i}" for i in range(GLOBAL_PARAMETERS)] + [
+            f"project_calc_{i}" for i in range(GLOBAL_PARAMETERS)
+        ]
+        names = input_names + calculated_names + global_names if n_formulas else []
+
+        unit = self.rng.choice(self.units)[0]
+        rows.append(["Products"])
+        rows.append(
+            [
+                f"Product {index}",
+                unit,
+                self.number(self.rng.uniform(0.5, 2)),
+                "100",
+                "not defined",
+                "Synthetic\\Products",
+                "",
+            ]
+        )
+        rows.append([])
+
+        technosphere, biosphere = [], {}
+        for _ in range(self.exchanges):
+            amount, uncertainty = self.amount(names)
+            if index and self.rng.random() < 0.5:
+                provider = self.rng.randrange(self.processes)
+                unit = self.rng.choice(self.units)[0]
+                technosphere.append([f"Product {provider}", unit, amount, *uncertainty, ""])
+            else:
+                category, _, subcompartments = self.rng.choice(BIOSPHERE_CATEGORIES)
+                name = f"{category} flow {self.rng.randrange(BIOSPHERE_FLOWS_PER_CATEGORY)}"
+                biosphere.setdefault(category, []).append(
+                    [name, self.rng.choice(subcompartments), "kg", amount, *uncertainty, ""]
+                )
+
+        rows.append(["Materials/fuels"])
+        rows.extend(technosphere)
+        rows.append([])
+        for category, _, _ in BIOSPHERE_CATEGORIES:
+            rows.append([category])
+            rows.extend(biosphere.get(category, []))
+            rows.append([])
+
+        if n_formulas:
+            rows.append(["Input parameters"])
+            for name in input_names:
+                value = self.rng.uniform(0.1, 10)
+                rows.append([name, self.number(value), *self.uncertainty(value), "No", ""])
+            rows.append([])
+            rows.append(["Calculated parameters"])
+            for i, name in enumerate(calculated_names):
+                # Only refer to earlier calculated parameters to avoid cycles
+                rows.append([name, self.formula(input_names + calculated_names[:i]), ""])
+            rows.append([])
+
+        rows.extend([["End"], []])
+        writer.writerows(rows)
+        return len(rows)
+
+    def write_global_parameters(self, writer: csv.writer) -> int:
+        rows = [["Database Input parameters"]]
+        for i in range(GLOBAL_PARAMETERS):
+            value = self.rng.uniform(0.1, 10)
+            rows.append([f"db_input_{i}", self.number(value), *self.uncertainty(value), "No", ""])
+        rows.extend([[], ["End"], [], ["Project Calculated parameters"]])
+        for i in range(GLOBAL_PARAMETERS):
+            rows.append([f"project_calc_{i}", self.formula([f"db_input_{i}"]), ""])
+        rows.extend([[], ["End"], []])
+        writer.writerows(rows)
+        return len(rows)
+
+    def write_flow_lists(self, writer: csv.writer) -> int:
+        rows = [["Quantities"]]
+        rows.extend([[quantity, "Yes"] for quantity in sorted({unit[1] for unit in UNITS})])
+        rows.extend([[], ["End"], [], ["Units"]])
+        rows.extend(
+            [
+                [name, quantity, self.number(factor), reference]
+                for name, quantity, factor, reference in UNITS
+            ]
+        )
+        rows.extend([[], ["End"], []])
+        for category, list_label, _ in BIOSPHERE_CATEGORIES:
+            rows.append([list_label])
+            for i in range(BIOSPHERE_FLOWS_PER_CATEGORY):
+                rows.append([f"{category} flow {i}", "kg", "", ""])
+            rows.extend([[], ["End"], []])
+        writer.writerows(rows)
+        return len(rows)
+
+
+def generate(filepath: Union[Path, str], **kwargs) -> dict:
+    """Write a synthetic export to `filepath`. Keyword arguments are passed to `Generator`.
+
+    Returns a dictionary with the number of `lines` and `bytes` written."""
+    with open(filepath, "w", encoding="sloppy-windows-1252", newline="") as f:
+        lines = Generator(**kwargs).write(f)
+    return {"lines": lines, "bytes": Path(filepath).stat().st_size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic SimaPro CSV export")
+    parser.add_argument("filepath", type=Path)
+    parser.add_argument("--processes", type=int, default=1000)
+    parser.add_argument("--exchanges", type=int, default=10)
+    parser.add_argument("--parameter-density", type=float, default=0.2)
+    parser.add_argument("--iff-share", type=float, default=0.1)
+    parser.add_argument("--no-unit-conversions", action="store_true")
+    parser.add_argument("--delimiter", default=";")
+    parser.add_argument("--decimal-separator", default=",")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    result = generate(
+        args.filepath,
+        processes=args.processes,
+        exchanges=args.exchanges,
+        parameter_density=args.parameter_density,
+        iff_share=args.iff_share,
+        unit_conversions=not args.no_unit_conversions,
+        delimiter="\t" if args.delimiter == "tab" else args.delimiter,
+        decimal_separator=args.decimal_separator,
+        seed=args.seed,
+    )
+    print(f"Wrote {result['lines']} lines ({result['bytes']} bytes) to {args.filepath}")
+
+
+if __name__ == "__main__":
+    main()
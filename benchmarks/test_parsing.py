@@ -0,0 +1,73 @@
+"""Benchmarks of the main stages of a SimaPro CSV import on generated files.
+
+Run with:
+
+... code-block:: bash
+
+    pytest benchmarks --processes 1000,10000,100000
+
+Throughput in rows (lines of the input file) and megabytes per second is added to the
+`extra_info` of each benchmark. The construction benchmark also adds the wall time of each import
+stage, e.g. `resolve_parameters_seconds` and `normalize_units_seconds`."""
+
+import pytest
+
+from bw_simapro_csv import SimaProCSV
+
+# Larger files are only read a few times
+ROUNDS = 3
+
+
+def add_throughput(benchmark, size: dict) -> None:
+    # No statistics are collected with `--benchmark-disable`
+    if benchmark.stats is None:
+        return
+    mean = benchmark.stats.stats.mean
+    benchmark.extra_info["rows"] = size["lines"]
+    benchmark.extra_info["megabytes"] = size["bytes"] / 1e6
+    benchmark.extra_info["rows_per_second"] = size["lines"] / mean
+    benchmark.extra_info["megabytes_per_second"] = size["bytes"] / 1e6 / mean
+
+
+def add_stage_timings(benchmark, sp: SimaProCSV) -> None:
+    """Add the wall time of each import stage of `sp` to the `extra_info` of `benchmark`"""
+    for name, stage in sp.timings["stages"].items():
+        benchmark.extra_info[f"{name}_seconds"] = stage["wall_time"]
+
+
+def parse(filepath, **kwargs) -> SimaProCSV:
+    return SimaProCSV(filepath, stderr_logs=False, write_logs=False, **kwargs)
+
+
+def test_construction(benchmark, generated_file):
+    filepath, size = generated_file
+    sp = benchmark.pedantic(parse, args=(filepath,), kwargs={"profile": True}, rounds=ROUNDS)
+    add_throughput(benchmark, size)
+    add_stage_timings(benchmark, sp)
+
+
+@pytest.mark.parametrize("workers", [1, 2, 4])
+def test_parallel_construction(benchmark, generated_file, workers):
+    """Compare with `workers=1`. The CPU time of each stage is only that of the main process, so
+    it shows how much work is left there when the workers run on their own cores."""
+    filepath, size = generated_file
+    sp = benchmark.pedantic(
+        parse, args=(filepath,), kwargs={"profile": True, "workers": workers}, rounds=ROUNDS
+    )
+    add_throughput(benchmark, size)
+    add_stage_timings(benchmark, sp)
+    for name, stage in sp.timings["stages"].items():
+        benchmark.extra_info[f"{name}_cpu_seconds"] = stage["cpu_time"]
+
+
+def test_lazy_iteration(benchmark, generated_file):
+    filepath, size = generated_file
+    benchmark.pedantic(lambda: list(parse(filepath, lazy=True)), rounds=ROUNDS)
+    add_throughput(benchmark, size)
+
+
+def test_to_brightway(benchmark, generated_file):
+    filepath, size = generated_file
+    sp = parse(filepath)
+    benchmark.pedantic(sp.to_brightway, rounds=ROUNDS)
+    add_throughput(benchmark, size)
@@ -1,11 +1,12 @@
 from typing import List
 
+from ..records import Parameter
 from ..utils import normalize_number_in_formula, skip_empty
 from .base import SimaProCSVBlock
 
 
 class CalculatedParameters(SimaProCSVBlock):
-    def __init__(self, block: List[tuple], header: dict, **kwargs):
+    def __init__(self, block: List[tuple], header: dict, records: bool = False, **kwargs):
         """Parse an `{} Calculated parameters` block.
 
         Has the form:
@@ -23,20 +24,21 @@ class CalculatedParameters(SimaProCSVBlock):
         1. formula
         2. comment
 
+        If `records`, each parameter is a `Parameter` instead of a dictionary.
+
         """
         self.parsed = []
 
         for line_no, line in skip_empty(block):
-            self.parsed.append(
-                {
-                    "name": line[0],
-                    "formula": normalize_number_in_formula(
-                        line[1], header.get("decimal_separator", ".")
-                    ),
-                    "comment": line[2],
-                    "line_no": line_no,
-                }
-            )
+            obj = {
+                "name": line[0],
+                "formula": normalize_number_in_formula(
+                    line[1], header.get("decimal_separator", ".")
+                ),
+                "comment": line[2],
+                "line_no": line_no,
+            }
+            self.parsed.append(Parameter(obj) if records else obj)
 
 
 class DatabaseCalculatedParameters(CalculatedParameters):
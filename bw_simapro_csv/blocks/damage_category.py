@@ -1,6 +1,6 @@
 from typing import List
 
-from ..utils import asnumber, jump_to_nonempty, skip_empty
+from ..utils import LineCursor, asnumber, skip_empty
 from .base import SimaProCSVBlock
 
 
@@ -36,13 +36,12 @@ class DamageCategory(SimaProCSVBlock):
         """
         self.parsed = {"impact_categories": []}
 
-        block = jump_to_nonempty(block)
-        self.parsed["name"], self.parsed["unit"] = block.pop(0)[1]
+        cursor = LineCursor(block).skip_empty()
+        self.parsed["name"], self.parsed["unit"] = cursor.pop()[1]
 
-        block = jump_to_nonempty(block)
-        assert block.pop(0)[1] == ["Impact categories"]
+        assert cursor.skip_empty().pop()[1] == ["Impact categories"]
 
-        for line_no, line in skip_empty(block):
+        for line_no, line in skip_empty(cursor):
             self.parsed["impact_categories"].append(
                 {"name": line[0], "factor": asnumber(line[1]), "line_no": line_no}
             )
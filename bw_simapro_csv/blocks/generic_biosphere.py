@@ -1,6 +1,8 @@
-from typing import Any, List
+from typing import Any, Iterable, List
 
-from ..cas import validate_cas_string
+from ..cas import validate_cas_strings
+from ..constants import CONTEXT_MAPPING, MAGIC
+from ..records import Exchange
 from ..utils import add_amount_or_formula, skip_empty
 from .base import SimaProCSVBlock
 
@@ -44,11 +46,15 @@ class GenericBiosphere(SimaProCSVBlock):
                 {
                     "name": line[0],
                     "unit": line[1],
-                    "cas_number": validate_cas_string(line[2]),
+                    "cas_number": line[2],
                     "comment": line[3],
                     "line_no": line_no,
                 }
             )
+        for obj, cas in zip(
+            self.parsed, validate_cas_strings(o["cas_number"] for o in self.parsed)
+        ):
+            obj["cas_number"] = cas
 
     def __eq__(self, other: Any) -> bool:
         if isinstance(other, SimaProCSVBlock):
@@ -57,7 +63,7 @@ class GenericBiosphere(SimaProCSVBlock):
 
 
 class GenericUncertainBiosphere(GenericBiosphere):
-    def __init__(self, block: List[list], header: dict, category: str):
+    def __init__(self, block: List[list], header: dict, category: str, records: bool = False):
         """Parse a generic biosphere block with uncertainty.
 
         Applies to all of the following:
@@ -96,25 +102,54 @@ class GenericUncertainBiosphere(GenericBiosphere):
         In previous versions, the index of units and values could be switched. This doesn't appear
         to be the case anymore.
 
+        If `records`, each edge is an `Exchange` instead of a dictionary.
+
         """
         self.category = category
         self.parsed = []
         self.has_formula = True
 
         for line_no, line in skip_empty(block):
+            obj = {
+                "name": line[0],
+                "context": (self.category, line[1]),
+                "unit": line[2],
+                "kind": line[4],
+                "field1": line[5],
+                "field2": line[6],
+                "field3": line[7],
+                "line_no": line_no,
+            }
             self.parsed.append(
                 add_amount_or_formula(
-                    {
-                        "name": line[0],
-                        "context": (self.category, line[1]),
-                        "unit": line[2],
-                        "kind": line[4],
-                        "field1": line[5],
-                        "field2": line[6],
-                        "field3": line[7],
-                        "line_no": line_no,
-                    },
-                    line[3],
-                    header["decimal_separator"],
+                    Exchange(obj) if records else obj, line[3], header["decimal_separator"]
                 )
             )
+
+
+def build_flow_index(blocks: Iterable[SimaProCSVBlock]) -> dict[tuple[str, str], dict]:
+    """Index the flow metadata in `GenericBiosphere` blocks by `(context, name)`.
+
+    `context` is the label of the matching block in a `Process`, e.g. `Emissions to air` for
+    `Airborne emissions` flows. If a flow is listed in more than one block, CAS numbers from later
+    blocks replace earlier ones, and comments are joined, as they would be when adding each block
+    to the process edges in turn. Within a block, the last line for a flow is used."""
+    index = {}
+    for block in filter(lambda x: isinstance(x, GenericBiosphere), blocks):
+        try:
+            context = CONTEXT_MAPPING[block.category]
+        except KeyError:
+            continue
+        for name, obj in {o["name"]: o for o in block.parsed}.items():
+            if (key := (context, name)) not in index:
+                index[key] = dict(obj)
+                continue
+            existing = index[key]
+            if obj.get("cas_number"):
+                existing["cas_number"] = obj["cas_number"]
+            if obj.get("comment"):
+                if existing.get("comment"):
+                    existing["comment"] += MAGIC + obj["comment"]
+                else:
+                    existing["comment"] = obj["comment"]
+    return index
@@ -1,7 +1,7 @@
 from typing import List
 
-from ..cas import validate_cas_string
-from ..utils import asnumber, jump_to_nonempty, skip_empty
+from ..cas import validate_cas_strings
+from ..utils import LineCursor, asnumber, skip_empty
 from .base import SimaProCSVBlock
 
 
@@ -32,20 +32,22 @@ class ImpactCategory(SimaProCSVBlock):
         """
         self.parsed = {"cfs": []}
 
-        block = jump_to_nonempty(block)
-        self.parsed["name"], self.parsed["unit"] = block.pop(0)[1]
+        cursor = LineCursor(block).skip_empty()
+        self.parsed["name"], self.parsed["unit"] = cursor.pop()[1]
 
-        block = jump_to_nonempty(block)
-        assert block.pop(0)[1] == ["Substances"]
+        assert cursor.skip_empty().pop()[1] == ["Substances"]
 
-        for line_no, line in skip_empty(block):
+        for line_no, line in skip_empty(cursor):
             self.parsed["cfs"].append(
                 {
                     "context": (line[0], line[1]),
                     "name": line[2],
-                    "cas_number": validate_cas_string(line[3]),
+                    "cas_number": line[3],
                     "factor": asnumber(line[4]),
                     "unit": line[5],
                     "line_no": line_no,
                 }
             )
+        cfs = self.parsed["cfs"]
+        for obj, cas in zip(cfs, validate_cas_strings(o["cas_number"] for o in cfs)):
+            obj["cas_number"] = cas
@@ -1,6 +1,6 @@
 from typing import List
 
-from ..utils import asnumber, jump_to_nonempty, skip_empty
+from ..utils import LineCursor, asnumber, skip_empty
 from .base import SimaProCSVBlock
 
 
@@ -43,10 +43,9 @@ class NormalizationWeightingSet(SimaProCSVBlock):
         self.parsed = {"normalization": [], "weighting": []}
         mode = None
 
-        block = jump_to_nonempty(block)
-        self.parsed["name"] = block.pop(0)[1][0]
-        block = jump_to_nonempty(block)
-        for line_no, line in skip_empty(block):
+        cursor = LineCursor(block).skip_empty()
+        self.parsed["name"] = cursor.pop()[1][0]
+        for line_no, line in skip_empty(cursor):
             if line[0] == "Normalization":
                 mode = "normalization"
             elif line[0] == "Weighting":
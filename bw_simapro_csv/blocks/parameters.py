@@ -1,12 +1,13 @@
 from typing import List
 
+from ..records import Parameter
 from ..uncertainty import distribution
 from ..utils import asboolean, skip_empty
 from .base import SimaProCSVBlock
 
 
 class InputParameters(SimaProCSVBlock):
-    def __init__(self, block: List[list], header: dict, **kwargs):
+    def __init__(self, block: List[list], header: dict, records: bool = False, **kwargs):
         """Parse an `Project|Database Input Parameters` block.
 
         Each line has the form:
@@ -20,21 +21,20 @@ class InputParameters(SimaProCSVBlock):
         6. hidden ("Yes" or "No")
         7-X. comment (can include multiple elements)
 
-        The block header label is already stripped."""
+        The block header label is already stripped. If `records`, each parameter is a
+        `Parameter` instead of a dictionary."""
         self.parsed = []
 
         for line_no, line in skip_empty(block):
-            self.parsed.append(
-                distribution(
-                    *line[1:6], decimal_separator=header["decimal_separator"], line_no=line_no
-                )
-                | {
-                    "name": line[0],
-                    "hidden": asboolean(line[6]),
-                    "comment": "\n".join([elem for elem in line[7:] if elem]),
-                    "line_no": line_no,
-                }
-            )
+            obj = distribution(
+                *line[1:6], decimal_separator=header["decimal_separator"], line_no=line_no
+            ) | {
+                "name": line[0],
+                "hidden": asboolean(line[6]),
+                "comment": "\n".join([elem for elem in line[7:] if elem]),
+                "line_no": line_no,
+            }
+            self.parsed.append(Parameter(obj) if records else obj)
 
 
 class DatabaseInputParameters(InputParameters):
@@ -1,8 +1,12 @@
-from bw2parameters import Interpreter, MissingName, ParameterSet
+from collections import ChainMap
+from typing import Optional
+
+from bw2parameters import MissingName
 from loguru import logger
 
 from ..constants import CONTEXT_MAPPING, MAGIC
 from ..errors import FormulaReservedWord, WasteModelMismatch
+from ..evaluation import ScopedInterpreter, evaluate_parameters
 from ..parameters import (
     FormulaSubstitutor,
     add_prefix_to_uppercase_input_parameters,
@@ -10,15 +14,18 @@ from ..parameters import (
     substitute_in_formulas,
 )
 from ..uncertainty import clean_simapro_uncertainty_fields, distribution
-from ..utils import asboolean, asdate, get_key_multiline_values, jump_to_nonempty
+from ..utils import LineCursor, asboolean, asdate, get_key_multiline_values
 from .base import SimaProCSVBlock
 from .calculated_parameters import DatasetCalculatedParameters
-from .generic_biosphere import GenericBiosphere, GenericUncertainBiosphere
+from .generic_biosphere import GenericUncertainBiosphere, build_flow_index
 from .parameters import DatasetInputParameters
 from .products import Products
 from .technosphere_edges import TechnosphereEdges
 from .wastes import RemainingWaste, SeparatedWaste, WasteScenario, WasteTreatment
 
+# Process blocks with flows described in `GenericBiosphere` blocks
+FLOW_CONTEXTS = frozenset(CONTEXT_MAPPING.values())
+
 BLOCK_MAPPING = {
     "Avoided products": TechnosphereEdges,
     "Calculated parameters": DatasetCalculatedParameters,
@@ -43,14 +50,17 @@ BLOCK_MAPPING = {
 
 
 class Process(SimaProCSVBlock):
-    """A life cycle inventory process, with inputs, products, and elementary exchanges"""
+    """A life cycle inventory process, with inputs, products, and elementary exchanges.
 
-    def __init__(self, block: list[list], header: dict):
+    If `records`, exchanges and parameters are `Record` instances instead of dictionaries; see
+    `bw_simapro_csv.records`."""
+
+    def __init__(self, block: list[list], header: dict, records: bool = False):
         self.parsed = {"metadata": {}}
         self.blocks = {}
         self.header = header
 
-        block = jump_to_nonempty(block)
+        cursor = LineCursor(block).skip_empty()
 
         # Start with metadata. This is stored as:
         # Key
@@ -58,93 +68,107 @@ class Process(SimaProCSVBlock):
         # On separate lines (value can span more than one line).
         # Also, sometimes the value is missing (blank line), so we can't use
         # `get_key_multiline_value`.
-        self.index = 0
-        while block[self.index][1][0] not in BLOCK_MAPPING:
-            k, v = self.pull_metadata_pair(block, header)
+        while cursor.peek()[1][0] not in BLOCK_MAPPING:
+            k, v = self.pull_metadata_pair(cursor, header)
             if v:
                 self.parsed["metadata"][k] = v
 
-        for block_type, block_data in get_key_multiline_values(
-            block[self.index :], stop_terms=BLOCK_MAPPING
-        ):
+        for block_type, block_data in get_key_multiline_values(cursor, stop_terms=BLOCK_MAPPING):
             kwargs = {
                 "header": header,
                 "block": block_data,
                 "category": block_type,
+                "records": records,
             }
             if not block_data:
                 continue
             self.blocks[block_type] = BLOCK_MAPPING[block_type](**kwargs)
 
-    def pull_metadata_pair(self, block: list[list], header: dict) -> (str, str):
-        key = block[self.index][1][0]
+    def pull_metadata_pair(self, cursor: LineCursor, header: dict) -> (str, str):
+        key = cursor.peek()[1][0]
 
         if key == "Literature references":
-            self.index += 1
+            cursor.advance()
             value = []
-            while any(block[self.index][1]):
-                reference = {"reference": block[self.index][1][0]}
-                if len(block[self.index][1]) > 1:
-                    reference["comment"] = block[self.index][1][1]
+            while any(cursor.peek()[1]):
+                reference = {"reference": cursor.peek()[1][0]}
+                if len(cursor.peek()[1]) > 1:
+                    reference["comment"] = cursor.peek()[1][1]
                 value.append(reference)
-                self.index += 1
+                cursor.advance()
         elif key == "Date":
-            value = asdate(block[self.index + 1][1][0], dayfirst=header["dayfirst"])
-            self.index += 2
+            value = asdate(cursor.peek(1)[1][0], dayfirst=header["dayfirst"])
+            cursor.advance(2)
         elif key == "Infrastructure":
-            value = asboolean(block[self.index + 1][1][0])
-            self.index += 2
+            value = asboolean(cursor.peek(1)[1][0])
+            cursor.advance(2)
         else:
             value = (
-                MAGIC.join([elem for elem in block[self.index + 1][1] if elem])
-                if block[self.index + 1][1]
+                MAGIC.join([elem for elem in cursor.peek(1)[1] if elem])
+                if cursor.peek(1)[1]
                 else ""
             )
-            self.index += 2
+            cursor.advance(2)
 
         # Skip empty lines until next pair. Should only be one line, but life can be surprising
-        while not any(block[self.index][1]):
-            self.index += 1
+        while not any(cursor.peek()[1]):
+            cursor.advance()
 
         return key, value
 
-    def resolve_local_parameters(self, global_params: dict, substitutes: dict) -> None:
+    def resolve_local_parameters(
+        self,
+        global_params: dict,
+        substitutes: dict,
+        evaluator: str = "asteval",
+        interpreter: Optional[ScopedInterpreter] = None,
+    ) -> None:
         """Resolve any formulae in input or output amounts, and convert raw data to parsed.
 
-        Takes in parameter renames and amounts from project and database input parameters."""
+        Takes in parameter renames and amounts from project and database input parameters.
+        `evaluator` selects the formula interpreter; see `bw_simapro_csv.evaluation`.
+
+        `interpreter` is a `ScopedInterpreter` with `global_params` already installed, which can
+        be shared by all processes; local parameters are only added in a scope for this process.
+        If not given, a new one is created."""
+        if interpreter is None:
+            interpreter = ScopedInterpreter(global_params, evaluator=evaluator)
+        with interpreter.local() as scope:
+            self._resolve_local_parameters(substitutes, scope)
+
+    def _resolve_local_parameters(self, substitutes: dict, interpreter: ScopedInterpreter) -> None:
+        # Local names and values are layered over the global ones instead of merging copies
+        substitutes = ChainMap(substitutes)
         if "Input parameters" in self.blocks:
             add_prefix_to_uppercase_input_parameters(self.blocks["Input parameters"].parsed)
-            substitutes = substitutes | {
-                o["original_name"].upper(): o["name"]
-                for o in self.blocks["Input parameters"].parsed
-            }
-            global_params = global_params | {
-                o["name"]: o["amount"] for o in self.blocks["Input parameters"].parsed
-            }
+            substitutes = substitutes.new_child(
+                {
+                    o["original_name"].upper(): o["name"]
+                    for o in self.blocks["Input parameters"].parsed
+                }
+            )
+            interpreter.add_symbols(
+                {o["name"]: o["amount"] for o in self.blocks["Input parameters"].parsed}
+            )
 
         if "Calculated parameters" in self.blocks:
             add_prefix_to_uppercase_input_parameters(
                 prepare_formulas(self.blocks["Calculated parameters"].parsed, self.header)
             )
-            substitutes = substitutes | {
-                o["original_name"].upper(): o["name"]
-                for o in self.blocks["Calculated parameters"].parsed
-            }
+            substitutes = substitutes.new_child(
+                {
+                    o["original_name"].upper(): o["name"]
+                    for o in self.blocks["Calculated parameters"].parsed
+                }
+            )
             visitor = FormulaSubstitutor(substitutes)
             for obj in self.blocks["Calculated parameters"].parsed:
                 substitute_in_formulas(obj, visitor)
-            ParameterSet(
-                {o["name"]: o for o in self.blocks["Calculated parameters"].parsed}, global_params
-            ).evaluate_and_set_amount_field()
-            global_params = global_params | {
-                o["name"]: o["amount"] for o in self.blocks["Calculated parameters"].parsed
-            }
+            # Adds the calculated values to the interpreter scope
+            evaluate_parameters(self.blocks["Calculated parameters"].parsed, interpreter)
         else:
             visitor = FormulaSubstitutor(substitutes)
 
-        interpreter = Interpreter()
-        interpreter.add_symbols(global_params)
-
         for label, block in self.blocks.items():
             if not getattr(block, "has_formula", None):
                 continue
@@ -182,19 +206,23 @@ class Process(SimaProCSVBlock):
                     )
                     clean_simapro_uncertainty_fields(obj)
 
-    def supplement_biosphere_edges(self, blocks: list[SimaProCSVBlock]) -> None:
-        """Add comments and CAS numbers from the metadata blocks"""
-        for block in filter(lambda x: isinstance(x, GenericBiosphere), blocks):
-            try:
-                correspondent = self.blocks[CONTEXT_MAPPING[block.category]]
-            except KeyError:
-                continue
-
-            data_dict = {o["name"]: o for o in block.parsed}
+    def supplement_biosphere_edges(
+        self,
+        blocks: Optional[list[SimaProCSVBlock]] = None,
+        flow_index: Optional[dict[tuple[str, str], dict]] = None,
+    ) -> None:
+        """Add comments and CAS numbers from the metadata blocks.
 
+        Pass `flow_index` from `build_flow_index` to avoid indexing the `GenericBiosphere` blocks
+        in `blocks` again for every process."""
+        if flow_index is None:
+            flow_index = build_flow_index(blocks or [])
+        for label, correspondent in self.blocks.items():
+            if label not in FLOW_CONTEXTS:
+                continue
             for edge in correspondent.parsed:
                 try:
-                    partner = data_dict[edge["name"]]
+                    partner = flow_index[(label, edge["name"])]
                 except KeyError:
                     continue
 
@@ -1,9 +1,10 @@
+from ..records import Exchange
 from ..utils import add_amount_or_formula, skip_empty
 from .base import SimaProCSVBlock
 
 
 class Products(SimaProCSVBlock):
-    def __init__(self, block: list[tuple], header: dict, **kwargs):
+    def __init__(self, block: list[tuple], header: dict, records: bool = False, **kwargs):
         """Parse a `Products` block.
 
         Has the form:
@@ -24,22 +25,23 @@ class Products(SimaProCSVBlock):
         5. category
         6. comment
 
+        If `records`, each product is an `Exchange` instead of a dictionary.
+
         """
         self.parsed = []
         self.has_formula = True
 
         for line_no, line in skip_empty(block):
+            ds = {
+                "name": line[0],
+                "unit": line[1],
+                "waste_type": line[4],
+                "category": line[5],
+                "comment": line[6],
+                "line_no": line_no,
+            }
             ds = add_amount_or_formula(
-                {
-                    "name": line[0],
-                    "unit": line[1],
-                    "waste_type": line[4],
-                    "category": line[5],
-                    "comment": line[6],
-                    "line_no": line_no,
-                },
-                line[2],
-                header["decimal_separator"],
+                Exchange(ds) if records else ds, line[2], header["decimal_separator"]
             )
             ds = add_amount_or_formula(
                 data=ds,
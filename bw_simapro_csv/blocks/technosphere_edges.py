@@ -1,9 +1,12 @@
+from ..records import Exchange
 from ..utils import add_amount_or_formula, skip_empty
 from .base import SimaProCSVBlock
 
 
 class TechnosphereEdges(SimaProCSVBlock):
-    def __init__(self, block: list[tuple], header: dict, category: str, **kwargs):
+    def __init__(
+        self, block: list[tuple], header: dict, category: str, records: bool = False, **kwargs
+    ):
         """Parse a block representing inputs or outputs (avoided production).
 
         Has the form:
@@ -25,25 +28,26 @@ class TechnosphereEdges(SimaProCSVBlock):
         6. uncert. param.
         7. comment
 
+        If `records`, each edge is an `Exchange` instead of a dictionary.
+
         """
         self.category = category
         self.parsed = []
         self.has_formula = True
 
         for line_no, line in skip_empty(block):
+            obj = {
+                "name": line[0],
+                "unit": line[1],
+                "kind": line[3],
+                "field1": line[4],
+                "field2": line[5],
+                "field3": line[6],
+                "comment": line[7],
+                "line_no": line_no,
+            }
             self.parsed.append(
                 add_amount_or_formula(
-                    {
-                        "name": line[0],
-                        "unit": line[1],
-                        "kind": line[3],
-                        "field1": line[4],
-                        "field2": line[5],
-                        "field3": line[6],
-                        "comment": line[7],
-                        "line_no": line_no,
-                    },
-                    line[2],
-                    header["decimal_separator"],
+                    Exchange(obj) if records else obj, line[2], header["decimal_separator"]
                 )
             )
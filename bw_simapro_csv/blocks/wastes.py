@@ -1,9 +1,10 @@
+from ..records import Exchange
 from ..utils import add_amount_or_formula, asnumber, skip_empty
 from .base import SimaProCSVBlock
 
 
 class WasteTreatment(SimaProCSVBlock):
-    def __init__(self, block: list[tuple], header: dict, **kwargs):
+    def __init__(self, block: list[tuple], header: dict, records: bool = False, **kwargs):
         """Parse a `Waste treatment` block.
 
         Has the form:
@@ -22,23 +23,24 @@ class WasteTreatment(SimaProCSVBlock):
         4. category
         5. comment
 
+        If `records`, each edge is an `Exchange` instead of a dictionary.
+
         """
         self.parsed = []
         self.has_formula = True
 
         for line_no, line in skip_empty(block):
+            obj = {
+                "name": line[0],
+                "unit": line[1],
+                "waste_type": line[3],
+                "category": line[4],
+                "comment": line[5] if len(line) > 5 else None,
+                "line_no": line_no,
+            }
             self.parsed.append(
                 add_amount_or_formula(
-                    {
-                        "name": line[0],
-                        "unit": line[1],
-                        "waste_type": line[3],
-                        "category": line[4],
-                        "comment": line[5] if len(line) > 5 else None,
-                        "line_no": line_no,
-                    },
-                    line[2],
-                    header["decimal_separator"],
+                    Exchange(obj) if records else obj, line[2], header["decimal_separator"]
                 )
             )
 
@@ -1,7 +1,7 @@
 import datetime
 import itertools
 from copy import deepcopy
-from typing import Union
+from typing import Iterator, Union
 from uuid import uuid4
 
 from loguru import logger
@@ -134,18 +134,10 @@ def reference_to_product(process_edge: dict, product: dict) -> dict:
     return process_edge
 
 
-def lci_to_brightway(
-    spcsv: SimaProCSV,
-    missing_string: str = "(unknown)",
-    separate_products: bool = False,
-    shorten_names: bool = True,
-) -> dict:
-    """Turn an extracted SimaPro CSV extract into metadata that can be imported into Brightway.
-
-    Doesn't do any normalization or other data changes, just reorganizes the existing data."""
-    issued_warnings = set()
-
-    data = {
+def brightway_metadata(spcsv: SimaProCSV) -> dict:
+    """Database metadata and parameters of the Brightway import format; everything except the
+    process and product datasets."""
+    return {
         "database": {
             "name": spcsv.database_name,
             "simapro_filepath": spcsv.filepath,
@@ -155,25 +147,61 @@ def lci_to_brightway(
             "simapro_csv_version": spcsv.header.get("simapro_csv_version"),
             "created": spcsv.header["created"].isoformat()[:19],
         },
-        "processes": [],
         # Note reversing of database and project terms here
         # In SimaPro, the project is lower priority than the database
         # but in Brightway it's the opposite.
-        "products": [],
         "project_parameters": [
-            param
+            dict(param)
             for block in spcsv.blocks
             for param in block.parsed
             if isinstance(block, (DatabaseCalculatedParameters, DatabaseInputParameters))
         ],
         "database_parameters": [
-            param
+            dict(param)
             for block in spcsv.blocks
             for param in block.parsed
             if isinstance(block, (ProjectCalculatedParameters, ProjectInputParameters))
         ],
     }
 
+
+def lci_to_brightway(
+    spcsv: SimaProCSV,
+    missing_string: str = "(unknown)",
+    separate_products: bool = False,
+    shorten_names: bool = True,
+) -> dict:
+    """Turn an extracted SimaPro CSV extract into metadata that can be imported into Brightway.
+
+    Doesn't do any normalization or other data changes, just reorganizes the existing data. See
+    `iter_brightway_datasets` to get the datasets one at a time instead."""
+    metadata = brightway_metadata(spcsv)
+    data = {"database": metadata.pop("database"), "processes": [], "products": []} | metadata
+    for dataset in iter_brightway_datasets(
+        spcsv,
+        missing_string=missing_string,
+        separate_products=separate_products,
+        shorten_names=shorten_names,
+    ):
+        data["products" if dataset["type"] == "product" else "processes"].append(dataset)
+    return data
+
+
+def iter_brightway_datasets(
+    spcsv: SimaProCSV,
+    missing_string: str = "(unknown)",
+    separate_products: bool = False,
+    shorten_names: bool = True,
+) -> Iterator[dict]:
+    """Yield the process and product datasets of `lci_to_brightway` one at a time.
+
+    Product datasets have the `type` `product`. Each process dataset is followed by the product
+    datasets it references, if `separate_products`. Multifunctional processes are allocated as
+    soon as they are built, so the allocated processes are yielded in place of the
+    multifunctional process. In lazy mode, only one `Process` block is read at a time, so memory
+    use doesn't depend on the number of processes."""
+    issued_warnings = set()
+
     literature_mapping = {
         obj.parsed["Name"]: obj.parsed
         for obj in filter(lambda b: isinstance(b, LiteratureReference), spcsv)
@@ -190,6 +218,7 @@ def lci_to_brightway(
         if not code or not code.strip() or code.strip() in {'""', "''"}:
             code = uuid4().hex
 
+        products = []
         process_dataset = {
             "database": spcsv.database_name,
             "simapro_project": substitute_unspecified(spcsv.header["project"]) or missing_string,
@@ -273,7 +302,7 @@ def lci_to_brightway(
                 )
                 if separate_products:
                     product_dct = as_product_dct(production_dct, process_dataset)
-                    data["products"].append(product_dct)
+                    products.append(product_dct)
                     process_dataset["exchanges"].append(
                         reference_to_product(production_dct, product_dct)
                     )
@@ -284,12 +313,12 @@ def lci_to_brightway(
                 waste_edge = edge | {"type": "technosphere", "functional": True}
                 if separate_products:
                     waste_dct = as_product_dct(waste_edge, process_dataset)
-                    data["products"].append(waste_dct)
+                    products.append(waste_dct)
                     process_dataset["exchanges"].append(reference_to_product(waste_edge, waste_dct))
                 else:
                     process_dataset["exchanges"].append(waste_edge)
                 if not any(e for e in process_dataset["exchanges"] if e["type"] == "production"):
-                    dummy = deepcopy(edge)
+                    dummy = deepcopy(dict(edge))
                     dummy.update(
                         {
                             "amount": 0,
@@ -300,18 +329,15 @@ def lci_to_brightway(
                     )
                     process_dataset["exchanges"].append(dummy)
 
-        data["processes"].append(process_dataset)
-
-    if any(
-        sum(1 for exc in ds.get("exchanges") if exc.get("functional")) > 1
-        for ds in data["processes"]
-    ):
-        as_dict = allocation_before_writing(
-            {(spcsv.database_name, ds["code"]): ds for ds in data["processes"]}, "manual_allocation"
-        )
-        for (database, code), ds in as_dict.items():
-            ds["code"] = code
-            ds["database"] = database
-        data["processes"] = list(as_dict.values())
-
-    return data
+        if sum(1 for exc in process_dataset["exchanges"] if exc.get("functional")) > 1:
+            allocated = allocation_before_writing(
+                {(spcsv.database_name, process_dataset["code"]): process_dataset},
+                "manual_allocation",
+            )
+            for (database, code), ds in allocated.items():
+                ds["code"] = code
+                ds["database"] = database
+                yield ds
+        else:
+            yield process_dataset
+        yield from products
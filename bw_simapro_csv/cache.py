@@ -0,0 +1,116 @@
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+from platformdirs import user_cache_dir
+
+# Total size of cached files; the least recently used files are removed beyond this
+CACHE_MAX_BYTES = 2 * 1024**3
+CACHE_SUFFIX = ".pickle"
+HASH_CHUNK_SIZE = 2**20
+
+
+def cache_dir() -> Path:
+    return Path(user_cache_dir("bw_simapro_csv", "pylca"))
+
+
+def file_hash(filepath: Path) -> str:
+    """BLAKE2b hash of the contents of `filepath`"""
+    digest = hashlib.blake2b(digest_size=32)
+    with open(filepath, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(filepath: Path, options: dict) -> str:
+    """Key for the parsed contents of `filepath`, given the library version and the options
+    which change the parsed result"""
+    from . import __version__
+
+    digest = hashlib.blake2b(digest_size=32)
+    digest.update(file_hash(filepath).encode())
+    digest.update(__version__.encode())
+    digest.update(repr(sorted(options.items())).encode())
+    return digest.hexdigest()
+
+
+def cache_filepath(key: str, directory: Optional[Path] = None) -> Path:
+    return (directory or cache_dir()) / (key + CACHE_SUFFIX)
+
+
+def load_cached(key: str, directory: Optional[Path] = None) -> Optional[dict]:
+    """Load the cached state for `key`, or return `None` if not cached.
+
+    Using a file marks it as recently used. Unreadable files, e.g. from an incompatible version
+    of a dependency, are removed and treated as missing."""
+    filepath = cache_filepath(key, directory)
+    if not filepath.is_file():
+        return None
+    try:
+        with open(filepath, "rb") as f:
+            state = pickle.load(f)
+    except Exception as exc:
+        logger.warning("Removing unreadable cache file {p}: {e}", p=str(filepath), e=exc)
+        filepath.unlink(missing_ok=True)
+        return None
+    try:
+        os.utime(filepath)
+    except OSError:
+        pass
+    logger.debug("Using cached import {p}", p=str(filepath))
+    return state
+
+
+def store_cached(
+    key: str,
+    state: dict,
+    directory: Optional[Path] = None,
+    max_bytes: int = CACHE_MAX_BYTES,
+) -> Optional[Path]:
+    """Write `state` for `key` with pickle protocol 5, and evict least recently used files.
+
+    Failing to write the cache is not an error; returns `None` in that case."""
+    filepath = cache_filepath(key, directory)
+    try:
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        tmp = filepath.with_name(filepath.name + ".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(state, f, protocol=5)
+        os.replace(tmp, filepath)
+    except (OSError, pickle.PicklingError) as exc:
+        logger.warning("Can't write cache file {p}: {e}", p=str(filepath), e=exc)
+        return None
+    evict(filepath.parent, max_bytes, keep=filepath)
+    return filepath
+
+
+def evict(directory: Path, max_bytes: int = CACHE_MAX_BYTES, keep: Optional[Path] = None) -> int:
+    """Remove the least recently used cache files until the total size is at most `max_bytes`.
+    `keep` is never removed. Returns the number of removed files."""
+    files = []
+    for filepath in directory.glob("*" + CACHE_SUFFIX):
+        try:
+            stat = filepath.stat()
+        except OSError:
+            continue
+        files.append((stat.st_mtime_ns, stat.st_size, filepath))
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for _, size, filepath in sorted(files, key=lambda x: x[0]):
+        if total <= max_bytes:
+            break
+        if filepath == keep:
+            continue
+        filepath.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    return removed
+
+
+def clear_cache(directory: Optional[Path] = None) -> int:
+    """Remove all cached imports. Returns the number of removed files."""
+    return evict(directory or cache_dir(), max_bytes=-1)
@@ -1,46 +1,127 @@
+from functools import lru_cache
 from numbers import Number
-from typing import Optional
+from typing import Iterable, Optional, Sequence
 
 import numpy as np
 from loguru import logger
 
+# Number of distinct CAS strings to remember; LCIA methods repeat the same CAS numbers in many
+# impact categories
+CAS_CACHE_SIZE = 2**16
+
+# Only the last nine digits are used in the check digit
+CHECK_DIGIT_WEIGHTS = np.arange(9, 0, -1)
+
+# Warnings already given, so each is only logged once
+cas_warnings = set()
+
 
 def calculate_check_digit(cas: str) -> int:
     return sum((a + 1) * int(b) for a, b in zip(range(9), cas[-1::-1])) % 10
 
 
-def validate_cas_string(cas: Optional[str]) -> Optional[str]:
+def calculate_check_digits(numbers: Sequence[str]) -> np.ndarray:
+    """Calculate the check digits of many CAS numbers (without hyphens or check digit) at once.
+
+    All `numbers` must only have the digits 0-9."""
+    if not numbers:
+        return np.zeros(0, dtype=int)
+    text = "".join(number[-9:].rjust(9, "0") for number in numbers).encode("ascii")
+    digits = np.frombuffer(text, dtype=np.uint8).reshape(len(numbers), 9) - ord("0")
+    return (digits @ CHECK_DIGIT_WEIGHTS) % 10
+
+
+def warn_once(message: str) -> None:
+    if message not in cas_warnings:
+        cas_warnings.add(message)
+        logger.warning(message)
+
+
+def clean_cas_value(cas) -> Optional[str]:
+    """Strip whitespace, and return `None` for empty and missing values"""
     if isinstance(cas, str):
         cas = cas.strip()
     if not cas:
         return None
     elif isinstance(cas, Number) and np.isnan(cas):
         return None
+    return cas
 
+
+def split_cas(cas: str) -> Optional[tuple[str, str, str]]:
+    """Split into the three parts of a CAS number, with or without hyphens. The check digit is
+    empty if missing. Returns `None` if there is the wrong number of hyphens."""
     if "-" not in cas:
-        first, second, check_digit = cas[:-3], cas[-3:-1], int(cas[-1])
-        if str(calculate_check_digit(first + second)) != str(check_digit):
-            logger.warning(
-                "Removing invalid CAS number {}; last digit should be {}".format(cas, check_digit)
-            )
-            return None
-        return "-".join([first, second, str(check_digit)]).lstrip("0")
-    elif cas.count("-") == 2 and not cas.split("-")[2]:
-        # e.g. 1228284-64-
-        check_digit = str(calculate_check_digit(cas.replace("-", "")))
-        logger.warning("Adding missing CAS check digit, {} -> {}".format(cas, cas + check_digit))
-        return cas + check_digit
+        return cas[:-3], cas[-3:-1], cas[-1]
     elif cas.count("-") == 2:
-        first, second, third = cas.split("-")
-        check_digit = calculate_check_digit(first + second)
-        if str(check_digit) != third:
-            logger.warning(
-                "Removing invalid CAS number {}; last digit should be {}".format(cas, check_digit)
-            )
-        else:
-            return cas.lstrip("0")
-    else:
-        logger.warning(
+        return tuple(cas.split("-"))
+    return None
+
+
+def check_cas(cas: str, parts: Optional[tuple[str, str, str]], check_digit: int) -> Optional[str]:
+    """Validate `cas`, split into `parts`, given the correct `check_digit`"""
+    if parts is None:
+        warn_once(
             "Given CAS can't be validated, wrong number of hyphens are present: {}".format(cas)
         )
         return None
+    first, second, third = parts
+    if "-" not in cas:
+        # Raises `ValueError` if not a number, as before
+        int(third)
+    elif not third:
+        # e.g. 1228284-64-
+        warn_once("Adding missing CAS check digit, {} -> {}".format(cas, cas + str(check_digit)))
+        return cas + str(check_digit)
+    if str(check_digit) != third:
+        warn_once(
+            "Removing invalid CAS number {}; last digit should be {}".format(cas, check_digit)
+        )
+        return None
+    return "-".join(parts).lstrip("0")
+
+
+@lru_cache(maxsize=CAS_CACHE_SIZE)
+def _validate_cas(cas: str) -> Optional[str]:
+    parts = split_cas(cas)
+    check_digit = calculate_check_digit(parts[0] + parts[1]) if parts else None
+    return check_cas(cas, parts, check_digit)
+
+
+def validate_cas_string(cas: Optional[str]) -> Optional[str]:
+    """Normalize a CAS number to the form `7782-42-5`, adding a missing check digit.
+
+    Returns `None` for missing and invalid numbers; each distinct problem is only logged once.
+    Results are cached."""
+    cas = clean_cas_value(cas)
+    if cas is None:
+        return None
+    return _validate_cas(cas)
+
+
+def validate_cas_strings(values: Iterable[Optional[str]]) -> list[Optional[str]]:
+    """Validate a whole column of CAS numbers, like `validate_cas_string`.
+
+    Each distinct value is only validated once, and the check digits are calculated together
+    with NumPy."""
+    cleaned = [clean_cas_value(value) for value in values]
+    unique = [cas for cas in dict.fromkeys(cleaned) if cas is not None]
+    parts = [split_cas(cas) for cas in unique]
+    numeric = [
+        index
+        for index, part in enumerate(parts)
+        if part and (part[0] + part[1]).isascii() and (part[0] + part[1]).isdigit()
+    ]
+    check_digits = [None] * len(unique)
+    for index, digit in zip(
+        numeric, calculate_check_digits([parts[i][0] + parts[i][1] for i in numeric])
+    ):
+        check_digits[index] = int(digit)
+    for index, part in enumerate(parts):
+        if part and check_digits[index] is None:
+            # Not only digits; raises `ValueError` as in `validate_cas_string`
+            check_digits[index] = calculate_check_digit(part[0] + part[1])
+    results = {
+        cas: check_cas(cas, part, digit) for cas, part, digit in zip(unique, parts, check_digits)
+    }
+    return [None if cas is None else results[cas] for cas in cleaned]
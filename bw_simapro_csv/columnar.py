@@ -0,0 +1,260 @@
+from collections.abc import Iterable, Iterator, MutableMapping, Sequence
+from copy import deepcopy
+from numbers import Integral, Real
+from typing import Any, Union
+
+import numpy as np
+
+from .blocks import Process
+
+# Marks fields which a row doesn't have
+_MISSING = object()
+
+# Value for rows without the field, for each kind of column
+EMPTY = {"float": np.nan, "int": 0, "bool": False, "str": -1, "object": None}
+DTYPES = {"float": np.float64, "int": np.int64, "bool": np.bool_, "str": np.int32, "object": object}
+
+INT64 = np.iinfo(np.int64)
+
+
+def kind_of(value: Any) -> str:
+    """Kind of column which can store `value` without changing its type"""
+    if isinstance(value, (bool, np.bool_)):
+        return "bool"
+    elif isinstance(value, str):
+        return "str"
+    elif isinstance(value, Integral):
+        return "int" if INT64.min <= value <= INT64.max else "object"
+    elif isinstance(value, Real):
+        return "float"
+    return "object"
+
+
+def smallest_int(column: np.ndarray) -> np.ndarray:
+    """Use the smallest signed integer type which holds all values, e.g. for line numbers"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if (
+            len(column)
+            and np.iinfo(dtype).min <= column.min()
+            and column.max() <= np.iinfo(dtype).max
+        ):
+            return column.astype(dtype)
+    return column
+
+
+def common_kind(kinds: set) -> str:
+    if len(kinds) == 1:
+        return kinds.pop()
+    elif kinds == {"int", "float"}:
+        # Integer amounts, like `0` for a division by zero, are read back as floats
+        return "float"
+    return "object"
+
+
+class ColumnarStore:
+    """Struct-of-arrays storage for many exchange dictionaries.
+
+    Each field is one NumPy array: floats, integers, and booleans are stored directly, strings
+    are dictionary-encoded as `int32` codes into a vocabulary shared by all string columns, and
+    anything else (e.g. `context` tuples) is kept in an object array. Fields which not every row
+    has get a boolean mask of the rows which have them.
+
+    Rows are read and changed through `ColumnarRow` views, which are created on access and
+    behave like the original dictionaries. Values are returned as Python objects."""
+
+    def __init__(self, rows: list[dict]):
+        self.length = len(rows)
+        self.strings = []
+        self._codes = {}
+        self.columns, self.kinds, self.masks = {}, {}, {}
+        for field in dict.fromkeys(key for row in rows for key in row):
+            values = [row.get(field, _MISSING) for row in rows]
+            present = [value is not _MISSING for value in values]
+            kind = common_kind({kind_of(value) for value in values if value is not _MISSING})
+            self._add_column(field, kind, values)
+            if not all(present):
+                self.masks[field] = np.array(present, dtype=bool)
+        # Only needed again if strings are added later; see `encode`
+        self._codes = None
+
+    def _add_column(self, field: str, kind: str, values: list) -> None:
+        empty = EMPTY[kind]
+        if kind == "str":
+            values = [empty if value is _MISSING else self.encode(value) for value in values]
+        else:
+            values = [empty if value is _MISSING else value for value in values]
+        if kind == "object":
+            # Avoid NumPy turning tuples into extra dimensions
+            column = np.empty(self.length, dtype=object)
+            column[:] = values if values else []
+        else:
+            column = np.array(values, dtype=DTYPES[kind])
+            if kind == "int":
+                column = smallest_int(column)
+        self.columns[field], self.kinds[field] = column, kind
+
+    def encode(self, value: str) -> int:
+        if self._codes is None:
+            self._codes = {string: code for code, string in enumerate(self.strings)}
+        try:
+            return self._codes[value]
+        except KeyError:
+            self._codes[value] = code = len(self.strings)
+            self.strings.append(value)
+            return code
+
+    def has(self, field: str, index: int) -> bool:
+        if field not in self.columns:
+            return False
+        mask = self.masks.get(field)
+        return mask is None or bool(mask[index])
+
+    def fields(self, index: int) -> Iterator[str]:
+        return (field for field in self.columns if self.has(field, index))
+
+    def get(self, field: str, index: int) -> Any:
+        if not self.has(field, index):
+            raise KeyError(field)
+        value, kind = self.columns[field][index], self.kinds[field]
+        if kind == "str":
+            return self.strings[value]
+        elif kind == "object":
+            return value
+        return value.item()
+
+    def set(self, field: str, index: int, value: Any) -> None:
+        if field not in self.columns:
+            self._add_column(field, kind_of(value), [_MISSING] * self.length)
+            self.masks[field] = np.zeros(self.length, dtype=bool)
+        kind = self.kinds[field]
+        if kind != kind_of(value) and not (kind == "float" and kind_of(value) == "int"):
+            self._to_object(field)
+            kind = "object"
+        elif kind == "int" and not np.can_cast(
+            np.min_scalar_type(value), self.columns[field].dtype
+        ):
+            self.columns[field] = self.columns[field].astype(np.int64)
+        self.columns[field][index] = self.encode(value) if kind == "str" else value
+        if field in self.masks:
+            self.masks[field][index] = True
+
+    def delete(self, field: str, index: int) -> None:
+        if not self.has(field, index):
+            raise KeyError(field)
+        if field not in self.masks:
+            self.masks[field] = np.ones(self.length, dtype=bool)
+        self.masks[field][index] = False
+
+    def _to_object(self, field: str) -> None:
+        """Change a column to an object array, for a value of a different type"""
+        column = np.empty(self.length, dtype=object)
+        if self.kinds[field] == "str":
+            column[:] = [self.strings[code] if code >= 0 else None for code in self.columns[field]]
+        else:
+            column[:] = self.columns[field].tolist()
+        self.columns[field], self.kinds[field] = column, "object"
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the arrays, not counting the objects in object columns and the vocabulary"""
+        return sum(column.nbytes for column in self.columns.values()) + sum(
+            mask.nbytes for mask in self.masks.values()
+        )
+
+
+class ColumnarRow(MutableMapping):
+    """Dictionary-like view of one row of a `ColumnarStore`"""
+
+    __slots__ = ("store", "index")
+
+    def __init__(self, store: ColumnarStore, index: int):
+        self.store = store
+        self.index = index
+
+    def __getitem__(self, key: str) -> Any:
+        return self.store.get(key, self.index)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.store.set(key, self.index, value)
+
+    def __delitem__(self, key: str) -> None:
+        self.store.delete(key, self.index)
+
+    def __contains__(self, key: object) -> bool:
+        return self.store.has(key, self.index)
+
+    def __iter__(self) -> Iterator[str]:
+        return self.store.fields(self.index)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __or__(self, other: dict) -> dict:
+        return dict(self) | other
+
+    def __copy__(self) -> dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo: dict) -> dict:
+        return deepcopy(dict(self), memo)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class ColumnarEdges(Sequence):
+    """Replacement for the `parsed` list of an exchange block: rows `start` to `stop` of a
+    `ColumnarStore`, as `ColumnarRow` views."""
+
+    __slots__ = ("store", "start", "stop")
+
+    def __init__(self, store: ColumnarStore, start: int, stop: int):
+        self.store = store
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[ColumnarRow, list]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Row index out of range")
+        return ColumnarRow(self.store, self.start + index)
+
+    def __iter__(self) -> Iterator[ColumnarRow]:
+        return (ColumnarRow(self.store, index) for index in range(self.start, self.stop))
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (list, ColumnarEdges)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def to_list(self) -> list[dict]:
+        return [dict(row) for row in self]
+
+    def __repr__(self) -> str:
+        return f"ColumnarEdges({self.to_list()!r})"
+
+
+def to_columnar(processes: Iterable[Process]) -> ColumnarStore:
+    """Move the exchanges of all `processes` into one `ColumnarStore`, and replace the `parsed`
+    list of each exchange block with a `ColumnarEdges` view.
+
+    Strings repeated across processes, like units and flow names, are only stored once."""
+    blocks = [
+        block
+        for process in processes
+        for block in process.blocks.values()
+        if getattr(block, "has_formula", None) and isinstance(block.parsed, list)
+    ]
+    store = ColumnarStore([row for block in blocks for row in block.parsed])
+    start = 0
+    for block in blocks:
+        stop = start + len(block.parsed)
+        block.parsed = ColumnarEdges(store, start, stop)
+        start = stop
+    return store
@@ -10,4 +10,18 @@ CONTEXT_MAPPING = {
     "Economic issues": "Economic issues",
 }
 
+# Map from the compartments of characterization factors in `Impact category` blocks to the terms
+# used in unit processes
+IMPACT_CONTEXT_MAPPING = {
+    "Non mat.": "Non material emissions",
+    "Air": "Emissions to air",
+    "Water": "Emissions to water",
+    "Raw": "Resources",
+    "Waste": "Final waste flows",
+    "Soil": "Emissions to soil",
+    "Social": "Social issues",
+    "Economic": "Economic issues",
+}
+UNSPECIFIED_SUBCOMPARTMENT = "(unspecified)"
+
 MAGIC = " ⧺ "
@@ -1,34 +1,87 @@
 import itertools
 import re
 from collections.abc import Iterator
-from typing import List
+from typing import List, Optional
 
 import ftfy
 
-UNDEFINED = re.compile("[\x8d\x81\x8f\x90\x9d]")
-CONTROL_CHARACTERS = re.compile(
-    "[\x00\x01\x02\x03\x04\x05\x06\x07\x08\x0b\x0c\x0d\x0e\x0f\x10\x11\x12\x13\x14\x15\x16"
-    + "\x17\x18\x19\x1a\x1b\x1c\x1d\x1e\x1f]"
+UNDEFINED_CHARS = "\x8d\x81\x8f\x90\x9d"
+CONTROL_CHARS = (
+    "\x00\x01\x02\x03\x04\x05\x06\x07\x08\x0b\x0c\x0d\x0e\x0f\x10\x11\x12\x13\x14\x15\x16"
+    + "\x17\x18\x19\x1a\x1b\x1c\x1d\x1e\x1f"
 )
+UNDEFINED = re.compile(f"[{UNDEFINED_CHARS}]")
+CONTROL_CHARACTERS = re.compile(f"[{CONTROL_CHARS}]")
 WARNING_CHARS = "ÃÂ€˜â¿"
 
+# This makes no sense - /u007f is the delete control character
+# https://www.ascii-code.com/grid
+# But SimaPro uses this as a linebreak inside a CSV line
+# This is why we can't have nice things
+# olca-simapro-csv does the same thing:
+# https://github.com/GreenDelta/olca-simapro-csv/blob/c11e40e7722f2ecaf62e813eebcc8d0793c8c3ff/src/test/java/org/openlca/simapro/csv/CsvLineTest.java#L53
+CLEAN_TRANSLATION = str.maketrans(
+    {"\x7f": "\n"} | {char: None for char in UNDEFINED_CHARS + CONTROL_CHARS}
+)
+
+# Cells up to this length are cached by `BeKindRewind`; longer cells (comments) rarely repeat
+CACHE_MAX_CELL_LENGTH = 64
+CACHE_MAX_ENTRIES = 2**16
+
+# Cleaned cells up to this length (flow names, units, categories) are shared through a
+# `StringPool`; the pool stops growing at `POOL_MAX_ENTRIES` distinct strings
+POOL_MAX_CELL_LENGTH = 256
+POOL_MAX_ENTRIES = 2**20
+# Numbers and most formulas are unique, and would only fill up the pool
+NOT_POOLED_FIRST_CHARS = frozenset("0123456789+-.,(")
+
 
 def clean(s: str) -> str:
     """Strip string, fix encoding, and remove undefined or control characters"""
-    # This makes no sense - /u007f is the delete control character
-    # https://www.ascii-code.com/grid
-    # But SimaPro uses this as a linebreak inside a CSV line
-    # This is why we can't have nice things
-    # olca-simapro-csv does the same thing:
-    # https://github.com/GreenDelta/olca-simapro-csv/blob/c11e40e7722f2ecaf62e813eebcc8d0793c8c3ff/src/test/java/org/openlca/simapro/csv/CsvLineTest.java#L53
-    s = s.replace("\x7f", "\n")
-    s = UNDEFINED.sub("", s)
-    s = CONTROL_CHARACTERS.sub("", s)
+    if s.isascii():
+        # Most cells; no undefined or warning characters are possible
+        if s.isprintable():
+            return s.strip()
+        return s.translate(CLEAN_TRANSLATION).strip()
+    s = s.translate(CLEAN_TRANSLATION)
     if any(char in s for char in WARNING_CHARS):
         s = ftfy.fix_text(s)
     return s.strip()
 
 
+class StringPool:
+    """Per-file pool of cleaned cell values, so that equal cells share one `str` object.
+
+    Unlike `sys.intern`, the strings are released with the pool. Once `max_entries` distinct
+    strings are pooled, new strings are no longer added, so that memory stays bounded in lazy
+    mode. `hits` counts the calls to `intern` which returned a string already in the pool;
+    cells found in the cache of a `BeKindRewind` reader don't go through the pool again."""
+
+    def __init__(self, max_entries: int = POOL_MAX_ENTRIES):
+        self.strings = {}
+        self.max_entries = max_entries
+        self.hits = 0
+
+    def intern(self, s: str) -> str:
+        try:
+            pooled = self.strings[s]
+        except KeyError:
+            if len(self.strings) < self.max_entries:
+                self.strings[s] = s
+            return s
+        self.hits += 1
+        return pooled
+
+    def view(self) -> "StringPool":
+        """Pool which reuses the strings of this pool, but never adds new ones"""
+        pool = StringPool(max_entries=0)
+        pool.strings = self.strings
+        return pool
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
 class BeKindRewind(Iterator):
     """CSV reader which acts as a line by line iterator but which allows for one step backwards.
 
@@ -40,19 +93,36 @@ class BeKindRewind(Iterator):
     Internally this is implemented by caching the last line read, and using `itertools.chain`
     when needed to prepend the cached line to the iterator.
 
+    Short cells like units, uncertainty types, or `0` repeat very often, so the cleaned value
+    of cells up to `CACHE_MAX_CELL_LENGTH` characters is cached. Cleaned cells up to
+    `POOL_MAX_CELL_LENGTH` characters also go through `pool`, which can be shared by all readers
+    of the same file, so that repeated names and units are only stored once.
+
     Parameters
     ----------
     data_iterable : collections.abc.Iterator
         Iterator which returns lists of strings.
     clean_elements : bool, optional
     Do `[clean(elem) for elem in line]` when returning a new line
+    pool : StringPool, optional
+    Pool of cleaned cells; a new pool is used if not given. Set `pooling` to `False` to stop
+    adding cells to the pool, e.g. while reading past blocks which are skipped.
 
     """
 
-    def __init__(self, data_iterable: Iterator, clean_elements: bool = True, offset: int = 0):
+    def __init__(
+        self,
+        data_iterable: Iterator,
+        clean_elements: bool = True,
+        offset: int = 0,
+        pool: Optional[StringPool] = None,
+    ):
         self.data_iterable = data_iterable
         self.current = None
         self.clean_elements = clean_elements
+        self.cache = {}
+        self.pool = StringPool() if pool is None else pool
+        self.pooling = True
         # Line numbers are 1-indexed
         self.line_no = offset + 1
 
@@ -60,9 +130,26 @@ class BeKindRewind(Iterator):
         self.current = next(self.data_iterable)
         self.line_no += 1
         if self.clean_elements:
-            self.current = [clean(elem) for elem in self.current]
+            self.current = [self.clean(elem) for elem in self.current]
         return self.current
 
+    def clean(self, elem: str) -> str:
+        """`clean` with a cache for short cells, sharing repeated values through `self.pool`"""
+        try:
+            return self.cache[elem]
+        except KeyError:
+            pass
+        cleaned = clean(elem)
+        if (
+            self.pooling
+            and cleaned[:1] not in NOT_POOLED_FIRST_CHARS
+            and len(cleaned) <= POOL_MAX_CELL_LENGTH
+        ):
+            cleaned = self.pool.intern(cleaned)
+        if len(elem) <= CACHE_MAX_CELL_LENGTH and len(self.cache) < CACHE_MAX_ENTRIES:
+            self.cache[elem] = cleaned
+        return cleaned
+
     def rewind(self) -> None:
         """Rewinds the iterator by one step, retrieving the element that was
         just returned by the previous call to `__next__`."""
@@ -0,0 +1,300 @@
+import ast
+from contextlib import contextmanager
+from functools import lru_cache
+from numbers import Number
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
+from asteval.astutils import safe_pow
+from bw2parameters import Interpreter, MissingName
+from bw2parameters.errors import ParameterError, SelfReference
+
+EVALUATORS = ("asteval", "compiled")
+
+# Number of compiled formulas to keep in memory
+COMPILED_CACHE_SIZE = 2**16
+
+# AST nodes allowed in compiled formulas. SimaPro formulas are arithmetic, comparisons, and
+# function calls; anything else is rejected the same way as unsupported syntax in `asteval`.
+ALLOWED_NODES = (
+    ast.Expression,
+    ast.Constant,
+    ast.Name,
+    ast.Load,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.BoolOp,
+    ast.Compare,
+    ast.IfExp,
+    ast.Call,
+    ast.operator,
+    ast.unaryop,
+    ast.boolop,
+    ast.cmpop,
+)
+# `**` is evaluated by this function, which has the same exponent limit as `asteval`. Names with
+# two leading underscores aren't allowed in formulas, so it can't be shadowed by a parameter.
+POWER_FUNCTION = "__pow"
+
+
+class CheckedPower(ast.NodeTransformer):
+    """Replace `a ** b` with a call to the checked power function"""
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        self.generic_visit(node)
+        if not isinstance(node.op, ast.Pow):
+            return node
+        call = ast.Call(
+            func=ast.Name(id=POWER_FUNCTION, ctx=ast.Load()),
+            args=[node.left, node.right],
+            keywords=[],
+        )
+        return ast.copy_location(call, node)
+
+
+@lru_cache(maxsize=None)
+def base_symbols() -> dict:
+    """Functions and constants available in formulas; the same as in the `asteval` interpreter.
+
+    Methods bound to the `asteval` interpreter instance, like `print`, are left out."""
+    interpreter = Interpreter()
+    return {
+        key: value
+        for key, value in interpreter.symtable.items()
+        if getattr(value, "__self__", None) is not interpreter
+    }
+
+
+@lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def compile_formula(formula: str) -> tuple:
+    """Parse, validate, and compile `formula`. Returns the code object and the set of names used.
+
+    Raises `MissingName` for syntax errors, and `NotImplementedError` for syntax which isn't
+    allowed in formulas, like `asteval`. Powers are computed with `safe_pow`, which also limits
+    the exponent like `asteval`."""
+    try:
+        # Parsed as a module, like `asteval`, so that e.g. `yield` is a reserved word and not a
+        # syntax error
+        module = ast.parse(formula)
+    except SyntaxError:
+        raise MissingName(formula)
+    if len(module.body) != 1 or not isinstance(module.body[0], ast.Expr):
+        raise NotImplementedError(f"Formula {formula} is not a single expression")
+    tree = ast.Expression(body=module.body[0].value)
+    names = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise NotImplementedError(f"{type(node).__name__} not supported in formula {formula}")
+        elif isinstance(node, ast.Name):
+            if node.id.startswith("__"):
+                raise NotImplementedError(f"Invalid name {node.id} in formula {formula}")
+            names.add(node.id)
+        elif isinstance(node, ast.Call) and not isinstance(node.func, ast.Name):
+            raise NotImplementedError(f"Only named functions can be called in formula {formula}")
+        elif isinstance(node, ast.Constant) and not isinstance(node.value, Number):
+            raise NotImplementedError(f"Only numbers allowed as constants in formula {formula}")
+    tree = ast.fix_missing_locations(CheckedPower().visit(tree))
+    return compile(tree, "<formula>", "eval"), frozenset(names)
+
+
+class CompiledInterpreter:
+    """Drop-in replacement for `bw2parameters.Interpreter` which compiles each formula once into
+    a Python code object, and evaluates it against the symbol table.
+
+    Compiled formulas are cached across instances, so a formula used in many processes is only
+    parsed once. The interface is the part of `Interpreter` used by `ParameterSet` and the
+    importer: `symtable`, `add_symbols`, `remove_symbols`, `get_symbols`, `get_unknown_symbols`,
+    and calling with a formula. Undefined names and syntax errors raise `MissingName`; disallowed
+    syntax raises `NotImplementedError`, and exponents larger than `asteval` allows raise
+    `RuntimeError`."""
+
+    # Formulas are evaluated with no Python builtins; functions come from `base_symbols`
+    GLOBALS = {"__builtins__": {}, POWER_FUNCTION: safe_pow}
+
+    def __init__(self, symbols: Optional[dict] = None):
+        self.symtable = dict(base_symbols())
+        self.BUILTIN_SYMBOLS = set(self.symtable)
+        self.add_symbols(symbols)
+
+    @classmethod
+    def is_numeric(cls, value) -> bool:
+        return isinstance(value, (Number, np.ndarray))
+
+    def add_symbols(self, symbols: Optional[dict]) -> None:
+        if symbols:
+            self.symtable.update(symbols)
+
+    def remove_symbols(self, symbols: Optional[Iterable]) -> None:
+        for symbol in symbols or []:
+            self.symtable.pop(symbol)
+
+    def user_defined_symbols(self) -> set:
+        return set(self.symtable).difference(self.BUILTIN_SYMBOLS)
+
+    def get_symbols(self, text: Optional[str]) -> set:
+        if text is None:
+            return set()
+        return set(compile_formula(text)[1])
+
+    def get_unknown_symbols(
+        self,
+        text: Optional[str],
+        known_symbols: Optional[Iterable] = None,
+        ignore_symtable: bool = False,
+        **kwargs,
+    ) -> set:
+        if text is None:
+            return set()
+        known = set(known_symbols or [])
+        return {
+            name
+            for name in compile_formula(text)[1]
+            if name not in known and (ignore_symtable or name not in self.symtable)
+        }
+
+    def eval(
+        self, expr: str, known_symbols: Optional[dict] = None, **kwargs
+    ) -> Union[float, np.ndarray]:
+        code, _ = compile_formula(expr)
+        symtable = self.symtable | known_symbols if known_symbols else self.symtable
+        try:
+            return eval(code, self.GLOBALS, symtable)
+        except NameError:
+            raise MissingName(expr)
+
+    __call__ = eval
+
+
+def get_interpreter(evaluator: str = "asteval") -> Union[Interpreter, CompiledInterpreter]:
+    """Create a new formula interpreter for `evaluator`, one of `EVALUATORS`"""
+    if evaluator == "asteval":
+        return Interpreter()
+    elif evaluator == "compiled":
+        return CompiledInterpreter()
+    raise ValueError(f"Unknown evaluator '{evaluator}'; must be one of {EVALUATORS}")
+
+
+# Marks symbols which weren't defined before a local scope was opened
+_MISSING = object()
+
+
+class ScopedInterpreter:
+    """Formula interpreter shared by all processes, with the global symbols installed only once.
+
+    Within `local()`, added symbols are layered over the global ones: each process scope only
+    records the symbols it adds, and on leaving the scope they are removed again, restoring any
+    global symbols they shadowed. This avoids copying all global symbols into a new interpreter
+    for every process.
+
+    Implements the interface of `bw2parameters.Interpreter` used by `ParameterSet`, so a scope
+    can be passed as its `interpreter`. Unknown symbols are found by membership tests on the
+    symbol table, instead of by copying its keys for every formula."""
+
+    def __init__(self, symbols: Optional[dict] = None, evaluator: str = "asteval"):
+        self.interpreter = get_interpreter(evaluator)
+        self.interpreter.add_symbols(symbols)
+        self.symtable = self.interpreter.symtable
+        self.BUILTIN_SYMBOLS = self.interpreter.BUILTIN_SYMBOLS
+        self.is_numeric = self.interpreter.is_numeric
+        self._layers = []
+
+    @contextmanager
+    def local(self, symbols: Optional[dict] = None) -> Iterator["ScopedInterpreter"]:
+        """Open a scope in which added symbols shadow the global ones until the scope is left"""
+        self._layers.append({})
+        try:
+            self.add_symbols(symbols)
+            yield self
+        finally:
+            for name, previous in self._layers.pop().items():
+                if previous is _MISSING:
+                    del self.symtable[name]
+                else:
+                    self.symtable[name] = previous
+
+    def add_symbols(self, symbols: Optional[dict]) -> None:
+        if not symbols:
+            return
+        if self._layers:
+            layer = self._layers[-1]
+            for name in symbols:
+                if name not in layer:
+                    layer[name] = self.symtable.get(name, _MISSING)
+        self.symtable.update(symbols)
+
+    def remove_symbols(self, symbols: Optional[Iterable]) -> None:
+        """Remove `symbols`. Within `local()`, removed global symbols are restored when the scope
+        is left, and symbols added in the scope are forgotten."""
+        if symbols is None:
+            return
+        symbols = set(symbols)
+        if self._layers:
+            layer = self._layers[-1]
+            for name in symbols:
+                if name not in layer:
+                    layer[name] = self.symtable[name]
+                elif layer[name] is _MISSING:
+                    del layer[name]
+        self.interpreter.remove_symbols(symbols)
+
+    def user_defined_symbols(self) -> set:
+        return set(self.symtable).difference(self.BUILTIN_SYMBOLS)
+
+    def get_symbols(self, text: Optional[str]) -> set:
+        return self.interpreter.get_symbols(text)
+
+    def get_unknown_symbols(
+        self,
+        text: Optional[str],
+        known_symbols: Optional[Iterable] = None,
+        ignore_symtable: bool = False,
+        **kwargs,
+    ) -> set:
+        known = set(known_symbols or [])
+        return {
+            name
+            for name in self.get_symbols(text)
+            if name not in known and (ignore_symtable or name not in self.symtable)
+        }
+
+    def eval(self, expr: str, *args, **kwargs) -> Union[float, np.ndarray]:
+        return self.interpreter(expr, *args, **kwargs)
+
+    __call__ = eval
+
+
+def evaluate_parameters(params: list, interpreter: ScopedInterpreter) -> None:
+    """Evaluate the formulas of the calculated parameters `params` in dependency order, set their
+    `amount`, and add them to `interpreter`.
+
+    Does the same as `ParameterSet(...).evaluate_and_set_amount_field()`, but only looks up the
+    names used in each formula in the symbol table, instead of copying all its names for every
+    set of parameters. Names of other parameters in `params` take precedence over existing
+    symbols with the same name."""
+    by_name = {}
+    for obj in params:
+        if not obj["name"].isidentifier():
+            raise ValueError(f"Parameter label {obj['name']} not a valid Python name")
+        by_name[obj["name"]] = obj
+
+    references = {}
+    for name, obj in by_name.items():
+        used = interpreter.get_symbols(obj["formula"])
+        if name in used:
+            raise SelfReference(f"Formula for parameter {name} references itself")
+        undefined = {n for n in used if n not in by_name and n not in interpreter.symtable}
+        if undefined:
+            raise ParameterError(f"Undefined references in formula for {name}: {undefined}")
+        references[name] = {n for n in used if n in by_name}
+
+    # Same order as `ParameterSet`: the first parameter whose references have been evaluated
+    done = set()
+    while references:
+        name = next((n for n, refs in references.items() if refs <= done), None)
+        if name is None:
+            raise ParameterError(f"Circular references between parameters: {sorted(references)}")
+        del references[name]
+        done.add(name)
+        obj = by_name[name]
+        obj["amount"] = interpreter(obj["formula"])
+        interpreter.add_symbols({name: obj["amount"]})
@@ -0,0 +1,244 @@
+import heapq
+from itertools import groupby
+from typing import Iterable, NamedTuple, Optional, Union
+
+from bw2parameters import Interpreter, MissingName
+from bw2parameters.errors import ParameterError
+from loguru import logger
+
+from .blocks import (
+    DatabaseCalculatedParameters,
+    DatabaseInputParameters,
+    Process,
+    ProjectCalculatedParameters,
+    ProjectInputParameters,
+    SimaProCSVBlock,
+)
+from .errors import FormulaReservedWord
+from .evaluation import compile_formula, get_interpreter
+from .uncertainty import update_distribution_amount
+
+# Global parameter blocks, in the order in which later definitions override earlier ones
+GLOBAL_PARAMETER_BLOCKS = (
+    DatabaseInputParameters,
+    ProjectInputParameters,
+    DatabaseCalculatedParameters,
+    ProjectCalculatedParameters,
+)
+LOCAL_PARAMETER_BLOCKS = ("Input parameters", "Calculated parameters")
+
+# Formula field of an exchange, and the field its value is stored in
+EXCHANGE_FORMULA_FIELDS = {"formula": "amount", "allocation_formula": "allocation"}
+
+
+class ParameterNode(NamedTuple):
+    """A parameter. `scope` is `None` for project and database parameters, and otherwise the
+    position of the `Process` in `SimaProCSV.blocks`."""
+
+    scope: Optional[int]
+    name: str
+
+
+class ExchangeNode(NamedTuple):
+    """A formula field of an exchange: row `row` of block `block` in the `Process` at position
+    `scope` in `SimaProCSV.blocks`. `field` is `formula` or `allocation_formula`."""
+
+    scope: int
+    block: str
+    row: int
+    field: str
+
+
+Node = Union[ParameterNode, ExchangeNode]
+
+
+def formula_names(formula: str) -> set:
+    """Names used in `formula`"""
+    try:
+        return set(compile_formula(formula)[1])
+    except (MissingName, NotImplementedError):
+        # Syntax only `asteval` understands; it has its own way of finding names
+        return set(Interpreter().get_symbols(formula))
+
+
+class ParameterGraph:
+    """Dependency graph of all parameters and formulas in a resolved SimaPro CSV file.
+
+    There is one node for each project, database, and process parameter, and one for each
+    exchange amount or allocation formula. Names in formulas are looked up in the same way as
+    when importing: first in the process' own parameters, then in the global parameters, where
+    project parameters take precedence over database parameters. Names which aren't parameters,
+    like `sqrt`, don't create edges.
+
+    `plan` lists all nodes in an order in which they can be evaluated, so that formulas are
+    evaluated after all of their inputs. `downstream` gives the nodes to re-evaluate, in plan
+    order, when some nodes change.
+
+    The graph is built from formulas after parameter names have been substituted, so it can only
+    be built from resolved blocks, or, as in `SimaProCSV.resolve_global_parameters`, from global
+    parameter blocks whose names have been substituted but which haven't been evaluated yet."""
+
+    def __init__(self):
+        self.objects = {}
+        self.dependencies = {}
+        self.dependents = {}
+        self.scopes = {None: {}}
+        self.plan = []
+        self._position = {}
+
+    @classmethod
+    def from_blocks(cls, blocks: list[SimaProCSVBlock]) -> "ParameterGraph":
+        graph = cls()
+        for block_class in GLOBAL_PARAMETER_BLOCKS:
+            for block in filter(lambda b: isinstance(b, block_class), blocks):
+                for obj in block.parsed:
+                    graph.add_parameter(None, obj)
+        for scope, process in enumerate(blocks):
+            if not isinstance(process, Process):
+                continue
+            graph.scopes[scope] = {}
+            for label in LOCAL_PARAMETER_BLOCKS:
+                if label in process.blocks:
+                    for obj in process.blocks[label].parsed:
+                        graph.add_parameter(scope, obj)
+            for label, block in process.blocks.items():
+                if not getattr(block, "has_formula", None):
+                    continue
+                for row, obj in enumerate(block.parsed):
+                    for field in EXCHANGE_FORMULA_FIELDS:
+                        if obj.get(field):
+                            graph.objects[ExchangeNode(scope, label, row, field)] = obj
+        graph.link()
+        graph.sort()
+        return graph
+
+    def add_parameter(self, scope: Optional[int], obj: dict) -> None:
+        node = ParameterNode(scope, obj["name"])
+        self.objects[node] = obj
+        self.scopes[scope][obj["name"]] = node
+
+    def lookup(self, scope: Optional[int], name: str) -> Optional[ParameterNode]:
+        """Node that `name` refers to in a formula in `scope`, if any"""
+        if scope is not None and name in self.scopes[scope]:
+            return self.scopes[scope][name]
+        return self.scopes[None].get(name)
+
+    def formula(self, node: Node) -> Optional[str]:
+        field = node.field if isinstance(node, ExchangeNode) else "formula"
+        return self.objects[node].get(field)
+
+    def link(self) -> None:
+        self.dependencies = {node: set() for node in self.objects}
+        self.dependents = {node: set() for node in self.objects}
+        for node in self.objects:
+            if not (formula := self.formula(node)):
+                continue
+            for name in formula_names(formula):
+                # A formula which uses its own name is a cycle
+                if (reference := self.lookup(node.scope, name)) is not None:
+                    self.dependencies[node].add(reference)
+                    self.dependents[reference].add(node)
+
+    def sort(self) -> None:
+        """Topological sort with Kahn's algorithm. Ties are broken by insertion order, so global
+        parameters come first, and each process' nodes stay together where possible."""
+        insertion = {node: index for index, node in enumerate(self.objects)}
+        remaining = {node: len(dependencies) for node, dependencies in self.dependencies.items()}
+        queue = [(insertion[node], node) for node, count in remaining.items() if not count]
+        heapq.heapify(queue)
+        plan = []
+        while queue:
+            _, node = heapq.heappop(queue)
+            plan.append(node)
+            for dependent in self.dependents[node]:
+                remaining[dependent] -= 1
+                if not remaining[dependent]:
+                    heapq.heappush(queue, (insertion[dependent], dependent))
+        if len(plan) != len(remaining):
+            cycle = sorted(str(node) for node, count in remaining.items() if count)
+            raise ParameterError(f"Circular references between parameters: {cycle}")
+        self.plan = plan
+        self._position = {node: index for index, node in enumerate(plan)}
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def __contains__(self, node: Node) -> bool:
+        return node in self.objects
+
+    def downstream(self, nodes: Iterable[Node]) -> list[Node]:
+        """All nodes which depend directly or indirectly on `nodes`, in plan order. The given
+        nodes themselves are only included if they depend on one of the others."""
+        seen = set()
+        stack = list(nodes)
+        for node in stack:
+            if node not in self.objects:
+                raise KeyError(f"Unknown parameter graph node {node}")
+        while stack:
+            for dependent in self.dependents[stack.pop()]:
+                if dependent not in seen:
+                    seen.add(dependent)
+                    stack.append(dependent)
+        return sorted(seen, key=self._position.__getitem__)
+
+    def values(self, scope: Optional[int]) -> dict:
+        """Current amounts of the parameters defined in `scope`. Calculated parameters which
+        haven't been evaluated yet have no amount, and are left out."""
+        return {
+            name: self.objects[node]["amount"]
+            for name, node in self.scopes[scope].items()
+            if "amount" in self.objects[node]
+        }
+
+    def evaluate(self, nodes: Iterable[Node], evaluator: str = "asteval") -> None:
+        """Evaluate the formulas of `nodes`, and store the results in their objects.
+
+        `nodes` must be in plan order, e.g. from `downstream`. Exchange amounts also move their
+        uncertainty distribution; see `update_distribution_amount`."""
+        nodes = [node for node in nodes if self.formula(node)]
+        # Global parameters never depend on local ones, so they can all be evaluated first. Local
+        # nodes are grouped by process, so that each process needs only one interpreter.
+        global_nodes = [node for node in nodes if node.scope is None]
+        local_nodes = sorted(
+            (node for node in nodes if node.scope is not None),
+            key=lambda node: (node.scope, self._position[node]),
+        )
+        self._evaluate_scope(global_nodes, {}, evaluator)
+        global_values = self.values(None)
+        for _, group in groupby(local_nodes, key=lambda node: node.scope):
+            self._evaluate_scope(list(group), global_values, evaluator)
+
+    def _evaluate_scope(self, nodes: list[Node], symbols: dict, evaluator: str) -> None:
+        if not nodes:
+            return
+        interpreter = get_interpreter(evaluator)
+        interpreter.add_symbols(symbols | self.values(nodes[0].scope))
+        for node in nodes:
+            obj = self.objects[node]
+            try:
+                value = interpreter(self.formula(node))
+            except ZeroDivisionError:
+                logger.critical(
+                    "Division by zero in formula {f} on line {n}; using zero",
+                    f=self.formula(node),
+                    n=obj.get("line_no"),
+                )
+                value = 0
+                if isinstance(node, ParameterNode):
+                    # Like `parameter_set_evaluate_each_formula`, so it isn't evaluated again
+                    obj["invalid_formula"] = obj.pop("formula")
+            except NotImplementedError as exc:
+                raise FormulaReservedWord(f"""
+    Given formula {self.formula(node)} uses a Python reserved token.
+    Please report this at https://github.com/brightway-lca/bw_simapro_csv/issues
+    We can add it to the cleaning step.
+                """) from exc
+            field = (
+                EXCHANGE_FORMULA_FIELDS[node.field] if isinstance(node, ExchangeNode) else "amount"
+            )
+            if field == "amount" and "uncertainty type" in obj:
+                update_distribution_amount(obj, value)
+            else:
+                obj[field] = value
+            if isinstance(node, ParameterNode):
+                interpreter.add_symbols({node.name: value})
@@ -0,0 +1,156 @@
+import csv
+import json
+import os
+from pathlib import Path
+from typing import Iterator
+
+from loguru import logger
+
+from .csv_reader import clean
+from .utils import get_true_length
+
+# Bump when the layout of the index file changes
+INDEX_VERSION = 1
+INDEXED_METADATA = {"Process identifier": "identifier", "Process name": "name"}
+
+
+def index_filepath(filepath: Path) -> Path:
+    """Path of the sidecar index file for `filepath`"""
+    return filepath.with_name(filepath.name + ".index.json")
+
+
+class OffsetTracker:
+    """Iterator over the decoded lines of a binary file which remembers the byte offset of the
+    next unread line.
+
+    `csv.reader` only pulls as many physical lines as it needs for each row, so the offset before
+    asking the reader for a row is the offset at which that row starts."""
+
+    def __init__(self, stream, encoding: str):
+        self.stream = stream
+        self.encoding = encoding
+        self.offset = stream.tell()
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        line = self.stream.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode(self.encoding)
+
+
+def build_block_index(
+    filepath: Path, encoding: str, delimiter: str, header_lines: int, control_words: set
+) -> dict:
+    """Scan `filepath` once, and record where each logical block starts.
+
+    Uses the same rules as `SimaProCSV.get_next_block` to find block boundaries, but doesn't
+    construct any blocks. `control_words` are the block labels which always start a new block.
+
+    Each block is recorded as a dictionary with the byte `offset` and `line_no` of its first line,
+    its `type`, and, for `Process` blocks, its `identifier` and `name` if given."""
+    blocks = []
+    uses_end_text = False
+    in_block = False
+    pending_key = None
+
+    with open(filepath, "rb") as f:
+        # `parse_header` also consumes the first line after the header
+        for _ in range(header_lines + 1):
+            f.readline()
+        tracker = OffsetTracker(f, encoding)
+        reader = csv.reader(tracker, delimiter=delimiter, strict=True)
+        line_no = header_lines + 1
+
+        while True:
+            offset = tracker.offset
+            try:
+                row = next(reader)
+            except StopIteration:
+                break
+            line_no += 1
+
+            first = clean(row[0]) if row else ""
+            if not first and not any(clean(elem) for elem in row):
+                if pending_key is None:
+                    continue
+                first = ""
+
+            if first == "End" and (in_block or get_true_length([clean(e) for e in row]) == 1):
+                uses_end_text = True
+                in_block = False
+                pending_key = None
+                continue
+
+            if not in_block or first in control_words:
+                blocks.append({"offset": offset, "line_no": line_no, "type": first})
+                in_block = True
+                pending_key = None
+            elif blocks[-1]["type"] == "Process":
+                if pending_key is not None:
+                    if first:
+                        blocks[-1][pending_key] = first
+                    pending_key = None
+                elif first in INDEXED_METADATA and INDEXED_METADATA[first] not in blocks[-1]:
+                    pending_key = INDEXED_METADATA[first]
+
+    return {
+        "version": INDEX_VERSION,
+        "size": filepath.stat().st_size,
+        "mtime_ns": filepath.stat().st_mtime_ns,
+        "encoding": encoding,
+        "header_lines": header_lines,
+        "uses_end_text": uses_end_text,
+        "blocks": blocks,
+    }
+
+
+def index_is_current(index: dict, filepath: Path, encoding: str) -> bool:
+    stat = filepath.stat()
+    return (
+        index.get("version") == INDEX_VERSION
+        and index.get("size") == stat.st_size
+        and index.get("mtime_ns") == stat.st_mtime_ns
+        and index.get("encoding") == encoding
+    )
+
+
+def load_or_build_index(
+    filepath: Path,
+    encoding: str,
+    delimiter: str,
+    header_lines: int,
+    control_words: set,
+    rebuild: bool = False,
+) -> dict:
+    """Load the sidecar index for `filepath` if it is still current, otherwise build and save it.
+
+    Failing to write the sidecar file (e.g. in a read-only directory) is not an error; the index
+    is then only kept in memory."""
+    sidecar = index_filepath(filepath)
+
+    if not rebuild and sidecar.is_file():
+        try:
+            with open(sidecar, encoding="utf-8") as f:
+                index = json.load(f)
+            if index_is_current(index, filepath, encoding):
+                logger.debug("Using block index {p}", p=str(sidecar))
+                return index
+        except ValueError:
+            logger.warning("Ignoring unreadable block index {p}", p=str(sidecar))
+
+    logger.info("Building block index for {p}", p=str(filepath))
+    index = build_block_index(filepath, encoding, delimiter, header_lines, control_words)
+
+    try:
+        tmp = sidecar.with_name(sidecar.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp, sidecar)
+    except OSError as exc:
+        logger.warning("Can't write block index {p}: {e}", p=str(sidecar), e=exc)
+
+    return index
@@ -1,16 +1,16 @@
 import csv
 import datetime
+import io
 import itertools
-import json
 import os
 import shutil
 import sys
-from functools import partial
+import time
+from functools import cached_property, partial
 from io import StringIO
 from pathlib import Path
-from typing import Optional, Union
+from typing import Iterator, Optional, Union
 
-from bw2parameters import ParameterSet
 from loguru import logger
 from platformdirs import user_log_dir
 
@@ -32,9 +32,16 @@ from .blocks import (
     SystemDescription,
     Units,
 )
-from .csv_reader import BeKindRewind
+from .blocks.generic_biosphere import build_flow_index
+from .cache import cache_key, load_cached, store_cached
+from .columnar import to_columnar
+from .csv_reader import BeKindRewind, StringPool
 from .errors import IndeterminateBlockEnd
+from .evaluation import EVALUATORS, ScopedInterpreter
+from .graph import GLOBAL_PARAMETER_BLOCKS, ParameterGraph, ParameterNode
 from .header import SimaProCSVType, parse_header
+from .index import load_or_build_index
+from .parallel import find_chunks, pool_size, read_chunks, resolve_processes
 from .parameters import (
     FormulaSubstitutor,
     add_prefix_to_uppercase_input_parameters,
@@ -42,8 +49,16 @@ from .parameters import (
     prepare_formulas,
     substitute_in_formulas,
 )
-from .units import normalize_units
-from .utils import json_serializer, parameter_set_evaluate_each_formula, get_true_length
+from .profiling import NullProfiler, Profiler
+from .uncertainty import update_distribution_amount
+from .units import build_unit_mapping, normalize_process_units
+from .utils import get_true_length
+from .writer import write_brightway_json
+
+# How the exchanges of `Process` blocks are stored
+STORAGES = ("dict", "columnar", "records")
+# Blocks which create `Record` rows instead of dictionaries with `storage="records"`
+RECORD_BLOCKS = (Process, *GLOBAL_PARAMETER_BLOCKS)
 
 
 def dummy(data, *args):
@@ -97,13 +112,64 @@ class SimaProCSV:
         stderr_logs: bool = True,
         write_logs: bool = True,
         copy_logs: bool = False,
+        lazy: bool = False,
+        indexed: bool = False,
+        workers: int = 1,
+        profile: bool = False,
+        evaluator: str = "asteval",
+        storage: str = "dict",
+        cache: bool = False,
     ):
         """Read a SimaPro CSV file object, and parse the contents.
 
         We start with the header, as this defines how the rest of the file is to be parsed.
         It gives the CSV delimiter and decimal separator.
 
-        We then break the file into logical chunks, such as processes or LCIA impact categories."""
+        We then break the file into logical chunks, such as processes or LCIA impact categories.
+
+        If `lazy`, only the blocks needed to resolve parameters and units are kept in
+        `self.blocks`; `Process` blocks are skipped on this first pass, and are instead read,
+        resolved, and unit-normalized one at a time by `iter_blocks`.
+
+        If `indexed` (which implies `lazy`), a sidecar index of block byte offsets is loaded or
+        built (see `bw_simapro_csv.index`). The first pass then only reads the non-`Process`
+        blocks, and single processes can be read with `get_process`.
+
+        If `workers` is more than one, the file is split into chunks of whole blocks, which are
+        read, cleaned, and constructed in a pool of worker processes. Local parameters of
+        `Process` blocks are then also resolved in a pool, after the global parameters have been
+        resolved. No more workers than available CPUs are used, and files which are too small to
+        gain from it are read serially (see `bw_simapro_csv.parallel.pool_size`). This doesn't
+        apply to streams or in lazy mode, where blocks are read one at a time.
+
+        If `profile`, wall time, CPU time, memory use, and item counts are recorded for each stage
+        of the import and for the construction of each block class. They are available as
+        `self.timings`, and can be exported with `self.profiler.to_json()`.
+
+        `evaluator` selects how parameter and exchange formulas are evaluated: `"asteval"` (the
+        default) interprets each formula with `asteval`, while `"compiled"` compiles each distinct
+        formula once to Python bytecode and caches it. Both give the same results and errors.
+
+        `storage` selects how the exchanges of `Process` blocks are kept in memory: `"dict"` (the
+        default) keeps one dictionary per exchange, while `"columnar"` moves them into NumPy
+        columns with dictionary-encoded strings (see `bw_simapro_csv.columnar`). Exchange blocks
+        then have a sequence of dictionary-like views as `parsed`, which can be read and changed
+        like the dictionaries, but use much less memory for large files. `"records"` parses
+        exchanges and parameters into slotted `Record` objects instead of dictionaries (see
+        `bw_simapro_csv.records`), which are smaller and also allow attribute access, e.g.
+        `exchange.amount`.
+
+        If `cache`, the parsed and resolved result is stored on disk with pickle, keyed by a hash
+        of the file contents, the library version, and the options which change the result (see
+        `bw_simapro_csv.cache`). Opening the same file again with the same options then loads
+        the stored result instead of parsing the file. Only use this with a cache directory which
+        no one else can write to, as loading a pickle can run arbitrary code."""
+        if evaluator not in EVALUATORS:
+            raise ValueError(f"Unknown evaluator '{evaluator}'; must be one of {EVALUATORS}")
+        if storage not in STORAGES:
+            raise ValueError(f"Unknown storage '{storage}'; must be one of {STORAGES}")
+        self.profiler = Profiler() if profile else NullProfiler()
+
         # Control logging level
         now = datetime.datetime.now().isoformat()[:19].replace(":", "-")
 
@@ -117,6 +183,10 @@ class SimaProCSV:
                 Path(user_log_dir("bw_simapro_csv", "pylca")) / f"{path_or_stream.stem}-{now}"
             )
             logger.info("Writing logs to {d}", d=str(self.logs_dir))
+        elif indexed:
+            raise ValueError("Indexed access needs a `Path`, not a stream")
+        elif cache:
+            raise ValueError("Caching needs a `Path`, not a stream")
         elif not isinstance(path_or_stream, StringIO):
             raise ValueError(
                 f"`path_or_stream` must be `Path` or `StringIO` - got {type(path_or_stream)}"
@@ -129,9 +199,38 @@ class SimaProCSV:
 
         self.configure_logs(stderr_logs, write_logs)
 
+        if cache:
+            with self.profiler.stage("load_cache") as stage:
+                key = cache_key(
+                    path_or_stream,
+                    {
+                        "encoding": encoding,
+                        "database_name": database_name,
+                        "lazy": lazy,
+                        "indexed": indexed,
+                        "evaluator": evaluator,
+                        "storage": storage,
+                    },
+                )
+                state = load_cached(key)
+                stage["items"] = int(state is not None)
+            if state is not None:
+                data.close()
+                self.__dict__.update(state)
+                self.string_pool = StringPool()
+                # The same contents can be opened from another path
+                self._source = path_or_stream
+                self._encoding = encoding
+                self.filepath = str(path_or_stream)
+                if copy_logs:
+                    self.copy_log_dir(Path.cwd())
+                return
+
         # Converting Pydantic back to dict to release memory
-        header, header_lines = parse_header(data)
-        self.header = header.model_dump()
+        with self.profiler.stage("header") as stage:
+            header, header_lines = parse_header(data)
+            self.header = header.model_dump()
+            stage["items"] = header_lines
 
         if header.kind in (SimaProCSVType.processes, SimaProCSVType.stages):
             self.database_name = database_name or self.header["project"]
@@ -142,6 +241,20 @@ class SimaProCSV:
             logger.info("Using database name '{n}'", n=self.database_name)
 
         self.uses_end_text = False
+        self.lazy = lazy or indexed
+        self.workers = workers
+        self.evaluator = evaluator
+        self.storage = storage
+        self.global_params = {}
+        self.substitutes = {}
+        self._interpreter = None
+        # Shared by all readers of this file, so repeated cells are stored once. In lazy and
+        # indexed mode, it only has the cells of the non-`Process` blocks, and processes read
+        # later reuse these strings without adding to the pool.
+        self.string_pool = StringPool()
+        self._source = path_or_stream
+        self._encoding = encoding
+        self._header_lines = header_lines
         self.filepath = str(path_or_stream) if isinstance(path_or_stream, Path) else "<StringIO>"
 
         logger.info(
@@ -159,50 +272,373 @@ class SimaProCSV:
         if self.header["delimiter"] not in {";", ".", "\t", "|", " "}:
             logger.warning(f"SimaPro CSV file uses unusual delimiter '{self.header['delimiter']}'")
 
-        rewindable_csv_reader = BeKindRewind(
-            csv.reader(data, delimiter=self.header["delimiter"], strict=True),
-            clean_elements=True,
-            offset=header_lines,
-        )
-
         self.blocks = []
-
-        while block := self.get_next_block(rewindable_csv_reader, self.header):
-            if block is not EmptyBlock:
-                self.blocks.append(block)
+        # Line number of the first line of each block in `self.blocks`; needed in lazy mode to
+        # put them back in file order when iterating
+        self._block_line_nos = []
+        self.block_index = None
+
+        with self.profiler.stage("read_blocks") as stage:
+            if indexed:
+                data.close()
+                self.block_index = load_or_build_index(
+                    filepath=path_or_stream,
+                    encoding=encoding,
+                    delimiter=self.header["delimiter"],
+                    header_lines=header_lines,
+                    control_words=set(CONTROL_BLOCK_MAPPING),
+                )
+            self.read_blocks(data)
+            stage["items"] = len(self.blocks)
+            stage["pooled_strings"] = len(self.string_pool)
+            stage["reused_strings"] = self.string_pool.hits
+        if not self.lazy:
+            # Only needed to share strings with processes read later
+            self.string_pool = StringPool()
 
         if header.kind in (SimaProCSVType.processes, SimaProCSVType.stages):
-            self.resolve_parameters()
-
-        normalize_units(self.blocks)
+            with self.profiler.stage("resolve_parameters") as stage:
+                if self.lazy:
+                    self.resolve_global_parameters()
+                else:
+                    self.resolve_parameters()
+                stage["items"] = sum(1 for block in self.blocks if isinstance(block, Process))
+
+        with self.profiler.stage("normalize_units") as stage:
+            self.unit_mapping = build_unit_mapping(self.blocks)
+            for block in filter(lambda b: isinstance(b, Process), self.blocks):
+                normalize_process_units(block, self.unit_mapping)
+                stage["items"] += 1
+
+        if self.storage == "columnar":
+            with self.profiler.stage("columnar_storage") as stage:
+                store = to_columnar(filter(lambda b: isinstance(b, Process), self.blocks))
+                stage["items"] = store.length
+        # Built from the dictionaries which were just replaced
+        self.__dict__.pop("parameter_graph", None)
+
+        if cache:
+            with self.profiler.stage("store_cache") as stage:
+                stage["items"] = int(store_cached(key, self._cached_state()) is not None)
 
         if copy_logs:
             self.copy_log_dir(Path.cwd())
 
+    def read_blocks(self, data) -> None:
+        """Split the file after the header into blocks, construct them, and add them to
+        `self.blocks`. `data` is the open file or stream, positioned after the header; it isn't
+        used if blocks are read using `self.block_index`."""
+        if self.block_index is not None:
+            self.uses_end_text = self.block_index["uses_end_text"]
+            self._indexed_processes = {
+                entry["identifier"]: entry
+                for entry in reversed(self.block_index["blocks"])
+                if entry["type"] == "Process" and entry.get("identifier")
+            }
+            for entry in self.block_index["blocks"]:
+                if entry["type"] == "Process":
+                    continue
+                if (block := self.read_block(entry)) and block is not EmptyBlock:
+                    self.blocks.append(block)
+                    self._block_line_nos.append(entry["line_no"])
+        else:
+            rewindable_csv_reader = BeKindRewind(
+                csv.reader(data, delimiter=self.header["delimiter"], strict=True),
+                clean_elements=True,
+                offset=self._header_lines,
+                pool=self.string_pool,
+            )
+            skip = {"Process"} if self.lazy else set()
+
+            if (workers := self._pool_size()) > 1:
+                with self._open_data() as scan:
+                    chunks = find_chunks(
+                        scan, self.header["delimiter"], self._header_lines + 1, n=workers * 4
+                    )
+                if len(chunks) > 1:
+                    self.uses_end_text = True
+                    pairs = read_chunks(self, chunks, workers)
+                    self._block_line_nos = [line_no for line_no, _ in pairs]
+                    self.blocks = [block for _, block in pairs]
+                    return
+
+            while block := self.get_next_block(rewindable_csv_reader, self.header, skip=skip):
+                if block is not EmptyBlock:
+                    self.blocks.append(block)
+                    self._block_line_nos.append(self._last_block_line_no)
+
+    def _pool_size(self) -> int:
+        """Number of worker processes for reading blocks and resolving processes; `1` means
+        doing it in this process. See `bw_simapro_csv.parallel.pool_size`."""
+        if self.workers < 2 or self.lazy or not isinstance(self._source, Path):
+            return 1
+        return pool_size(self._source, self.workers)
+
+    def _cached_state(self) -> dict:
+        """Attributes to store in the parse cache; logs, timings, the string pool, and the path of
+        the source file belong to each import"""
+        state = {
+            key: value
+            for key, value in self.__dict__.items()
+            if key
+            not in (
+                "profiler",
+                "logs_dir",
+                "parameter_graph",
+                "string_pool",
+                "_source",
+                "_encoding",
+                "filepath",
+            )
+        }
+        # Rebuilt when needed
+        state["_interpreter"] = None
+        return state
+
+    @property
+    def timings(self) -> Optional[dict]:
+        """Timings and memory use of each import stage, if constructed with `profile=True`"""
+        return self.profiler.as_dict() if self.profiler.enabled else None
+
+    @cached_property
+    def flow_index(self) -> dict[tuple[str, str], dict]:
+        """Metadata (CAS number, comment, unit) of the flows listed in `GenericBiosphere` blocks,
+        keyed by `(context, name)`, where `context` is the process block label like `Resources`.
+        See `build_flow_index`."""
+        return build_flow_index(self.blocks)
+
+    @cached_property
+    def parameter_graph(self) -> ParameterGraph:
+        """Dependency graph and evaluation plan of all parameters and formulas in `self.blocks`.
+
+        Built on first access, after parameters have been resolved. In lazy mode, only global
+        parameters are in `self.blocks`, so the graph doesn't include any processes."""
+        return ParameterGraph.from_blocks(self.blocks)
+
+    def update_parameters(self, values: dict) -> list:
+        """Change the amounts of input parameters, and re-evaluate only the calculated parameters
+        and exchange amounts and allocations which depend on them.
+
+        Keys of `values` are names of project or database input parameters, either as given in
+        the SimaPro file (case-insensitive) or as renamed on import (e.g. `SP_NAME`), or
+        `ParameterNode` instances, which can also refer to process input parameters. Uncertainty
+        distributions of changed parameters and exchanges are moved to the new amounts.
+
+        Returns the re-evaluated nodes of `self.parameter_graph`, in evaluation order."""
+        graph = self.parameter_graph
+        nodes = {}
+        for key, value in values.items():
+            if not isinstance(key, ParameterNode):
+                key = ParameterNode(None, self.substitutes.get(key.upper(), key))
+            if key not in graph:
+                raise KeyError(f"Unknown parameter {key}")
+            if graph.formula(key):
+                raise ValueError(f"Parameter {key} is calculated; only input parameters can be set")
+            nodes[key] = value
+
+        for node, value in nodes.items():
+            update_distribution_amount(graph.objects[node], value)
+        downstream = graph.downstream(nodes)
+        graph.evaluate(downstream, evaluator=self.evaluator)
+        # Processes read later in lazy mode are resolved with `global_params`
+        self.global_params = self.global_params | graph.values(None)
+        self._interpreter = None
+        return downstream
+
+    @classmethod
+    def open_indexed(cls, filepath: Path, **kwargs) -> "SimaProCSV":
+        """Open `filepath` for random access to individual processes using a block index.
+
+        The index is stored in a sidecar file next to `filepath`, and rebuilt when `filepath`
+        changes. Keyword arguments are passed to `SimaProCSV`.
+
+        Example usage:
+
+        ... code-block:: python
+
+            >>> sp = SimaProCSV.open_indexed(Path("big export.csv"))
+            >>> process = sp.get_process("DefaultX25250700002")
+
+        """
+        return cls(filepath, indexed=True, **kwargs)
+
     def __iter__(self):
-        return iter(self.blocks)
+        return self.iter_blocks()
+
+    def iter_blocks(self) -> Iterator[SimaProCSVBlock]:
+        """Iterate over all parsed blocks in file order.
+
+        In lazy mode, this reads the file a second time, yielding each `Process` block as soon
+        as it has been parsed, resolved, and unit-normalized, so that only one process is held in
+        memory at a time. The blocks already in `self.blocks` are yielded in their original
+        position."""
+        if not self.lazy:
+            yield from self.blocks
+            return
+
+        skip = (set(CONTROL_BLOCK_MAPPING) | set(INDETERMINATE_SECTION_HEADERS)).difference(
+            {"Process"}
+        )
+        data = self._open_data()
+        rewindable_csv_reader = BeKindRewind(
+            csv.reader(data, delimiter=self.header["delimiter"], strict=True),
+            clean_elements=True,
+            offset=self._header_lines,
+            pool=self.string_pool.view(),
+        )
+        global_blocks = iter(zip(self._block_line_nos, self.blocks))
+        next_global = next(global_blocks, None)
+
+        try:
+            while block := self.get_next_block(rewindable_csv_reader, self.header, skip=skip):
+                if isinstance(block, Process):
+                    while next_global is not None and next_global[0] < self._last_block_line_no:
+                        yield next_global[1]
+                        next_global = next(global_blocks, None)
+                    self._finalize_process(block)
+                    yield block
+        finally:
+            if data is not self._source:
+                data.close()
+
+        while next_global is not None:
+            yield next_global[1]
+            next_global = next(global_blocks, None)
+
+    def get_process(self, identifier: str) -> Process:
+        """Read, resolve, and unit-normalize the single `Process` with the given `Process
+        identifier`, without parsing the rest of the file.
+
+        Needs a block index; see `SimaProCSV.open_indexed`."""
+        if self.block_index is None:
+            raise ValueError("No block index available; use `SimaProCSV.open_indexed`")
+        try:
+            entry = self._indexed_processes[identifier]
+        except KeyError:
+            raise KeyError(f"No process with identifier '{identifier}' in this file")
+        block = self.read_block(entry)
+        self._finalize_process(block)
+        return block
+
+    def read_block(self, entry: dict) -> Optional[SimaProCSVBlock]:
+        """Seek to the start of a block given in `self.block_index`, and parse only that block."""
+        with open(self._source, "rb") as f:
+            f.seek(entry["offset"])
+            data = io.TextIOWrapper(f, encoding=self._encoding)
+            rewindable_csv_reader = BeKindRewind(
+                csv.reader(data, delimiter=self.header["delimiter"], strict=True),
+                clean_elements=True,
+                offset=entry["line_no"] - 2,
+                pool=self.string_pool.view(),
+            )
+            block = self.get_next_block(rewindable_csv_reader, self.header)
+            data.detach()
+        return block
+
+    def _finalize_process(self, block: Process) -> None:
+        """Resolve parameters, normalize units, and convert the storage of a `Process` read on its
+        own"""
+        if self.header["kind"] in (SimaProCSVType.processes, SimaProCSVType.stages):
+            self.resolve_process_parameters(block)
+        normalize_process_units(block, self.unit_mapping)
+        if self.storage == "columnar":
+            to_columnar([block])
+
+    def _open_data(self):
+        """Open the source again, and advance it past the header."""
+        if isinstance(self._source, Path):
+            data = open(self._source, encoding=self._encoding)
+        else:
+            data = self._source
+            data.seek(0)
+        # `parse_header` also consumes the first line after the header
+        for _ in itertools.islice(data, self._header_lines + 1):
+            pass
+        return data
 
     def to_brightway(
         self,
         filepath: Optional[Path] = None,
         separate_products: bool = True,
         shorten_names: bool = True,
+        json_lines: bool = False,
+        serializer: str = "json",
     ) -> Union[dict, Path]:
-        if self.header["kind"] == SimaProCSVType.processes:
-            from .brightway import lci_to_brightway
+        """Convert to the Brightway import format; see `bw_simapro_csv.brightway`.
 
-            data = lci_to_brightway(
-                self, separate_products=separate_products, shorten_names=shorten_names
-            )
-            if filepath is not None:
-                with open(filepath, "w") as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False, default=json_serializer)
+        Returns the data, or writes it to `filepath` and returns `filepath`. Files are written one
+        dataset at a time as they are built by `iter_brightway_datasets`, so the whole export is
+        never in memory. They are compact JSON, or JSON Lines with `json_lines`, and are encoded
+        with the `serializer` library: `"json"` (the default) or `"orjson"`, which is faster but
+        needs to be installed; see `write_brightway_json`."""
+        if self.header["kind"] == SimaProCSVType.processes:
+            from .brightway import brightway_metadata, iter_brightway_datasets, lci_to_brightway
+
+            with self.profiler.stage("to_brightway") as stage:
+                if filepath is None:
+                    data = lci_to_brightway(
+                        self, separate_products=separate_products, shorten_names=shorten_names
+                    )
+                    stage["items"] = len(data["processes"])
+                    return data
+
+                counts = write_brightway_json(
+                    filepath,
+                    metadata=brightway_metadata(self),
+                    datasets=iter_brightway_datasets(
+                        self, separate_products=separate_products, shorten_names=shorten_names
+                    ),
+                    json_lines=json_lines,
+                    serializer=serializer,
+                )
+                stage["items"] = counts["processes"]
                 return filepath
-            else:
-                return data
         else:
             raise TypeError("Only process exports are currently supported")
 
+    def to_matrices(self, flows: Optional[list] = None):
+        """Build sparse matrices directly, without Brightway datasets. Needs `scipy`.
+
+        For process exports, returns the technosphere and biosphere matrices; see
+        `matrices.inventory_matrices`. For method exports, returns a list with the
+        characterization matrices of each method, with columns aligned to `flows` if given, e.g.
+        the `flows` of the matrices of a process export; see `matrices.method_matrices`."""
+        from .matrices import inventory_matrices, method_matrices
+
+        if self.header["kind"] == SimaProCSVType.processes:
+            with self.profiler.stage("to_matrices") as stage:
+                matrices = inventory_matrices(self)
+                stage["items"] = len(matrices.activities)
+            return matrices
+        elif self.header["kind"] == SimaProCSVType.methods:
+            with self.profiler.stage("to_matrices") as stage:
+                matrices = method_matrices(self, flows=flows)
+                stage["items"] = len(matrices)
+            return matrices
+        else:
+            raise TypeError("Only process and method exports are currently supported")
+
+    def to_sqlite(self, filepath: Path, batch_size: int = 10_000) -> Path:
+        """Write all blocks to normalized tables in a new SQLite database at `filepath`, and
+        return `filepath`. Blocks are written as they are read, so this also works in lazy mode
+        without holding all processes in memory; see `sqlite.export_sqlite`."""
+        from .sqlite import export_sqlite
+
+        with self.profiler.stage("to_sqlite") as stage:
+            counts = export_sqlite(self, filepath, batch_size=batch_size)
+            stage["items"] = counts["processes"]
+        return filepath
+
+    def sample_exchanges(self, iterations: int = 1000, seed: Optional[int] = None) -> tuple:
+        """Draw `iterations` Monte Carlo samples of all exchange amounts, propagating the
+        uncertainty of input parameters through calculated parameters and formulas.
+
+        Returns an array with one row per exchange, and a list describing each row. See
+        `montecarlo.sample_exchanges`."""
+        from .montecarlo import sample_exchanges
+
+        return sample_exchanges(self, iterations=iterations, seed=seed)
+
     def configure_logs(self, stderr_logs: bool, write_logs: bool) -> None:
         logger.remove()
         if stderr_logs:
@@ -224,8 +660,34 @@ class SimaProCSV:
         return any(line[1] for line in lst)
 
     def get_next_block(
-        self, rewindable_csv_reader: BeKindRewind, header: dict
+        self, rewindable_csv_reader: BeKindRewind, header: dict, skip: set = frozenset()
     ) -> Optional[SimaProCSVBlock]:
+        """Read and construct the next block.
+
+        Blocks whose type is in `skip` are read past without being stored or constructed, and
+        are returned as `EmptyBlock`."""
+        raw = self.get_next_raw_block(rewindable_csv_reader, skip=skip)
+        if raw is None or raw is EmptyBlock:
+            return raw
+        block_class, data = raw
+        if not self.profiler.enabled:
+            return block_class(data, header)
+        wall, cpu = time.perf_counter(), time.process_time()
+        block = block_class(data, header)
+        self.profiler.record_block(
+            type(block).__name__,
+            lines=len(data),
+            wall_time=time.perf_counter() - wall,
+            cpu_time=time.process_time() - cpu,
+        )
+        return block
+
+    def get_next_raw_block(
+        self, rewindable_csv_reader: BeKindRewind, skip: set = frozenset()
+    ) -> Union[tuple, EmptyBlock, None]:
+        """Read the next block, and return its class and data lines without constructing it.
+
+        Returns `EmptyBlock` for empty or skipped blocks, and `None` at the end of the file."""
         data = []
 
         for line in rewindable_csv_reader:
@@ -243,6 +705,7 @@ class SimaProCSV:
             return None
 
         block_type = line[0]
+        self._last_block_line_no = rewindable_csv_reader.line_no
         if block_type in CONTROL_BLOCK_MAPPING:
             block_class = CONTROL_BLOCK_MAPPING[block_type]
         elif block_type in INDETERMINATE_SECTION_HEADERS:
@@ -251,81 +714,105 @@ class SimaProCSV:
             block_class = INDETERMINATE_SECTION_HEADERS[block_type]
         else:
             raise ValueError(f"Can't process unknown block type {block_type}")
+        if self.storage == "records" and block_class in RECORD_BLOCKS:
+            # Rows are created as records, instead of converting all dictionaries afterwards
+            block_class = partial(block_class, records=True)
 
+        # Skipped blocks are read again later, so their cells shouldn't stay in the shared pool
+        rewindable_csv_reader.pooling = block_type not in skip
         for line in rewindable_csv_reader:
             if line and line[0] == "End":
                 self.uses_end_text = True
-                return block_class(data, header) if self.data_list_not_empty(data) else EmptyBlock
+                return (block_class, data) if self.data_list_not_empty(data) else EmptyBlock
             if line and line[0] in CONTROL_BLOCK_MAPPING:
                 rewindable_csv_reader.rewind()
-                return block_class(data, header) if self.data_list_not_empty(data) else EmptyBlock
-            data.append((rewindable_csv_reader.line_no, line))
+                return (block_class, data) if self.data_list_not_empty(data) else EmptyBlock
+            if block_type not in skip:
+                data.append((rewindable_csv_reader.line_no, line))
 
         # EOF
-        return block_class(data, header) if self.data_list_not_empty(data) else None
+        return (block_class, data) if self.data_list_not_empty(data) else None
 
     def resolve_parameters(self) -> None:
         """Read in input parameters, and resolve formulas."""
-        dcp = [
-            add_prefix_to_uppercase_input_parameters(prepare_formulas(b.parsed, self.header))
-            for b in self.blocks
-            if isinstance(b, DatabaseCalculatedParameters)
-        ]
-        dip = [
-            add_prefix_to_uppercase_input_parameters(b.parsed)
-            for b in self.blocks
-            if isinstance(b, DatabaseInputParameters)
-        ]
-        pcp = [
-            add_prefix_to_uppercase_input_parameters(prepare_formulas(b.parsed, self.header))
-            for b in self.blocks
-            if isinstance(b, ProjectCalculatedParameters)
-        ]
-        pip = [
-            add_prefix_to_uppercase_input_parameters(b.parsed)
-            for b in self.blocks
-            if isinstance(b, ProjectInputParameters)
-        ]
-
-        substitutes = build_substitutes(
-            itertools.chain(*pip), itertools.chain(*dip)
-        ) | build_substitutes(itertools.chain(*dcp), itertools.chain(*pcp))
-
-        visitor = FormulaSubstitutor(substitutes)
-
-        for obj in itertools.chain(*dcp):
-            substitute_in_formulas(obj, visitor)
-
-        global_params = {o["name"]: o["amount"] for o in itertools.chain(*dip)} | {
-            o["name"]: o["amount"] for o in itertools.chain(*pip)
-        }
-
-        ps = ParameterSet({o["name"]: o for o in itertools.chain(*dcp)}, global_params)
-        parameter_set_evaluate_each_formula(ps)
-
-        substitutes = substitutes | {
-            o["original_name"].upper(): o["name"] for o in itertools.chain(*dcp)
-        }
-        visitor = FormulaSubstitutor(substitutes)
-        global_params = global_params | {o["name"]: o["amount"] for o in itertools.chain(*dcp)}
-
-        for obj in itertools.chain(*pcp):
-            substitute_in_formulas(obj, visitor)
-
-        ps = ParameterSet({o["name"]: o for o in itertools.chain(*pcp)}, global_params)
-        parameter_set_evaluate_each_formula(ps)
-
-        substitutes = substitutes | {
-            o["original_name"].upper(): o["name"] for o in itertools.chain(*pcp)
-        }
-        visitor = FormulaSubstitutor(substitutes)
-        global_params = global_params | {o["name"]: o["amount"] for o in itertools.chain(*pcp)}
+        self.resolve_global_parameters()
 
         logger.info(
             "Extracted and cleaned {n} process datasets",
-            n=sum([1 for block in self if isinstance(block, Process)]),
+            n=sum([1 for block in self.blocks if isinstance(block, Process)]),
+        )
+        if (workers := self._pool_size()) > 1:
+            processes = [block for block in self.blocks if isinstance(block, Process)]
+            resolved = iter(
+                resolve_processes(
+                    processes=processes,
+                    global_params=self.global_params,
+                    substitutes=self.substitutes,
+                    blocks=self.blocks,
+                    workers=workers,
+                    evaluator=self.evaluator,
+                    flow_index=self.flow_index,
+                )
+            )
+            self.blocks = [
+                next(resolved) if isinstance(block, Process) else block for block in self.blocks
+            ]
+        else:
+            for block in filter(lambda b: isinstance(b, Process), self.blocks):
+                self.resolve_process_parameters(block)
+
+    @property
+    def interpreter(self) -> ScopedInterpreter:
+        """Formula interpreter with `self.global_params` installed, shared by all processes"""
+        if self._interpreter is None:
+            self._interpreter = ScopedInterpreter(self.global_params, evaluator=self.evaluator)
+        return self._interpreter
+
+    def resolve_process_parameters(self, block: Process) -> None:
+        """Resolve the local parameters and formulas of a single `Process`, and add flow metadata"""
+        block.resolve_local_parameters(
+            global_params=self.global_params,
+            substitutes=self.substitutes,
+            interpreter=self.interpreter,
+        )
+        block.check_waste_production_model_consistency()
+        block.supplement_biosphere_edges(flow_index=self.flow_index)
+
+    def resolve_global_parameters(self) -> None:
+        """Resolve project and database parameters.
+
+        Names are prefixed and substituted in formulas, and the calculated parameters are then
+        evaluated in the order of their dependencies in a `ParameterGraph`, the same way as in
+        `update_parameters`. Project parameters take precedence over database parameters with the
+        same name.
+
+        Stores the resulting parameter values and name substitutions in `self.global_params` and
+        `self.substitutes`."""
+        blocks = [b for b in self.blocks if isinstance(b, GLOBAL_PARAMETER_BLOCKS)]
+        for block in blocks:
+            if isinstance(block, (DatabaseCalculatedParameters, ProjectCalculatedParameters)):
+                prepare_formulas(block.parsed, self.header)
+            add_prefix_to_uppercase_input_parameters(block.parsed)
+
+        self.substitutes = build_substitutes(
+            itertools.chain.from_iterable(
+                b.parsed
+                for b in blocks
+                if isinstance(b, (ProjectInputParameters, ProjectCalculatedParameters))
+            ),
+            itertools.chain.from_iterable(
+                b.parsed
+                for b in blocks
+                if isinstance(b, (DatabaseInputParameters, DatabaseCalculatedParameters))
+            ),
         )
-        for block in filter(lambda b: isinstance(b, Process), self):
-            block.resolve_local_parameters(global_params=global_params, substitutes=substitutes)
-            block.check_waste_production_model_consistency()
-            block.supplement_biosphere_edges(blocks=self.blocks)
+        visitor = FormulaSubstitutor(self.substitutes)
+        for block in blocks:
+            for obj in block.parsed:
+                if "formula" in obj:
+                    substitute_in_formulas(obj, visitor)
+
+        graph = ParameterGraph.from_blocks(blocks)
+        graph.evaluate(graph.plan, evaluator=self.evaluator)
+        self.global_params = graph.values(None)
+        self._interpreter = None
@@ -0,0 +1,401 @@
+import json
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+from loguru import logger
+
+from .blocks import DamageCategory, ImpactCategory, Method, NormalizationWeightingSet, Process
+from .constants import CONTEXT_MAPPING, IMPACT_CONTEXT_MAPPING, UNSPECIFIED_SUBCOMPARTMENT
+
+try:
+    from scipy import sparse
+except ImportError:
+    # Optional; install with `pip install bw_simapro_csv[matrices]`
+    sparse = None
+
+# Functional edges, which each become one column, and the sign of their amount in their own row
+FUNCTIONAL_EDGES = {"Products": 1, "Waste treatment": -1}
+# Other technosphere edges, linked by name to functional edges, and the sign of their amount. As
+# in Brightway, avoided products and waste sent to treatment are outputs, so positive.
+TECHNOSPHERE_EDGES = {
+    "Materials/fuels": -1,
+    "Electricity/heat": -1,
+    "Avoided products": 1,
+    "Waste to treatment": 1,
+}
+BIOSPHERE_EDGES = tuple(CONTEXT_MAPPING.values())
+
+
+class InventoryMatrices(NamedTuple):
+    """Technosphere and biosphere matrices of the processes in a SimaPro CSV file.
+
+    There is one column for each product of each process, and `technosphere` has one row for
+    each product, in the same order, so it is square. `biosphere` has one row for each elementary
+    flow. `activities` describes each column (and technosphere row), `flows` each biosphere row;
+    `unlinked` counts the technosphere inputs whose names aren't products in the file."""
+
+    technosphere: Any
+    biosphere: Any
+    activities: list[dict]
+    flows: list[tuple]
+    unlinked: dict[str, int]
+
+    def save(self, dirpath: Path) -> Path:
+        """Write the matrices as `technosphere.npz` and `biosphere.npz`, and the row and column
+        descriptions as `index.json`, to the directory `dirpath`."""
+        dirpath.mkdir(parents=True, exist_ok=True)
+        sparse.save_npz(dirpath / "technosphere.npz", self.technosphere)
+        sparse.save_npz(dirpath / "biosphere.npz", self.biosphere)
+        with open(dirpath / "index.json", "w", encoding="utf-8") as f:
+            json.dump(
+                {"activities": self.activities, "flows": self.flows, "unlinked": self.unlinked},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        return dirpath
+
+
+class MethodMatrices(NamedTuple):
+    """Characterization matrices of one `Method` in a SimaPro CSV method export.
+
+    All matrices have one column for each flow in `flows`. `characterization` has one row for
+    each impact category, and `damage`, if the method has damage categories, one row for each
+    damage category; it is the damage factors times `characterization`. `normalization_weighting`
+    has, for each normalization-weighting set, the `normalized` and `weighted` matrices (or `None`
+    if the set has no normalization or weighting factors), with the same rows as `damage`, or as
+    `characterization` if there are no damage categories. The sum of the rows of `weighted` is
+    the single score."""
+
+    name: Optional[str]
+    flows: list[tuple]
+    impact_categories: list[dict]
+    characterization: Any
+    damage_categories: list[dict]
+    damage: Optional[Any]
+    normalization_weighting: dict[str, dict]
+
+
+def context_key(context: tuple) -> tuple[str, str]:
+    """`context` with unspecified subcompartments as empty strings"""
+    category, subcategory = context
+    if subcategory == UNSPECIFIED_SUBCOMPARTMENT:
+        subcategory = ""
+    return (category, subcategory or "")
+
+
+def flow_key(edge: dict) -> tuple:
+    """Biosphere row of `edge`: `(context, name, unit, CAS number)`"""
+    return (
+        context_key(edge["context"]),
+        edge["name"],
+        edge["unit"],
+        edge.get("cas_number") or None,
+    )
+
+
+def cf_flow_key(cf: dict) -> tuple:
+    """`flow_key` of a characterization factor, with the process block label as context"""
+    category, subcategory = cf["context"]
+    return flow_key(cf | {"context": (IMPACT_CONTEXT_MAPPING.get(category, category), subcategory)})
+
+
+def allocation_factors(label: str, edges: list) -> list[float]:
+    """Share of the non-functional exchanges for each functional edge.
+
+    Products are allocated by their `allocation` percentages, normalized to sum to one. If there
+    are no percentages, or for waste treatments, the exchanges are split equally."""
+    if len(edges) == 1:
+        return [1.0]
+    if label == "Products":
+        allocations = [edge.get("allocation") or 0 for edge in edges]
+        if (total := sum(allocations)) > 0:
+            return [value / total for value in allocations]
+    return [1 / len(edges)] * len(edges)
+
+
+def inventory_matrices(spcsv) -> InventoryMatrices:
+    """Build `InventoryMatrices` directly from the `Process` blocks of `spcsv`, without building
+    Brightway datasets.
+
+    Inputs in `Materials/fuels`, `Electricity/heat`, `Avoided products`, and `Waste to treatment`
+    are linked by name to the `Products` or `Waste treatment` of the processes in the file. If
+    several processes have a product with the same name, inputs are linked to the first one.
+    Multifunctional processes are split into one column per product, with the other exchanges
+    scaled by the allocation factors (see `allocation_factors`).
+
+    Signs follow Brightway: production and outputs are positive, inputs are negative, and waste
+    treatment is negative production of the waste. In lazy mode, only one `Process` block is read
+    at a time."""
+    if sparse is None:
+        raise ImportError("`scipy` is not installed")
+
+    activities, flows = [], {}
+    product_rows = {}
+    tech_rows, tech_cols, tech_data = [], [], []
+    # Inputs are linked to products after all processes are read, as they can come later
+    input_names, input_cols, input_data = [], [], []
+    bio_rows, bio_cols, bio_data = [], [], []
+    skipped = 0
+
+    for process in filter(lambda b: isinstance(b, Process), spcsv):
+        label = next((label for label in FUNCTIONAL_EDGES if label in process.blocks), None)
+        if label is None:
+            skipped += 1
+            continue
+        functional = process.blocks[label].parsed
+        identifier = process.parsed["metadata"].get("Process identifier")
+        inputs = [
+            (edge["name"], sign * edge["amount"])
+            for other, sign in TECHNOSPHERE_EDGES.items()
+            if other in process.blocks
+            for edge in process.blocks[other].parsed
+        ]
+        emissions = [
+            (flows.setdefault(flow_key(edge), len(flows)), edge["amount"])
+            for other in BIOSPHERE_EDGES
+            if other in process.blocks
+            for edge in process.blocks[other].parsed
+        ]
+
+        for edge, factor in zip(functional, allocation_factors(label, functional)):
+            col = len(activities)
+            activities.append(
+                {
+                    "process": identifier,
+                    "name": edge["name"],
+                    "unit": edge["unit"],
+                    "allocation_factor": factor,
+                }
+            )
+            if edge["name"] in product_rows:
+                logger.warning(
+                    "Product {n} on line {l} already produced by another process; inputs are linked to the first producer",
+                    n=edge["name"],
+                    l=edge.get("line_no"),
+                )
+            else:
+                product_rows[edge["name"]] = col
+            tech_rows.append(col)
+            tech_cols.append(col)
+            tech_data.append(FUNCTIONAL_EDGES[label] * edge["amount"])
+            for name, value in inputs:
+                input_names.append(name)
+                input_cols.append(col)
+                input_data.append(factor * value)
+            for row, value in emissions:
+                bio_rows.append(row)
+                bio_cols.append(col)
+                bio_data.append(factor * value)
+
+    if skipped:
+        logger.warning("Skipped {c} processes without products or waste treatments", c=skipped)
+
+    unlinked = {}
+    for name, col, value in zip(input_names, input_cols, input_data):
+        if (row := product_rows.get(name)) is None:
+            unlinked[name] = unlinked.get(name, 0) + 1
+            continue
+        tech_rows.append(row)
+        tech_cols.append(col)
+        tech_data.append(value)
+    if unlinked:
+        logger.warning(
+            "{c} technosphere inputs not linked to products in this file", c=len(unlinked)
+        )
+
+    size = len(activities)
+    return InventoryMatrices(
+        technosphere=sparse.csr_matrix(
+            (np.array(tech_data, dtype=float), (tech_rows, tech_cols)), shape=(size, size)
+        ),
+        biosphere=sparse.csr_matrix(
+            (np.array(bio_data, dtype=float), (bio_rows, bio_cols)), shape=(len(flows), size)
+        ),
+        activities=activities,
+        flows=list(flows),
+        unlinked=unlinked,
+    )
+
+
+def demand_vector(matrices: InventoryMatrices, name: str, amount: float = 1.0) -> np.ndarray:
+    """Final demand for `amount` of the product `name`; raises `KeyError` if not produced."""
+    for col, activity in enumerate(matrices.activities):
+        if activity["name"] == name:
+            demand = np.zeros(len(matrices.activities))
+            demand[col] = amount
+            return demand
+    raise KeyError(name)
+
+
+def inventory(matrices: InventoryMatrices, demand: np.ndarray) -> np.ndarray:
+    """Life cycle inventory (elementary flow amounts, in `matrices.flows` order) for `demand`"""
+    from scipy.sparse.linalg import spsolve
+
+    supply = np.atleast_1d(spsolve(matrices.technosphere.tocsc(), demand))
+    return matrices.biosphere @ supply
+
+
+def characterization_factors(cfs: list[dict], flows: list[tuple]) -> dict[int, float]:
+    """Factors in `cfs` for each position in `flows` which has one.
+
+    A flow matches a factor with the same `flow_key`; otherwise, as in SimaPro, a factor with the
+    same context, name, and unit, ignoring the CAS number, and then a factor for the unspecified
+    subcompartment of the same compartment. Units aren't converted."""
+    factors = {}
+    for cf in cfs:
+        key = cf_flow_key(cf)
+        factors[key] = factors[key[:3]] = cf["factor"]
+    result = {}
+    for col, (context, name, unit, cas) in enumerate(flows):
+        for key in (
+            (context, name, unit, cas),
+            (context, name, unit),
+            ((context[0], ""), name, unit),
+        ):
+            if (factor := factors.get(key)) is not None:
+                result[col] = factor
+                break
+    return result
+
+
+def category_factors(objs: list[dict], names: list[str], kind: str, label: str) -> np.ndarray:
+    """Factors of `objs`, which refer to categories by name, in the order of `names`"""
+    positions = {name: row for row, name in enumerate(names)}
+    factors = np.zeros(len(names))
+    for obj in objs:
+        name = obj.get("category", obj.get("name"))
+        if name not in positions:
+            logger.warning(
+                "{k} of {l} refers to unknown category {n} on line {line}",
+                k=kind,
+                l=label,
+                n=name,
+                line=obj.get("line_no"),
+            )
+            continue
+        factors[positions[name]] = obj["factor"]
+    return factors
+
+
+def method_matrices(spcsv, flows: Optional[list[tuple]] = None) -> list[MethodMatrices]:
+    """Build `MethodMatrices` for each `Method` in the method export `spcsv`.
+
+    `Impact category`, `Damage category`, and `Normalization-Weighting set` blocks belong to the
+    `Method` before them. Columns are the elementary flows keyed by `flow_key`, with contexts
+    mapped to the process block labels, e.g. `Air` to `Emissions to air`. If `flows` is given,
+    e.g. `InventoryMatrices.flows`, the columns are exactly `flows`, and factors are matched with
+    `characterization_factors`, so that `characterization @ inventory.biosphere` gives the impacts
+    of each activity. Otherwise, the columns are all flows with factors in the file, shared by all
+    methods.
+
+    Damage categories and normalization-weighting sets are applied when building the matrices,
+    so scoring inventories is one sparse matrix product."""
+    if sparse is None:
+        raise ImportError("`scipy` is not installed")
+
+    methods = []
+    for block in spcsv.blocks:
+        if isinstance(block, Method) or not methods:
+            name = block.parsed.get("Name") if isinstance(block, Method) else None
+            methods.append({"name": name, "impact": [], "damage": [], "nw": []})
+        if isinstance(block, ImpactCategory):
+            methods[-1]["impact"].append(block)
+        elif isinstance(block, DamageCategory):
+            methods[-1]["damage"].append(block)
+        elif isinstance(block, NormalizationWeightingSet):
+            methods[-1]["nw"].append(block)
+
+    if flows is None:
+        flows = {
+            cf_flow_key(cf): None
+            for method in methods
+            for block in method["impact"]
+            for cf in block.parsed["cfs"]
+        }
+    flows = list(flows)
+
+    result = []
+    for method in methods:
+        if not method["impact"]:
+            continue
+        rows, cols, data = [], [], []
+        for row, block in enumerate(method["impact"]):
+            for col, factor in characterization_factors(block.parsed["cfs"], flows).items():
+                rows.append(row)
+                cols.append(col)
+                data.append(factor)
+        characterization = sparse.csr_matrix(
+            (np.array(data, dtype=float), (rows, cols)), shape=(len(method["impact"]), len(flows))
+        )
+        impact_categories = [
+            {"name": block.parsed["name"], "unit": block.parsed["unit"]}
+            for block in method["impact"]
+        ]
+
+        damage_categories, damage = [], None
+        if method["damage"]:
+            damage_categories = [
+                {"name": block.parsed["name"], "unit": block.parsed["unit"]}
+                for block in method["damage"]
+            ]
+            impact_names = [obj["name"] for obj in impact_categories]
+            damage_factors = sparse.csr_matrix(
+                np.array(
+                    [
+                        category_factors(
+                            block.parsed["impact_categories"],
+                            impact_names,
+                            "Damage category",
+                            block.parsed["name"],
+                        )
+                        for block in method["damage"]
+                    ]
+                )
+            )
+            damage = damage_factors @ characterization
+
+        base, names = (
+            (damage, [obj["name"] for obj in damage_categories])
+            if damage is not None
+            else (characterization, [obj["name"] for obj in impact_categories])
+        )
+        normalization_weighting = {}
+        for block in method["nw"]:
+            normalized = weighted = None
+            if block.parsed["normalization"]:
+                normalized = (
+                    sparse.diags(
+                        category_factors(
+                            block.parsed["normalization"],
+                            names,
+                            "Normalization",
+                            block.parsed["name"],
+                        )
+                    )
+                    @ base
+                )
+            if block.parsed["weighting"]:
+                weighted = sparse.diags(
+                    category_factors(
+                        block.parsed["weighting"], names, "Weighting", block.parsed["name"]
+                    )
+                ) @ (base if normalized is None else normalized)
+            normalization_weighting[block.parsed["name"]] = {
+                "normalized": normalized,
+                "weighted": weighted,
+            }
+
+        result.append(
+            MethodMatrices(
+                name=method["name"],
+                flows=flows,
+                impact_categories=impact_categories,
+                characterization=characterization,
+                damage_categories=damage_categories,
+                damage=damage,
+                normalization_weighting=normalization_weighting,
+            )
+        )
+    return result
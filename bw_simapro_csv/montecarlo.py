@@ -0,0 +1,246 @@
+import ast
+from collections import ChainMap
+from functools import lru_cache, reduce
+from typing import Optional
+
+import numpy as np
+from bw2parameters.errors import ParameterError
+from stats_arrays import MCRandomNumberGenerator, UncertaintyBase
+
+from .blocks import (
+    DatabaseCalculatedParameters,
+    DatabaseInputParameters,
+    Process,
+    ProjectCalculatedParameters,
+    ProjectInputParameters,
+)
+from .evaluation import base_symbols, compile_formula
+from .uncertainty import as_stats_arrays_dict, has_uncertainty
+
+# Element-wise replacements for Python constructs which need a single truth value
+VECTOR_FUNCTIONS = {
+    "_where": np.where,
+    "_and": np.logical_and,
+    "_or": np.logical_or,
+    "_not": np.logical_not,
+    # `min` and `max` of several arrays should also be element-wise
+    "min": lambda *args: reduce(np.minimum, args),
+    "max": lambda *args: reduce(np.maximum, args),
+}
+GLOBALS = {"__builtins__": {}, **VECTOR_FUNCTIONS}
+
+
+def _call(name: str, args: list) -> ast.Call:
+    return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=args, keywords=[])
+
+
+class Vectorize(ast.NodeTransformer):
+    """Rewrite conditional expressions, boolean operators, and chained comparisons so that they
+    work element-wise on arrays, e.g. `a if b > 1 else c` to `_where(b > 1, a, c)`."""
+
+    def visit_IfExp(self, node: ast.IfExp) -> ast.Call:
+        self.generic_visit(node)
+        return _call("_where", [node.test, node.body, node.orelse])
+
+    def visit_BoolOp(self, node: ast.BoolOp) -> ast.Call:
+        self.generic_visit(node)
+        name = "_and" if isinstance(node.op, ast.And) else "_or"
+        return reduce(lambda left, right: _call(name, [left, right]), node.values)
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return _call("_not", [node.operand])
+        return node
+
+    def visit_Compare(self, node: ast.Compare) -> ast.AST:
+        self.generic_visit(node)
+        if len(node.ops) == 1:
+            return node
+        operands = [node.left] + node.comparators
+        pairs = [
+            ast.Compare(left=left, ops=[op], comparators=[right])
+            for left, op, right in zip(operands, node.ops, operands[1:])
+        ]
+        return reduce(lambda left, right: _call("_and", [left, right]), pairs)
+
+
+@lru_cache(maxsize=2**16)
+def compile_vectorized(formula: str):
+    """Compile `formula` for evaluation with NumPy arrays as symbol values.
+
+    Formulas are validated by `compile_formula` first, so the same errors are raised as in the
+    scalar `CompiledInterpreter`."""
+    compile_formula(formula)
+    tree = ast.Expression(body=ast.parse(formula).body[0].value)
+    tree = ast.fix_missing_locations(Vectorize().visit(tree))
+    return compile(tree, "<formula>", "eval")
+
+
+def evaluate_vectorized(formula: str, symbols: dict, iterations: int) -> np.ndarray:
+    """Evaluate `formula` against `symbols`, and return an array of length `iterations`"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Both branches of `_where` are evaluated, so errors in the branch not taken are expected
+        result = eval(compile_vectorized(formula), GLOBALS, symbols)
+    return np.broadcast_to(np.asarray(result, dtype=float), (iterations,))
+
+
+def evaluation_order(params: list[dict]) -> list[dict]:
+    """Order calculated parameters so that each is evaluated after the parameters it uses.
+
+    References to names not in `params` are assumed to be already defined."""
+    by_name = {obj["name"]: obj for obj in params}
+    order, done, active = [], set(), set()
+
+    def visit(name: str) -> None:
+        if name in done:
+            return
+        if name in active:
+            raise ParameterError(f"Circular reference for parameter {name}")
+        active.add(name)
+        if by_name[name].get("formula"):
+            for reference in compile_formula(by_name[name]["formula"])[1]:
+                if reference in by_name:
+                    visit(reference)
+        active.discard(name)
+        done.add(name)
+        order.append(by_name[name])
+
+    for name in by_name:
+        visit(name)
+    return order
+
+
+class Sampler:
+    """Draw samples for all uncertain values at once, and hand them out in order.
+
+    Values are registered with `add`, which returns a row number; `generate` then draws all
+    rows with a single random number generator."""
+
+    def __init__(self, iterations: int, seed: Optional[int] = None):
+        self.iterations = iterations
+        self.seed = seed
+        self.dicts = []
+        self.samples = None
+
+    def add(self, obj: dict) -> int:
+        self.dicts.append(as_stats_arrays_dict(obj))
+        return len(self.dicts) - 1
+
+    def generate(self) -> None:
+        if self.dicts:
+            params = UncertaintyBase.from_dicts(*self.dicts)
+            self.samples = MCRandomNumberGenerator(params, seed=self.seed).generate(self.iterations)
+
+    def __getitem__(self, row: int) -> np.ndarray:
+        return self.samples[row]
+
+
+def sample_exchanges(
+    spcsv, iterations: int = 1000, seed: Optional[int] = None
+) -> tuple[np.ndarray, list[dict]]:
+    """Evaluate all exchange amounts of the resolved processes in `spcsv` for `iterations` Monte
+    Carlo samples.
+
+    Input parameters (project, database, and process) with an uncertainty distribution are
+    sampled with `stats_arrays`, and all calculated parameters and exchange formulas are then
+    evaluated once on the arrays of samples. Exchanges without formulas are sampled from their
+    own distribution, if any. All random numbers are drawn in one pass.
+
+    Returns an array of shape `(number of exchanges, iterations)` and a list with one dictionary
+    per row, with the `process` identifier, the `block` label, the exchange `name`, and its
+    `line_no` in the file."""
+    processes = [block for block in spcsv.iter_blocks() if isinstance(block, Process)]
+    sampler = Sampler(iterations=iterations, seed=seed)
+
+    def register(obj: dict):
+        """Row number in `sampler` if `obj` is uncertain, otherwise its static amount"""
+        return ("row", sampler.add(obj)) if has_uncertainty(obj) else ("value", obj["amount"])
+
+    # Project parameters take precedence over database parameters, as in the importer
+    global_inputs = {
+        obj["name"]: register(obj)
+        for block_class in (DatabaseInputParameters, ProjectInputParameters)
+        for block in spcsv.blocks
+        if isinstance(block, block_class)
+        for obj in block.parsed
+    }
+    local_inputs = [
+        (
+            {obj["name"]: register(obj) for obj in process.blocks["Input parameters"].parsed}
+            if "Input parameters" in process.blocks
+            else {}
+        )
+        for process in processes
+    ]
+    index, exchanges = [], []
+    for process in processes:
+        for label, block in process.blocks.items():
+            if not getattr(block, "has_formula", None):
+                continue
+            for obj in block.parsed:
+                index.append(
+                    {
+                        "process": process.parsed["metadata"].get("Process identifier"),
+                        "block": label,
+                        "name": obj.get("name"),
+                        "line_no": obj.get("line_no"),
+                    }
+                )
+                exchanges.append(None if obj.get("formula") else register(obj))
+
+    sampler.generate()
+
+    def value(registered: tuple) -> np.ndarray:
+        kind, data = registered
+        if kind == "row":
+            return sampler[data]
+        return np.full(iterations, data, dtype=float)
+
+    # Formulas only read symbols, so scopes are layered instead of copied. The element-wise
+    # `min` and `max` need to take precedence over the scalar versions in `base_symbols`.
+    symbols = ChainMap(
+        {name: value(registered) for name, registered in global_inputs.items()},
+        VECTOR_FUNCTIONS,
+        base_symbols(),
+    )
+    for block_class in (DatabaseCalculatedParameters, ProjectCalculatedParameters):
+        params = [
+            obj for block in spcsv.blocks if isinstance(block, block_class) for obj in block.parsed
+        ]
+        symbols = symbols.new_child(evaluate_calculated_parameters(params, symbols, iterations))
+
+    result = np.empty((len(index), iterations))
+    rows = iter(enumerate(exchanges))
+    for process, inputs in zip(processes, local_inputs):
+        local = symbols.new_child({name: value(registered) for name, registered in inputs.items()})
+        if "Calculated parameters" in process.blocks:
+            local = local.new_child(
+                evaluate_calculated_parameters(
+                    process.blocks["Calculated parameters"].parsed, local, iterations
+                )
+            )
+        for label, block in process.blocks.items():
+            if not getattr(block, "has_formula", None):
+                continue
+            for obj in block.parsed:
+                row, registered = next(rows)
+                if registered is None:
+                    result[row] = evaluate_vectorized(obj["formula"], local, iterations)
+                else:
+                    result[row] = value(registered)
+
+    return result, index
+
+
+def evaluate_calculated_parameters(params: list[dict], symbols: ChainMap, iterations: int) -> dict:
+    """Evaluate calculated parameters in dependency order; returns the new symbols"""
+    new = {}
+    scope = symbols.new_child(new)
+    for obj in evaluation_order(params):
+        if obj.get("formula"):
+            new[obj["name"]] = evaluate_vectorized(obj["formula"], scope, iterations)
+        else:
+            # Formula was invalid and removed when resolving parameters
+            new[obj["name"]] = np.full(iterations, obj["amount"], dtype=float)
+    return new
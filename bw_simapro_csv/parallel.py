@@ -0,0 +1,176 @@
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from .blocks import EmptyBlock, Process, SimaProCSVBlock
+from .blocks.generic_biosphere import build_flow_index
+from .csv_reader import BeKindRewind
+from .evaluation import ScopedInterpreter
+
+# Smallest share of a file worth reading in its own worker; smaller files are read serially, as
+# starting the pool and sending the blocks back would take longer than reading them
+MIN_BYTES_PER_WORKER = 2**21
+
+
+class Chunk(NamedTuple):
+    """Consecutive rows of a SimaPro CSV file which only contain whole blocks.
+
+    `start` and `stop` are the physical lines (from the start of the file) to read; `stop` is
+    `None` for the last chunk. `row_no` is the number of rows before the chunk, from which the
+    line numbers of its blocks are counted. `uses_end_text` is whether an `End` line was seen
+    before the chunk."""
+
+    start: int
+    stop: Optional[int]
+    row_no: int
+    uses_end_text: bool
+
+
+def available_cpus() -> int:
+    """Number of CPUs this process can run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def pool_size(filepath: Path, workers: int) -> int:
+    """Number of workers to use for reading `filepath`; `1` means reading it serially.
+
+    More workers than CPUs only add overhead, and each worker should have at least
+    `MIN_BYTES_PER_WORKER` of the file to read."""
+    return max(1, min(workers, available_cpus(), filepath.stat().st_size // MIN_BYTES_PER_WORKER))
+
+
+def find_chunks(data, delimiter: str, skip_lines: int, n: int) -> list[Chunk]:
+    """Split the rest of `data`, an open file positioned after its first `skip_lines` lines, into
+    about `n` chunks of whole blocks.
+
+    Only rows which start with `End` are used as boundaries: an `End` line always closes the
+    current block, so the next row starts a new one. Files without `End` lines are one chunk.
+    The rows aren't cleaned, so this is much faster than reading the blocks."""
+    ends = []
+    reader = csv.reader(data, delimiter=delimiter, strict=True)
+    rows = 0
+    for row in reader:
+        rows += 1
+        if row and row[0] == "End" and not any(row[1:]):
+            ends.append((skip_lines + reader.line_num, skip_lines + rows))
+
+    chunks, start, row_no, step = [], skip_lines, skip_lines, rows / n
+    for line, row in ends:
+        if row - skip_lines >= step * (len(chunks) + 1) and row < skip_lines + rows:
+            chunks.append(Chunk(start, line, row_no, bool(chunks)))
+            start, row_no = line, row
+    chunks.append(Chunk(start, None, row_no, bool(chunks)))
+    return chunks
+
+
+# Shared state for reading chunks; set once per worker by `_init_reader`
+_reader = None
+
+
+def _init_reader(reader: Any) -> None:
+    global _reader
+    _reader = reader
+
+
+def _read_chunk(chunk: Chunk) -> list[tuple[int, SimaProCSVBlock]]:
+    # Same steps as the serial loop in `SimaProCSV.read_blocks`, with a string pool per chunk
+    _reader.uses_end_text = chunk.uses_end_text
+    blocks = []
+    with open(_reader._source, encoding=_reader._encoding) as data:
+        rewindable_csv_reader = BeKindRewind(
+            csv.reader(
+                itertools.islice(data, chunk.start, chunk.stop),
+                delimiter=_reader.header["delimiter"],
+                strict=True,
+            ),
+            clean_elements=True,
+            offset=chunk.row_no - 1,
+        )
+        while block := _reader.get_next_block(rewindable_csv_reader, _reader.header):
+            if block is not EmptyBlock:
+                blocks.append((_reader._last_block_line_no, block))
+    return blocks
+
+
+def read_chunks(
+    reader: Any, chunks: list[Chunk], workers: int
+) -> list[tuple[int, SimaProCSVBlock]]:
+    """Read and construct the blocks of each chunk of `chunks` in a pool of `workers` processes.
+
+    `reader` is the `SimaProCSV` instance doing the import, before any blocks are read; a copy is
+    sent once to each worker, which uses it to open the source file and split it into blocks. Each
+    worker reads and cleans its own rows, so only the constructed blocks are sent between
+    processes. Returns `(line_no, block)` pairs, in file order."""
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_reader, initargs=(reader,)
+    ) as executor:
+        return [pair for pairs in executor.map(_read_chunk, chunks) for pair in pairs]
+
+
+def chunk_size(n: int, workers: int) -> int:
+    """Number of tasks to send to a worker at once; a few chunks per worker balances the load"""
+    return max(1, n // (workers * 4))
+
+
+# Shared state for resolving processes; set once per worker by `_init_resolver`. Global
+# parameters are installed once in the worker's interpreter.
+_global_params = None
+_substitutes = None
+_flow_index = None
+_interpreter = None
+
+
+def _init_resolver(
+    global_params: dict, substitutes: dict, flow_index: dict, evaluator: str
+) -> None:
+    global _global_params, _substitutes, _flow_index, _interpreter
+    _global_params, _substitutes, _flow_index = global_params, substitutes, flow_index
+    _interpreter = ScopedInterpreter(global_params, evaluator=evaluator)
+
+
+def _resolve_process_batch(processes: list[Process]) -> list[Process]:
+    # Same steps as `SimaProCSV.resolve_process_parameters`
+    for process in processes:
+        process.resolve_local_parameters(
+            global_params=_global_params, substitutes=_substitutes, interpreter=_interpreter
+        )
+        process.check_waste_production_model_consistency()
+        process.supplement_biosphere_edges(flow_index=_flow_index)
+    return processes
+
+
+def resolve_processes(
+    processes: list[Process],
+    global_params: dict,
+    substitutes: dict,
+    blocks: list[SimaProCSVBlock],
+    workers: int,
+    evaluator: str = "asteval",
+    flow_index: Optional[dict] = None,
+) -> list[Process]:
+    """Resolve local parameters for each process in a pool of `workers` processes.
+
+    Each process only reads the global parameters, name substitutions, and flow index (built from
+    the flow lists in `blocks` if not given), so these are sent once to each worker. Processes
+    are sent in batches, and the resolved copies are returned in the same order as
+    `processes`."""
+    if not processes:
+        return []
+    if flow_index is None:
+        flow_index = build_flow_index(blocks)
+    size = chunk_size(len(processes), workers)
+    batches = [processes[i : i + size] for i in range(0, len(processes), size)]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_resolver,
+        initargs=(global_params, substitutes, flow_index, evaluator),
+    ) as executor:
+        return [
+            process for batch in executor.map(_resolve_process_batch, batches) for process in batch
+        ]
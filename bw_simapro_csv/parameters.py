@@ -1,7 +1,11 @@
 import ast
+import keyword
+import math
 import re
+import unicodedata
 from copy import deepcopy
-from typing import Iterable, Pattern, Type
+from functools import lru_cache
+from typing import Iterable, Optional, Pattern, Type
 
 from asteval.astutils import NameFinder
 from astunparse import unparse
@@ -224,16 +228,146 @@ class OnlySelectedUppercase(NameFinder):
         ast.NodeVisitor.generic_visit(self, node)
 
 
+# Number of (formula, substitutions) pairs to remember across `FormulaSubstitutor` instances
+FORMULA_CACHE_SIZE = 2**16
+
+# Anything which could be an identifier in a formula; can also match inside numbers like `1e5`,
+# but that only adds unused names to the cache key
+IDENTIFIER_RE = re.compile(r"[^\W\d]\w*")
+TOKEN_RE = re.compile(
+    r"\s*(?:"
+    + r"(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)"
+    + r"|(?P<name>[A-Za-z_][A-Za-z0-9_]*)"
+    + r"|(?P<operator>\*\*|[-+*/()])"
+    + r"|(?P<other>\S)"
+    + r")"
+)
+
+
 class FormulaSubstitutor:
-    """Callable class that will substitute symbol names using ``substitutions`` substitution dictionary."""
+    """Callable class that will substitute symbol names using ``substitutions`` substitution dictionary.
+
+    Results are cached in a bounded LRU cache shared by all instances. The cache key is the formula
+    and the substitutions for the names it uses, so the same formula can be reused across
+    processes even if their other local parameters differ."""
 
     def __init__(self, substitutions):
+        self.substitutions = substitutions
         self.visitor = OnlySelectedUppercase(substitutions)
 
     def __call__(self, formula):
-        parsed = ast.parse(formula)
-        self.visitor.visit(parsed)
-        return unparse(parsed).strip()
+        names = {
+            name.upper() if name.isascii() else unicodedata.normalize("NFKC", name).upper()
+            for name in IDENTIFIER_RE.findall(formula)
+        }
+        relevant = tuple(
+            sorted((name, self.substitutions[name]) for name in names if name in self.substitutions)
+        )
+        return substitute_names(formula, relevant)
+
+
+@lru_cache(maxsize=FORMULA_CACHE_SIZE)
+def substitute_names(formula: str, substitutions: tuple) -> str:
+    """Uppercase the names in `formula`, and substitute them using `substitutions`, a tuple of
+    `(name, new name)` pairs.
+
+    Returns the formula in the form given by `astunparse`. Formulas with only names, numbers,
+    `+ - * / **`, and parentheses are rewritten by `rewrite_arithmetic_formula` without building
+    an AST."""
+    substitutions = dict(substitutions)
+    rewritten = rewrite_arithmetic_formula(formula, substitutions)
+    if rewritten is not None:
+        return rewritten
+    parsed = ast.parse(formula)
+    OnlySelectedUppercase(substitutions).visit(parsed)
+    return unparse(parsed).strip()
+
+
+def rewrite_arithmetic_formula(formula: str, substitutions: dict) -> Optional[str]:
+    """Parse a simple arithmetic formula, and write it in the same form as `astunparse`.
+
+    `astunparse` puts each binary and unary operation in parentheses, and writes numbers with
+    `repr`, so `2*a+-1.50` becomes `((2 * A) + (- 1.5))`.
+
+    Returns `None` if the formula has anything else, or isn't valid Python; the caller should
+    then use the `ast` module."""
+    if not formula or formula[0].isspace():
+        return None
+    tokens = []
+    for match in TOKEN_RE.finditer(formula):
+        if match.group("other") is not None:
+            return None
+        for kind in ("number", "name", "operator"):
+            if match.group(kind) is not None:
+                tokens.append((kind, match.group(kind)))
+                break
+    if not tokens:
+        return None
+    try:
+        result, position = _parse_sum(tokens, 0, substitutions)
+    except (IndexError, ValueError):
+        return None
+    return result if position == len(tokens) else None
+
+
+def _parse_sum(tokens: list, position: int, substitutions: dict) -> tuple[str, int]:
+    left, position = _parse_product(tokens, position, substitutions)
+    while position < len(tokens) and tokens[position][1] in ("+", "-"):
+        operator = tokens[position][1]
+        right, position = _parse_product(tokens, position + 1, substitutions)
+        left = f"({left} {operator} {right})"
+    return left, position
+
+
+def _parse_product(tokens: list, position: int, substitutions: dict) -> tuple[str, int]:
+    left, position = _parse_unary(tokens, position, substitutions)
+    while position < len(tokens) and tokens[position][1] in ("*", "/"):
+        operator = tokens[position][1]
+        right, position = _parse_unary(tokens, position + 1, substitutions)
+        left = f"({left} {operator} {right})"
+    return left, position
+
+
+def _parse_unary(tokens: list, position: int, substitutions: dict) -> tuple[str, int]:
+    if tokens[position][1] in ("+", "-"):
+        operator = tokens[position][1]
+        operand, position = _parse_unary(tokens, position + 1, substitutions)
+        return f"({operator} {operand})", position
+    return _parse_power(tokens, position, substitutions)
+
+
+def _parse_power(tokens: list, position: int, substitutions: dict) -> tuple[str, int]:
+    base, position = _parse_atom(tokens, position, substitutions)
+    if position < len(tokens) and tokens[position][1] == "**":
+        # Right associative, and binds less tightly than a unary operator on its right
+        exponent, position = _parse_unary(tokens, position + 1, substitutions)
+        return f"({base} ** {exponent})", position
+    return base, position
+
+
+def _parse_atom(tokens: list, position: int, substitutions: dict) -> tuple[str, int]:
+    kind, value = tokens[position]
+    if kind == "number":
+        if value.isdigit():
+            if len(value) > 1 and value[0] == "0" and value.strip("0"):
+                # Leading zeros are a syntax error
+                raise ValueError
+            return repr(int(value)), position + 1
+        number = float(value)
+        if math.isinf(number):
+            raise ValueError
+        return repr(number), position + 1
+    elif kind == "name":
+        if keyword.iskeyword(value):
+            raise ValueError
+        name = value.upper()
+        return substitutions.get(name, name), position + 1
+    elif value == "(":
+        inner, position = _parse_sum(tokens, position + 1, substitutions)
+        if tokens[position][1] != ")":
+            raise ValueError
+        return inner, position + 1
+    raise ValueError
 
 
 def substitute_in_formulas(obj: dict, visitor: Type, formula_field: str = "formula") -> dict:
@@ -0,0 +1,119 @@
+import json
+import platform
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+
+def peak_rss() -> Optional[int]:
+    """Peak resident set size of this process in bytes, or `None` if not available"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if platform.system() == "Darwin" else peak * 1024
+
+
+class Profiler:
+    """Collect wall time, CPU time, memory use, and item counts for the stages of an import.
+
+    Stages with the same name are accumulated, so e.g. calling `to_brightway` twice gives one
+    `to_brightway` entry with `calls` equal to two.
+
+    Peak RSS is the high-water mark for the whole Python process, and can't be reset, so it only
+    tells you in which stage the peak was first reached. If `tracemalloc` is already tracing when
+    a stage starts, its peak is reset, and the peak of traced memory allocated during the stage is
+    also recorded. We don't start `tracemalloc` ourselves as it makes parsing several times
+    slower."""
+
+    enabled = True
+
+    def __init__(self):
+        self.stages = {}
+        self.blocks = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[dict]:
+        """Time the body of the `with` statement as stage `name`.
+
+        Yields a dictionary; set `items` on it to record how many things the stage handled. Other
+        counts set on it are also recorded, and accumulated in the same way."""
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        counts = {"items": 0}
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield counts
+        finally:
+            record = self.stages.setdefault(
+                name,
+                {
+                    "calls": 0,
+                    "wall_time": 0.0,
+                    "cpu_time": 0.0,
+                    "items": 0,
+                    "peak_rss": None,
+                    "tracemalloc_peak": None,
+                },
+            )
+            record["calls"] += 1
+            record["wall_time"] += time.perf_counter() - wall
+            record["cpu_time"] += time.process_time() - cpu
+            for key, value in counts.items():
+                record[key] = record.get(key, 0) + value
+            record["peak_rss"] = peak_rss()
+            if tracing:
+                record["tracemalloc_peak"] = max(
+                    record["tracemalloc_peak"] or 0, tracemalloc.get_traced_memory()[1]
+                )
+
+    def record_block(self, name: str, lines: int, wall_time: float, cpu_time: float) -> None:
+        """Add the construction of one block of class `name` with `lines` data lines"""
+        record = self.blocks.setdefault(
+            name, {"count": 0, "lines": 0, "wall_time": 0.0, "cpu_time": 0.0}
+        )
+        record["count"] += 1
+        record["lines"] += lines
+        record["wall_time"] += wall_time
+        record["cpu_time"] += cpu_time
+
+    def as_dict(self) -> dict:
+        from . import __version__
+
+        return {
+            "bw_simapro_csv": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "stages": self.stages,
+            "blocks": self.blocks,
+        }
+
+    def to_json(self, filepath: Optional[Path] = None) -> Union[str, Path]:
+        """Serialize the collected timings to JSON, and write to `filepath` if given"""
+        if filepath is None:
+            return json.dumps(self.as_dict(), indent=2)
+        with open(filepath, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+        return filepath
+
+
+class NullProfiler(Profiler):
+    """Stand-in used when profiling is turned off; stages are run but nothing is recorded"""
+
+    enabled = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[dict]:
+        yield {"items": 0}
+
+    def record_block(self, name: str, lines: int, wall_time: float, cpu_time: float) -> None:
+        pass
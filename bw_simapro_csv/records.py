@@ -0,0 +1,143 @@
+from collections.abc import Iterable, Iterator, MutableMapping
+from copy import deepcopy
+from typing import Any
+
+# Fields of a `stats_arrays` uncertainty distribution; see `uncertainty.distribution`
+UNCERTAINTY_FIELDS = {
+    "uncertainty type": "uncertainty_type",
+    "loc": "loc",
+    "scale": "scale",
+    "shape": "shape",
+    "minimum": "minimum",
+    "maximum": "maximum",
+    "negative": "negative",
+}
+
+
+class Record(MutableMapping):
+    """Compact replacement for a parsed row dictionary.
+
+    Each known key is stored in a slot; the attribute name is the key with spaces replaced by
+    underscores, e.g. `record.uncertainty_type` for `record["uncertainty type"]`. Keys which
+    aren't set are missing, as in the dictionary. Other keys are kept in a dictionary which is
+    only created when needed, and removed again when it becomes empty.
+
+    Supports the full mapping protocol, so it can be used wherever the dictionary was used;
+    `to_dict()` returns a plain dictionary."""
+
+    # Key to attribute name
+    FIELDS = {}
+    __slots__ = ("_extra",)
+
+    def __init__(self, data: Iterable = (), **kwargs):
+        self.update(data, **kwargs)
+
+    def __getitem__(self, key: str) -> Any:
+        attr = self.FIELDS.get(key)
+        if attr is None:
+            return self._extras()[key]
+        try:
+            return getattr(self, attr)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        attr = self.FIELDS.get(key)
+        if attr is None:
+            if not hasattr(self, "_extra"):
+                self._extra = {}
+            self._extra[key] = value
+        else:
+            setattr(self, attr, value)
+
+    def __delitem__(self, key: str) -> None:
+        attr = self.FIELDS.get(key)
+        if attr is None:
+            del self._extras()[key]
+            if not self._extra:
+                del self._extra
+            return
+        try:
+            delattr(self, attr)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: object) -> bool:
+        attr = self.FIELDS.get(key)
+        return key in self._extras() if attr is None else hasattr(self, attr)
+
+    def __iter__(self) -> Iterator[str]:
+        for key, attr in self.FIELDS.items():
+            if hasattr(self, attr):
+                yield key
+        yield from self._extras()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def _extras(self) -> dict:
+        return getattr(self, "_extra", {})
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    def __or__(self, other: dict) -> dict:
+        return self.to_dict() | other
+
+    def __ror__(self, other: dict) -> dict:
+        return other | self.to_dict()
+
+    def __copy__(self) -> "Record":
+        return type(self)(self.items())
+
+    def __deepcopy__(self, memo: dict) -> "Record":
+        return type(self)(deepcopy(self.to_dict(), memo))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Exchange(Record):
+    """Product, technosphere, or biosphere exchange of a `Process`.
+
+    `kind` and `field1` to `field3` are the raw SimaPro uncertainty fields, which are replaced by
+    a distribution when the parameters of the process are resolved."""
+
+    FIELDS = {
+        "name": "name",
+        "unit": "unit",
+        "amount": "amount",
+        "formula": "formula",
+        "original_formula": "original_formula",
+        "allocation": "allocation",
+        "allocation_formula": "allocation_formula",
+        "comment": "comment",
+        "line_no": "line_no",
+        "context": "context",
+        "cas_number": "cas_number",
+        "category": "category",
+        "waste_type": "waste_type",
+        "original unit before conversion": "original_unit_before_conversion",
+        "unit conversion factor": "unit_conversion_factor",
+        "kind": "kind",
+        "field1": "field1",
+        "field2": "field2",
+        "field3": "field3",
+    } | UNCERTAINTY_FIELDS
+    __slots__ = tuple(FIELDS.values())
+
+
+class Parameter(Record):
+    """Input or calculated parameter, in a project, database, or process"""
+
+    FIELDS = {
+        "name": "name",
+        "original_name": "original_name",
+        "amount": "amount",
+        "formula": "formula",
+        "original_formula": "original_formula",
+        "hidden": "hidden",
+        "comment": "comment",
+        "line_no": "line_no",
+    } | UNCERTAINTY_FIELDS
+    __slots__ = tuple(FIELDS.values())
@@ -0,0 +1,335 @@
+import json
+import sqlite3
+from pathlib import Path
+from typing import Optional
+
+from .blocks import (
+    DatabaseCalculatedParameters,
+    DatabaseInputParameters,
+    GenericBiosphere,
+    ImpactCategory,
+    Method,
+    Process,
+    ProjectCalculatedParameters,
+    ProjectInputParameters,
+    Units,
+)
+from .constants import CONTEXT_MAPPING
+from .records import UNCERTAINTY_FIELDS
+from .utils import json_serializer
+
+# Rows buffered per table before they are inserted with one `executemany`
+BATCH_SIZE = 10_000
+
+UNCERTAINTY_COLUMNS = (
+    ("uncertainty_type", "INTEGER"),
+    ("loc", "REAL"),
+    ("scale", "REAL"),
+    ("shape", "REAL"),
+    ("minimum", "REAL"),
+    ("maximum", "REAL"),
+    ("negative", "INTEGER"),
+)
+TABLES = {
+    "metadata": (("key", "TEXT PRIMARY KEY"), ("value", "TEXT")),
+    "processes": (
+        ("id", "INTEGER PRIMARY KEY"),
+        ("identifier", "TEXT"),
+        ("name", "TEXT"),
+        ("category_type", "TEXT"),
+        ("type", "TEXT"),
+        ("geography", "TEXT"),
+        ("date", "TEXT"),
+        ("comment", "TEXT"),
+        ("metadata", "TEXT"),
+    ),
+    "exchanges": (
+        ("id", "INTEGER PRIMARY KEY"),
+        ("process_id", "INTEGER NOT NULL REFERENCES processes(id)"),
+        ("block", "TEXT NOT NULL"),
+        ("name", "TEXT"),
+        ("unit", "TEXT"),
+        ("amount", "REAL"),
+        ("formula", "TEXT"),
+        ("allocation", "REAL"),
+        ("allocation_formula", "TEXT"),
+        ("compartment", "TEXT"),
+        ("subcompartment", "TEXT"),
+        ("cas_number", "TEXT"),
+        ("category", "TEXT"),
+        ("waste_type", "TEXT"),
+        ("comment", "TEXT"),
+        ("line_no", "INTEGER"),
+    )
+    + UNCERTAINTY_COLUMNS,
+    "parameters": (
+        ("id", "INTEGER PRIMARY KEY"),
+        ("process_id", "INTEGER REFERENCES processes(id)"),
+        ("scope", "TEXT NOT NULL"),
+        ("kind", "TEXT NOT NULL"),
+        ("name", "TEXT NOT NULL"),
+        ("original_name", "TEXT"),
+        ("amount", "REAL"),
+        ("formula", "TEXT"),
+        ("original_formula", "TEXT"),
+        ("hidden", "INTEGER"),
+        ("comment", "TEXT"),
+        ("line_no", "INTEGER"),
+    )
+    + UNCERTAINTY_COLUMNS,
+    "flows": (
+        ("id", "INTEGER PRIMARY KEY"),
+        ("context", "TEXT NOT NULL"),
+        ("name", "TEXT NOT NULL"),
+        ("unit", "TEXT"),
+        ("cas_number", "TEXT"),
+        ("comment", "TEXT"),
+        ("line_no", "INTEGER"),
+    ),
+    "units": (
+        ("id", "INTEGER PRIMARY KEY"),
+        ("name", "TEXT NOT NULL"),
+        ("dimension", "TEXT"),
+        ("conversion", "REAL"),
+        ("reference_unit", "TEXT"),
+        ("line_no", "INTEGER"),
+    ),
+    "impact_categories": (
+        ("id", "INTEGER PRIMARY KEY"),
+        ("method", "TEXT"),
+        ("name", "TEXT NOT NULL"),
+        ("unit", "TEXT"),
+    ),
+    "characterization_factors": (
+        ("id", "INTEGER PRIMARY KEY"),
+        ("impact_category_id", "INTEGER NOT NULL REFERENCES impact_categories(id)"),
+        ("compartment", "TEXT"),
+        ("subcompartment", "TEXT"),
+        ("name", "TEXT NOT NULL"),
+        ("cas_number", "TEXT"),
+        ("factor", "REAL"),
+        ("unit", "TEXT"),
+        ("line_no", "INTEGER"),
+    ),
+}
+# Indexes are created after all rows are inserted, which is faster than updating them each time
+INDEXES = {
+    "processes": ("identifier", "name"),
+    "exchanges": ("process_id", "name"),
+    "parameters": ("process_id", "name"),
+    "flows": ("name",),
+    "units": ("name",),
+    "impact_categories": ("name",),
+    "characterization_factors": ("impact_category_id", "name", "cas_number"),
+}
+GLOBAL_PARAMETERS = {
+    DatabaseInputParameters: ("database", "input"),
+    DatabaseCalculatedParameters: ("database", "calculated"),
+    ProjectInputParameters: ("project", "input"),
+    ProjectCalculatedParameters: ("project", "calculated"),
+}
+PROCESS_PARAMETERS = {
+    "Input parameters": ("process", "input"),
+    "Calculated parameters": ("process", "calculated"),
+}
+
+
+def schema() -> list[str]:
+    return [
+        "CREATE TABLE {} ({})".format(table, ", ".join(f"{c} {t}" for c, t in columns))
+        for table, columns in TABLES.items()
+    ]
+
+
+def indexes() -> list[str]:
+    return [
+        f"CREATE INDEX idx_{table}_{column} ON {table} ({column})"
+        for table, columns in INDEXES.items()
+        for column in columns
+    ]
+
+
+class BatchInserter:
+    """Buffer rows for each table, and insert them with `executemany` every `batch_size` rows.
+    Rows are dictionaries; missing columns are `NULL`. Also counts the rows of each table, which
+    gives the `id` of the next row."""
+
+    def __init__(self, connection: sqlite3.Connection, batch_size: int = BATCH_SIZE):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.columns = {table: [c for c, _ in columns] for table, columns in TABLES.items()}
+        self.statements = {
+            table: "INSERT INTO {} ({}) VALUES ({})".format(
+                table, ", ".join(columns), ", ".join("?" * len(columns))
+            )
+            for table, columns in self.columns.items()
+        }
+        self.buffers = {table: [] for table in TABLES}
+        self.counts = {table: 0 for table in TABLES}
+
+    def add(self, table: str, row: dict) -> int:
+        """Add `row` to `table`, and return its `id`"""
+        self.counts[table] += 1
+        if "id" in self.columns[table]:
+            row["id"] = self.counts[table]
+        buffer = self.buffers[table]
+        buffer.append(tuple(row.get(column) for column in self.columns[table]))
+        if len(buffer) >= self.batch_size:
+            self.flush(table)
+        return self.counts[table]
+
+    def flush(self, table: Optional[str] = None) -> None:
+        for name in [table] if table else self.buffers:
+            if self.buffers[name]:
+                self.connection.executemany(self.statements[name], self.buffers[name])
+                self.buffers[name] = []
+
+
+def uncertainty_columns(obj: dict) -> dict:
+    return {column: obj.get(key) for key, column in UNCERTAINTY_FIELDS.items()}
+
+
+def exchange_row(process_id: int, label: str, obj: dict) -> dict:
+    compartment, subcompartment = obj.get("context") or (None, None)
+    return {
+        "process_id": process_id,
+        "block": label,
+        "name": obj.get("name", obj.get("waste_treatment")),
+        "unit": obj.get("unit"),
+        "amount": obj.get("amount"),
+        "formula": obj.get("formula"),
+        "allocation": obj.get("allocation"),
+        "allocation_formula": obj.get("allocation_formula"),
+        "compartment": compartment,
+        "subcompartment": subcompartment,
+        "cas_number": obj.get("cas_number"),
+        "category": obj.get("category"),
+        "waste_type": obj.get("waste_type"),
+        "comment": obj.get("comment"),
+        "line_no": obj.get("line_no"),
+    } | uncertainty_columns(obj)
+
+
+def parameter_row(process_id: Optional[int], scope: str, kind: str, obj: dict) -> dict:
+    return {
+        "process_id": process_id,
+        "scope": scope,
+        "kind": kind,
+        "name": obj["name"],
+        "original_name": obj.get("original_name"),
+        "amount": obj.get("amount"),
+        "formula": obj.get("formula"),
+        "original_formula": obj.get("original_formula"),
+        "hidden": obj.get("hidden"),
+        "comment": obj.get("comment"),
+        "line_no": obj.get("line_no"),
+    } | uncertainty_columns(obj)
+
+
+def export_sqlite(spcsv, filepath: Path, batch_size: int = BATCH_SIZE) -> dict[str, int]:
+    """Write the blocks of `spcsv` to normalized tables in a new SQLite database at `filepath`.
+
+    Writes the header to `metadata`, and `processes` with their `exchanges`, the project,
+    database, and process `parameters`, the `flows` from the flow lists (with the same context
+    labels as in processes), `units`, and the
+    `impact_categories` and `characterization_factors` of method exports. Columns which are
+    common to most rows are stored in their own columns; `processes.metadata` has all process
+    metadata as JSON.
+
+    Blocks are written as they are read, with `executemany` in batches of `batch_size` rows, so
+    in lazy mode only one `Process` block and one batch per table are in memory. Everything is
+    written in one transaction, and the indexes are created at the end. An existing file at
+    `filepath` is replaced.
+
+    Returns the number of rows in each table."""
+    filepath = Path(filepath)
+    filepath.unlink(missing_ok=True)
+    connection = sqlite3.connect(filepath)
+    try:
+        with connection:
+            for statement in schema():
+                connection.execute(statement)
+            inserter = BatchInserter(connection, batch_size)
+            metadata = dict(spcsv.header) | {
+                "database_name": getattr(spcsv, "database_name", None),
+                "filepath": str(spcsv.filepath) if spcsv.filepath else None,
+            }
+            for key, value in metadata.items():
+                inserter.add(
+                    "metadata", {"key": key, "value": json.dumps(value, default=json_serializer)}
+                )
+
+            method = None
+            for block in spcsv:
+                if isinstance(block, Process):
+                    write_process(inserter, block)
+                elif type(block) in GLOBAL_PARAMETERS:
+                    scope, kind = GLOBAL_PARAMETERS[type(block)]
+                    for obj in block.parsed:
+                        inserter.add("parameters", parameter_row(None, scope, kind, obj))
+                elif isinstance(block, GenericBiosphere):
+                    for obj in block.parsed:
+                        # Same context as `exchanges.compartment`
+                        context = CONTEXT_MAPPING.get(block.category, block.category)
+                        inserter.add("flows", dict(obj) | {"context": context})
+                elif isinstance(block, Units):
+                    for obj in block.parsed:
+                        inserter.add(
+                            "units",
+                            dict(obj) | {"reference_unit": obj.get("reference unit name")},
+                        )
+                elif isinstance(block, Method):
+                    method = block.parsed.get("Name")
+                elif isinstance(block, ImpactCategory):
+                    category_id = inserter.add(
+                        "impact_categories",
+                        {
+                            "method": method,
+                            "name": block.parsed["name"],
+                            "unit": block.parsed["unit"],
+                        },
+                    )
+                    for cf in block.parsed["cfs"]:
+                        compartment, subcompartment = cf["context"]
+                        inserter.add(
+                            "characterization_factors",
+                            dict(cf)
+                            | {
+                                "impact_category_id": category_id,
+                                "compartment": compartment,
+                                "subcompartment": subcompartment,
+                            },
+                        )
+            inserter.flush()
+            for statement in indexes():
+                connection.execute(statement)
+    finally:
+        connection.close()
+    return inserter.counts
+
+
+def write_process(inserter: BatchInserter, process: Process) -> int:
+    metadata = process.parsed["metadata"]
+    date = metadata.get("Date")
+    process_id = inserter.add(
+        "processes",
+        {
+            "identifier": metadata.get("Process identifier"),
+            "name": metadata.get("Process name"),
+            "category_type": metadata.get("Category type"),
+            "type": metadata.get("Type"),
+            "geography": metadata.get("Geography"),
+            "date": date.isoformat() if date else None,
+            "comment": metadata.get("Comment"),
+            "metadata": json.dumps(metadata, ensure_ascii=False, default=json_serializer),
+        },
+    )
+    for label, block in process.blocks.items():
+        if label in PROCESS_PARAMETERS:
+            scope, kind = PROCESS_PARAMETERS[label]
+            for obj in block.parsed:
+                inserter.add("parameters", parameter_row(process_id, scope, kind, obj))
+        else:
+            for obj in block.parsed:
+                inserter.add("exchanges", exchange_row(process_id, label, obj))
+    return process_id
@@ -21,6 +21,27 @@ def undefined_distribution(amount: float) -> dict:
     }
 
 
+def has_uncertainty(dist: dict) -> bool:
+    """Distribution has an uncertainty type which can be sampled"""
+    return dist.get("uncertainty type", UndefinedUncertainty.id) not in (
+        NoUncertainty.id,
+        UndefinedUncertainty.id,
+    )
+
+
+def as_stats_arrays_dict(dist: dict) -> dict:
+    """Convert a distribution from `distribution` into the form used by
+    `stats_arrays.UncertaintyBase.from_dicts`."""
+    result = {
+        key: dist[key] for key in ("loc", "scale", "shape", "minimum", "maximum") if key in dist
+    }
+    result["negative"] = dist.get("negative", False)
+    result["uncertainty_type"] = dist.get("uncertainty type", UndefinedUncertainty.id)
+    if not has_uncertainty(dist):
+        result["loc"] = dist["amount"]
+    return result
+
+
 def clean_simapro_uncertainty_fields(obj: dict) -> dict:
     """Remove SimaPro uncertainty field once a valid distribution has been created."""
     if "uncertainty type" not in obj:
@@ -122,6 +143,24 @@ Line number: {line_no}
     raise ValueError(f"Unknown uncertainty type: {kind}")
 
 
+def update_distribution_amount(dist: dict, amount: float) -> dict:
+    """Move distribution to a new `amount`, keeping its relative spread.
+
+    Distributions which can't be scaled to the new value, i.e. if the old or new `amount` is
+    zero, become undefined."""
+    if not has_uncertainty(dist):
+        # `loc` is the amount for these types, like in `undefined_distribution`
+        dist.update({"loc": amount, "amount": amount})
+    elif dist["amount"] and amount:
+        recalculate_uncertainty_distribution(dist, amount / dist["amount"])
+    else:
+        logger.warning(f"Can't scale uncertainty distribution to amount {amount}: {dist}")
+        for field in ("scale", "shape", "minimum", "maximum", "negative"):
+            dist.pop(field, None)
+        dist.update(undefined_distribution(amount))
+    return dist
+
+
 def recalculate_uncertainty_distribution(dist: dict, scale: float = 1.0) -> dict:
     """Adjust uncertainty distribution to possible new `amount` value and scale."""
     if scale == 0:
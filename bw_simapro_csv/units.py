@@ -24,15 +24,8 @@ missing_units = set()
 unit_conversions = set()
 
 
-def normalize_units(blocks: list[SimaProCSVBlock]) -> None:
-    """Convert all values to the base unit.
-
-    Need to change:
-    * amount
-    * formula
-    * uncertainty distribution
-
-    """
+def build_unit_mapping(blocks: list[SimaProCSVBlock]) -> dict[str, dict]:
+    """Build a mapping from unit names to `Units` rows, warning about conflicting definitions."""
     unit_conversion_check = defaultdict(list)
     for block in filter(lambda x: isinstance(x, Units), blocks):
         for o in block.parsed:
@@ -80,33 +73,51 @@ def normalize_units(blocks: list[SimaProCSVBlock]) -> None:
                 d=mapping["line_no"],
             )
 
+    return unit_mapping
+
+
+def normalize_process_units(process_block: Process, unit_mapping: dict[str, dict]) -> None:
+    """Convert the values in a single `Process` to the base unit given in `unit_mapping`."""
+    for block in filter(lambda x: isinstance(x, HAS_UNITS), process_block.blocks.values()):
+        for obj in block.parsed:
+            try:
+                mapping = unit_mapping[obj["unit"]]
+                if mapping["reference unit name"] != obj["unit"]:
+                    if (
+                        key := (obj["unit"], mapping["reference unit name"])
+                    ) not in unit_conversions:
+                        unit_conversions.add(key)
+                        logger.debug(
+                            "Changing units from {a} to {b} with conversion factor {c} on line {d}",
+                            a=obj["unit"],
+                            b=mapping["reference unit name"],
+                            c=mapping["conversion"],
+                            d=obj["line_no"],
+                        )
+                    obj["original unit before conversion"] = obj["unit"]
+                    obj["unit conversion factor"] = mapping["conversion"]
+                    obj["unit"] = mapping["reference unit name"]
+                    if "formula" in obj:
+                        obj["formula"] = f"({obj['formula']}) * {mapping['conversion']}"
+                    if "uncertainty type" in obj:
+                        recalculate_uncertainty_distribution(obj, mapping["conversion"])
+                    else:
+                        obj["amount"] *= mapping["conversion"]
+            except KeyError:
+                if obj["unit"] not in missing_units:
+                    missing_units.add(obj["unit"])
+                    logger.warning("Unknown unit {unit} used on line {line_no}", **obj)
+
+
+def normalize_units(blocks: list[SimaProCSVBlock]) -> None:
+    """Convert all values to the base unit.
+
+    Need to change:
+    * amount
+    * formula
+    * uncertainty distribution
+
+    """
+    unit_mapping = build_unit_mapping(blocks)
     for process_block in filter(lambda x: isinstance(x, Process), blocks):
-        for block in filter(lambda x: isinstance(x, HAS_UNITS), process_block.blocks.values()):
-            for obj in block.parsed:
-                try:
-                    mapping = unit_mapping[obj["unit"]]
-                    if mapping["reference unit name"] != obj["unit"]:
-                        if (
-                            key := (obj["unit"], mapping["reference unit name"])
-                        ) not in unit_conversions:
-                            unit_conversions.add(key)
-                            logger.debug(
-                                "Changing units from {a} to {b} with conversion factor {c} on line {d}",
-                                a=obj["unit"],
-                                b=mapping["reference unit name"],
-                                c=mapping["conversion"],
-                                d=obj["line_no"],
-                            )
-                        obj["original unit before conversion"] = obj["unit"]
-                        obj["unit conversion factor"] = mapping["conversion"]
-                        obj["unit"] = mapping["reference unit name"]
-                        if "formula" in obj:
-                            obj["formula"] = f"({obj['formula']}) * {mapping['conversion']}"
-                        if "uncertainty type" in obj:
-                            recalculate_uncertainty_distribution(obj, mapping["conversion"])
-                        else:
-                            obj["amount"] *= mapping["conversion"]
-                except KeyError:
-                    if obj["unit"] not in missing_units:
-                        missing_units.add(obj["unit"])
-                        logger.warning("Unknown unit {unit} used on line {line_no}", **obj)
+        normalize_process_units(process_block, unit_mapping)
@@ -179,6 +179,57 @@ def jump_to_nonempty(data: list) -> list:
     return data[i:]
 
 
+class LineCursor:
+    """Read position in a list of `(line_no, line)` tuples.
+
+    Block parsers consume their data lines from the front; doing this with `list.pop(0)` or by
+    slicing copies the rest of the list each time. The cursor only moves an index, so consuming a
+    block is linear in its length. The underlying list is not modified."""
+
+    def __init__(self, data: list, position: int = 0):
+        self.data = data
+        self.position = position
+
+    def __bool__(self) -> bool:
+        return self.position < len(self.data)
+
+    def __iter__(self) -> Iterable:
+        """Iterate over the remaining lines, consuming them"""
+        while self.position < len(self.data):
+            self.position += 1
+            yield self.data[self.position - 1]
+
+    def peek(self, offset: int = 0) -> tuple:
+        """Return the line `offset` lines after the current position without consuming it.
+
+        Raises `IndexError` past the end of the data."""
+        if self.position + offset >= len(self.data):
+            raise IndexError("Read past end of block")
+        return self.data[self.position + offset]
+
+    def pop(self) -> tuple:
+        """Consume and return the current line"""
+        line = self.peek()
+        self.position += 1
+        return line
+
+    def advance(self, n: int = 1) -> None:
+        self.position += n
+
+    def rewind(self) -> None:
+        """Put the last consumed line back"""
+        self.position -= 1
+
+    def skip_empty(self) -> "LineCursor":
+        """Move past empty lines; the equivalent of `jump_to_nonempty`"""
+        while self.position < len(self.data):
+            line = self.data[self.position][1]
+            if line and any(line):
+                break
+            self.position += 1
+        return self
+
+
 def get_true_length(line: list) -> int:
     """Computes line length, not accounting for trailing empty elements"""
     n_trailing_empty = 0
@@ -190,24 +241,25 @@ def get_true_length(line: list) -> int:
     return len(line) - n_trailing_empty
 
 
-def get_key_multiline_values(block: list[tuple], stop_terms: Iterable) -> tuple[str, list]:
+def get_key_multiline_values(
+    block: Union[list[tuple], LineCursor], stop_terms: Iterable
+) -> tuple[str, list]:
     """Pull off the first non-empty line, then optional empty lines, and then each data line until
-    an empty line"""
-    while block:
-        block = jump_to_nonempty(block)
-        if not any(data for _, data in block):
-            return
-        _, line = block.pop(0)
+    an empty line.
+
+    `block` can be a list of `(line_no, line)` tuples or a `LineCursor`."""
+    cursor = block if isinstance(block, LineCursor) else LineCursor(block)
+    while cursor.skip_empty():
+        _, line = cursor.pop()
         if get_true_length(line) != 1:
             raise ValueError(f"Block header should have one element; found {len(line)}: {line}")
         key = line[0]
-        block = jump_to_nonempty(block)
+        cursor.skip_empty()
 
         data = []
-        while block:
-            line_no, line = block.pop(0)
+        for line_no, line in cursor:
             if get_true_length(line) == 1 and line[0] in stop_terms:
-                block.insert(0, (line_no, line))
+                cursor.rewind()
                 break
             elif not line or not any(line):
                 break
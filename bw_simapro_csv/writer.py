@@ -0,0 +1,97 @@
+import json
+import shutil
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from typing import Iterable
+
+from .utils import json_serializer
+
+try:
+    import orjson
+except ImportError:
+    # Optional; install with `pip install bw_simapro_csv[fast-json]`
+    orjson = None
+
+
+# Names of the libraries which can encode JSON; see `JSONEncoder`
+SERIALIZERS = ("json", "orjson")
+
+# Encoded product datasets are kept in memory up to this size, and then moved to a temporary file
+PRODUCT_BUFFER_SIZE = 2**24
+
+
+class JSONEncoder:
+    """Encode single objects to compact UTF-8 JSON with the `serializer` library.
+
+    `"json"` uses the standard library. `"orjson"` is several times faster, but needs to be
+    installed, and writes `NaN` and infinite floats as `null` instead of `NaN` and `Infinity`."""
+
+    def __init__(self, serializer: str = "json"):
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"Unknown serializer '{serializer}'; must be one of {SERIALIZERS}")
+        if serializer == "orjson" and orjson is None:
+            raise ImportError("`orjson` is not installed")
+        self.serializer = serializer
+
+    def __call__(self, obj) -> bytes:
+        if self.serializer == "orjson":
+            return orjson.dumps(
+                obj,
+                default=json_serializer,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+            )
+        return json.dumps(
+            obj, ensure_ascii=False, separators=(",", ":"), default=json_serializer
+        ).encode("utf-8")
+
+
+def write_brightway_json(
+    filepath: Path,
+    metadata: dict,
+    datasets: Iterable[dict],
+    json_lines: bool = False,
+    serializer: str = "json",
+) -> dict:
+    """Write the result of `lci_to_brightway` to `filepath` without building it as one string.
+
+    `metadata` has the other top-level keys, like `database` and the parameter lists. `datasets`
+    yields the process and product datasets in any order, e.g. from `iter_brightway_datasets`;
+    products have the `type` `product`. Each dataset is encoded with `JSONEncoder(serializer)`
+    and written as soon as it is produced, so only one dataset is in memory at a time.
+
+    With `json_lines`, the file has one JSON object per line: first `metadata`, then each dataset
+    in the order of `datasets`. Otherwise, the file is one compact JSON object with the same
+    structure as the dictionary from `lci_to_brightway`. The `products` array comes after the
+    `processes` array, so encoded products are buffered in a temporary file until all processes
+    have been written.
+
+    Returns the number of `processes` and `products` datasets written."""
+    encode = JSONEncoder(serializer)
+    counts = {"processes": 0, "products": 0}
+    with open(filepath, "wb") as f:
+        if json_lines:
+            f.write(encode(metadata) + b"\n")
+            for obj in datasets:
+                f.write(encode(obj) + b"\n")
+                counts["products" if obj["type"] == "product" else "processes"] += 1
+            return counts
+
+        f.write(b"{")
+        for key, value in metadata.items():
+            f.write(encode(key) + b":" + encode(value) + b",")
+        f.write(b'"processes":[')
+        with SpooledTemporaryFile(max_size=PRODUCT_BUFFER_SIZE) as products:
+            for obj in datasets:
+                if obj["type"] == "product":
+                    stream, key = products, "products"
+                else:
+                    stream, key = f, "processes"
+                if counts[key]:
+                    stream.write(b",")
+                stream.write(encode(obj))
+                counts[key] += 1
+            f.write(b'],"products":[')
+            products.seek(0)
+            shutil.copyfileobj(products, f)
+        f.write(b"]}")
+    return counts
@@ -13,6 +13,24 @@ def fixtures_dir():
     return FIXTURES_DIR
 
 
+def parsed_data(blocks: list) -> list:
+    """`parsed` of each block, with the `parsed` of each sub-block of `Process` blocks. Blocks
+    compare equal by their `parsed` only, which for `Process` is just the metadata."""
+    return [
+        (
+            type(block).__name__,
+            block.parsed,
+            {label: sub.parsed for label, sub in getattr(block, "blocks", {}).items()},
+        )
+        for block in blocks
+    ]
+
+
+@pytest.fixture
+def block_data():
+    return parsed_data
+
+
 @pytest.fixture(autouse=True)
 def temporary_logs_dir(monkeypatch, tmp_path):
     monkeypatch.setattr("bw_simapro_csv.main.user_log_dir", lambda *args, **kwargs: tmp_path)
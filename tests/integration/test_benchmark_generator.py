@@ -0,0 +1,21 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from bw_simapro_csv import SimaProCSV
+from bw_simapro_csv.blocks import Process
+
+ROOT = Path(__file__).parents[2]
+
+
+def test_generator_command_line(tmp_path):
+    # In a new interpreter, so the encoding isn't registered by an earlier import
+    filepath = tmp_path / "generated.csv"
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.generator", str(filepath), "--processes", "5"],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+    )
+    spcsv = SimaProCSV(filepath, stderr_logs=False, write_logs=False)
+    assert sum(isinstance(block, Process) for block in spcsv.blocks) == 5
@@ -0,0 +1,89 @@
+import inspect
+import json
+import re
+
+import pytest
+
+from bw_simapro_csv import SimaProCSV
+from bw_simapro_csv.brightway import iter_brightway_datasets
+
+RICE = "Rice, at farm (WFLDB 3.0)/IN U"
+STRAW = "Rice straw, at farm (WFLDB 3.0)/IN U"
+RESIDUES = (
+    "Agricultural residues, non-mechanized, sun dried, at farm, 1 kg dry matter (WFLDB 3.0)/GLO U"
+)
+MULTIFUNCTIONAL = "MFP: Rice, at farm (WFLDB 3.0)⧺Rice straw, at farm (WFLD"
+# Codes of allocated processes and of products are random
+RANDOM_CODE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def exchanges(ds: dict) -> list:
+    return [(exc["type"], exc["name"], exc["amount"]) for exc in ds["exchanges"]]
+
+
+@pytest.mark.parametrize("separate_products", [False, True])
+def test_iter_brightway_datasets(fixtures_dir, separate_products):
+    spcsv = SimaProCSV(fixtures_dir / "allocation.csv")
+    iterator = iter_brightway_datasets(spcsv, separate_products=separate_products)
+    assert inspect.isgenerator(iterator)
+    datasets = {(ds["type"], ds["name"]): ds for ds in iterator}
+
+    expected = [
+        ("process", RESIDUES),
+        ("multifunctional", MULTIFUNCTIONAL),
+        ("readonly_process", f"{RICE} (read-only process)"),
+        ("readonly_process", f"{STRAW} (read-only process)"),
+    ]
+    if separate_products:
+        expected += [("product", RESIDUES), ("product", RICE), ("product", STRAW)]
+    assert sorted(datasets) == sorted(expected)
+
+    residues = datasets["process", RESIDUES]
+    assert residues["code"] == "ReCenter000033915300046"
+    assert not any(key.startswith("mf_") for key in residues)
+    assert exchanges(residues) == [
+        ("technosphere", STRAW, 0.771),
+        ("technosphere", RICE, 0.388),
+        ("production", RESIDUES, 1.0),
+    ]
+
+    multifunctional = datasets["multifunctional", MULTIFUNCTIONAL]
+    assert multifunctional["code"] == "ReCenter000033915302504"
+    assert multifunctional["mf_strategy_label"] == "property allocation by 'manual_allocation'"
+    assert multifunctional["mf_was_once_allocated"] is True
+    assert exchanges(multifunctional) == [
+        ("production", RICE, 6250.0),
+        ("production", STRAW, 3125.0),
+    ]
+
+    for product, factor, amount in [(RICE, 0.958, 6250.0), (STRAW, 0.042, 3125.0)]:
+        functional = next(exc for exc in multifunctional["exchanges"] if exc["name"] == product)
+        assert functional["mf_allocated"] is True
+        assert functional["mf_allocation_factor"] == pytest.approx(factor)
+        assert functional["mf_manual_input_product"] is separate_products
+
+        allocated = datasets["readonly_process", f"{product} (read-only process)"]
+        assert RANDOM_CODE.match(allocated["code"])
+        assert functional["mf_allocated_process_code"] == allocated["code"]
+        assert allocated["mf_parent_key"] == ("Bobs_burgers", "ReCenter000033915302504")
+        assert allocated["mf_strategy_label"] == multifunctional["mf_strategy_label"]
+        assert allocated["mf_allocation_run_uuid"] == multifunctional["mf_allocation_run_uuid"]
+        assert exchanges(allocated) == [("production", product, amount)]
+        if separate_products:
+            assert allocated["exchanges"][0]["input"] == functional["input"]
+            assert functional["input"] == ("Bobs_burgers", datasets["product", product]["code"])
+            assert RANDOM_CODE.match(datasets["product", product]["code"])
+        else:
+            assert allocated["exchanges"][0]["input"] == ("Bobs_burgers", allocated["code"])
+
+
+def test_lazy_to_brightway_filepath(fixtures_dir, tmp_path):
+    filepath = tmp_path / "out.json"
+    spcsv = SimaProCSV(fixtures_dir / "allocation.csv", lazy=True, profile=True)
+    spcsv.to_brightway(filepath, separate_products=True)
+    given = json.loads(filepath.read_text(encoding="utf-8"))
+    expected = SimaProCSV(fixtures_dir / "allocation.csv").to_brightway(separate_products=True)
+
+    assert spcsv.timings["stages"]["to_brightway"]["items"] == len(expected["processes"])
+    assert [ds["name"] for ds in given["processes"]] == [ds["name"] for ds in expected["processes"]]
+    assert [ds["name"] for ds in given["products"]] == [ds["name"] for ds in expected["products"]]
@@ -0,0 +1,46 @@
+from io import StringIO
+
+import pytest
+
+from bw_simapro_csv import SimaProCSV
+from bw_simapro_csv.blocks import Process
+
+
+@pytest.mark.parametrize(
+    "filename",
+    [
+        "allocation.csv",
+        "external_documents_and_literature_references.csv",
+        "process.csv",
+        "project_params.csv",
+        "waste.csv",
+        "weird_units.csv",
+    ],
+)
+def test_lazy_iteration_matches_eager(fixtures_dir, block_data, filename):
+    eager = SimaProCSV(fixtures_dir / filename)
+    lazy = SimaProCSV(fixtures_dir / filename, lazy=True)
+
+    assert not any(isinstance(block, Process) for block in lazy.blocks)
+    given = list(lazy)
+    assert [type(block) for block in given] == [type(block) for block in eager.blocks]
+    assert block_data(given) == block_data(eager.blocks)
+    assert lazy.global_params == eager.global_params
+
+
+def test_lazy_iteration_repeatable_stringio(fixtures_dir, block_data):
+    with open(fixtures_dir / "process.csv", encoding="sloppy-windows-1252") as f:
+        stream = StringIO(f.read())
+    eager = SimaProCSV(fixtures_dir / "process.csv")
+    lazy = SimaProCSV(stream, lazy=True)
+
+    assert block_data(lazy.iter_blocks()) == block_data(eager.blocks)
+    assert block_data(lazy.iter_blocks()) == block_data(eager.blocks)
+
+
+def test_lazy_to_brightway(fixtures_dir):
+    eager = SimaProCSV(fixtures_dir / "allocation.csv").to_brightway()
+    lazy = SimaProCSV(fixtures_dir / "allocation.csv", lazy=True).to_brightway()
+
+    assert len(lazy["processes"]) == len(eager["processes"])
+    assert [ds["name"] for ds in lazy["processes"]] == [ds["name"] for ds in eager["processes"]]
@@ -0,0 +1,57 @@
+import pytest
+
+from bw_simapro_csv import SimaProCSV, parallel
+from bw_simapro_csv.header import parse_header
+
+
+@pytest.fixture(autouse=True)
+def pool(monkeypatch):
+    """Use the pool for the small fixture files, also on machines with a single CPU"""
+    monkeypatch.setattr(parallel, "available_cpus", lambda: 2)
+    monkeypatch.setattr(parallel, "MIN_BYTES_PER_WORKER", 1)
+
+
+@pytest.mark.parametrize(
+    "filename", ["allocation.csv", "method_end.csv", "project_params.csv", "waste.csv"]
+)
+def test_parallel_parsing_matches_serial(fixtures_dir, block_data, filename):
+    serial = SimaProCSV(fixtures_dir / filename)
+    parallel = SimaProCSV(fixtures_dir / filename, workers=2)
+
+    assert [type(block) for block in parallel.blocks] == [type(block) for block in serial.blocks]
+    assert block_data(parallel.blocks) == block_data(serial.blocks)
+    assert parallel._block_line_nos == serial._block_line_nos
+    assert parallel.global_params == serial.global_params
+
+
+def test_parallel_parameter_resolution(fixtures_dir):
+    given = SimaProCSV(fixtures_dir / "project_params.csv", workers=2)
+
+    edge = given.blocks[1].blocks["Materials/fuels"].parsed[0]
+    assert edge["formula"] == "((4.8 * SP_VARIABLE_NAME) / ((7 * 0.9) - 3))"
+    assert edge["amount"] == pytest.approx(4.8 / (7 * 0.9 - 3))
+
+
+def test_find_chunks(fixtures_dir):
+    with open(fixtures_dir / "waste.csv", encoding="sloppy-windows-1252") as f:
+        header, header_lines = parse_header(f)
+        chunks = parallel.find_chunks(f, header.delimiter, header_lines + 1, n=4)
+    assert len(chunks) == 4
+    assert chunks[0].start == chunks[0].row_no == header_lines + 1
+    assert not chunks[0].uses_end_text and all(chunk.uses_end_text for chunk in chunks[1:])
+    assert [chunk.stop for chunk in chunks[:-1]] == [chunk.start for chunk in chunks[1:]]
+    assert chunks[-1].stop is None
+    lines = (fixtures_dir / "waste.csv").read_text(encoding="sloppy-windows-1252").splitlines()
+    assert all(lines[chunk.start - 1] == "End" for chunk in chunks[1:])
+
+
+def test_serial_without_spare_cpus(fixtures_dir, monkeypatch):
+    monkeypatch.setattr(parallel, "available_cpus", lambda: 1)
+    monkeypatch.setattr(parallel, "ProcessPoolExecutor", None)
+    given = SimaProCSV(fixtures_dir / "waste.csv", workers=4)
+    assert given.blocks == SimaProCSV(fixtures_dir / "waste.csv").blocks
+
+
+def test_serial_small_file(fixtures_dir, monkeypatch):
+    monkeypatch.setattr(parallel, "MIN_BYTES_PER_WORKER", 2**20)
+    assert parallel.pool_size(fixtures_dir / "waste.csv", 4) == 1
@@ -0,0 +1,96 @@
+import os
+import shutil
+from io import StringIO
+
+import pytest
+
+from bw_simapro_csv import SimaProCSV
+from bw_simapro_csv.blocks import Process
+from bw_simapro_csv.cache import cache_key, clear_cache, evict, load_cached, store_cached
+
+
+@pytest.fixture
+def cache_dir(monkeypatch, tmp_path):
+    directory = tmp_path / "cache"
+    monkeypatch.setattr("bw_simapro_csv.cache.user_cache_dir", lambda *args: directory)
+    return directory
+
+
+def test_cache_roundtrip(fixtures_dir, cache_dir):
+    first = SimaProCSV(fixtures_dir / "process.csv", cache=True, profile=True)
+    assert first.timings["stages"]["load_cache"]["items"] == 0
+    assert first.timings["stages"]["store_cache"]["items"] == 1
+    assert len(list(cache_dir.iterdir())) == 1
+
+    second = SimaProCSV(fixtures_dir / "process.csv", cache=True, profile=True)
+    assert second.timings["stages"]["load_cache"]["items"] == 1
+    assert "read_blocks" not in second.timings["stages"]
+    assert second.profiler is not first.profiler
+    assert second.header == first.header
+    assert second.global_params == first.global_params
+    assert [type(block) for block in second.blocks] == [type(block) for block in first.blocks]
+    for a, b in zip(first.blocks, second.blocks):
+        if isinstance(a, Process):
+            assert {k: v.parsed for k, v in a.blocks.items()} == {
+                k: v.parsed for k, v in b.blocks.items()
+            }
+    assert second.to_brightway()["processes"]
+    assert second.update_parameters({"db_input_param": 2}) is not None
+
+
+def test_cache_excludes_string_pool(fixtures_dir, cache_dir):
+    first = SimaProCSV(fixtures_dir / "process.csv", cache=True, lazy=True)
+    assert len(first.string_pool)
+    second = SimaProCSV(fixtures_dir / "process.csv", cache=True, lazy=True)
+    assert len(second.string_pool) == 0
+    assert "string_pool" not in first._cached_state()
+    assert [type(block) for block in second] == [type(block) for block in first]
+
+
+def test_cache_hit_from_another_path(fixtures_dir, cache_dir, tmp_path, block_data):
+    first_path, second_path = tmp_path / "a.csv", tmp_path / "b.csv"
+    shutil.copy(fixtures_dir / "process.csv", first_path)
+    first = SimaProCSV(first_path, cache=True, lazy=True)
+    first_path.rename(second_path)
+
+    second = SimaProCSV(second_path, cache=True, lazy=True, profile=True)
+    assert second.timings["stages"]["load_cache"]["items"] == 1
+    assert second.filepath == str(second_path)
+    assert "filepath" not in first._cached_state()
+    assert block_data(second) == block_data(SimaProCSV(fixtures_dir / "process.csv").blocks)
+
+
+def test_cache_key_options(fixtures_dir, tmp_path):
+    filepath = tmp_path / "process.csv"
+    shutil.copy(fixtures_dir / "process.csv", filepath)
+    key = cache_key(filepath, {"storage": "dict"})
+    assert key == cache_key(filepath, {"storage": "dict"})
+    assert key != cache_key(filepath, {"storage": "records"})
+    with open(filepath, "a") as f:
+        f.write("\n")
+    assert key != cache_key(filepath, {"storage": "dict"})
+
+
+def test_cache_stream_error():
+    with pytest.raises(ValueError, match="Caching needs a `Path`"):
+        SimaProCSV(StringIO(""), cache=True)
+
+
+def test_cache_unreadable_file(tmp_path):
+    (tmp_path / "abc.pickle").write_bytes(b"not a pickle")
+    assert load_cached("abc", tmp_path) is None
+    assert not (tmp_path / "abc.pickle").exists()
+
+
+def test_cache_lru_eviction(tmp_path):
+    for number, key in enumerate("abc"):
+        store_cached(key, {"data": b"x" * 1000}, tmp_path)
+        os.utime(tmp_path / f"{key}.pickle", ns=(number * 10**9, number * 10**9))
+    # Using `a` makes `b` the least recently used
+    assert load_cached("a", tmp_path) == {"data": b"x" * 1000}
+    size = (tmp_path / "a.pickle").stat().st_size
+    store_cached("d", {"data": b"x" * 1000}, tmp_path, max_bytes=3 * size)
+    assert sorted(p.stem for p in tmp_path.iterdir()) == ["a", "c", "d"]
+    assert evict(tmp_path, max_bytes=0, keep=tmp_path / "d.pickle") == 2
+    assert clear_cache(tmp_path) == 1
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,105 @@
+import pickle
+from copy import deepcopy
+
+import numpy as np
+import pytest
+
+from bw_simapro_csv import SimaProCSV
+from bw_simapro_csv.blocks import Process
+from bw_simapro_csv.columnar import ColumnarEdges, ColumnarStore
+
+
+def exchange_blocks(spcsv):
+    return [
+        (label, block.parsed)
+        for process in spcsv.iter_blocks()
+        if isinstance(process, Process)
+        for label, block in process.blocks.items()
+        if getattr(block, "has_formula", None)
+    ]
+
+
+@pytest.mark.parametrize(
+    "filename", ["process.csv", "project_params.csv", "waste_scenario.csv", "weird_units.csv"]
+)
+def test_columnar_matches_dict_storage(fixtures_dir, filename):
+    expected = exchange_blocks(SimaProCSV(fixtures_dir / filename))
+    given = exchange_blocks(SimaProCSV(fixtures_dir / filename, storage="columnar"))
+    assert expected
+    for (label, rows), (other_label, edges) in zip(expected, given):
+        assert label == other_label
+        assert isinstance(edges, ColumnarEdges)
+        assert edges == rows
+        assert edges.to_list() == rows
+
+
+def test_columnar_lazy(fixtures_dir):
+    expected = exchange_blocks(SimaProCSV(fixtures_dir / "process.csv"))
+    given = exchange_blocks(SimaProCSV(fixtures_dir / "process.csv", lazy=True, storage="columnar"))
+    assert [rows for _, rows in given] == [rows for _, rows in expected]
+
+
+def test_columnar_to_brightway(fixtures_dir):
+    data = SimaProCSV(fixtures_dir / "process.csv", storage="columnar").to_brightway()
+    exchanges = [exc for process in data["processes"] for exc in process["exchanges"]]
+    assert exchanges and all(type(exc) is dict for exc in exchanges)
+
+
+def test_columnar_update_parameters(fixtures_dir):
+    expected = SimaProCSV(fixtures_dir / "project_params.csv")
+    given = SimaProCSV(fixtures_dir / "project_params.csv", storage="columnar")
+    changed = given.update_parameters({"SP_VARIABLE_NAME": 3})
+    assert changed and changed == expected.update_parameters({"SP_VARIABLE_NAME": 3})
+    assert [rows for _, rows in exchange_blocks(given)] == [
+        rows for _, rows in exchange_blocks(expected)
+    ]
+
+
+def test_columnar_unknown_storage(fixtures_dir):
+    with pytest.raises(ValueError, match="Unknown storage"):
+        SimaProCSV(fixtures_dir / "process.csv", storage="arrow")
+
+
+def test_columnar_store_columns():
+    rows = [
+        {"name": "a", "unit": "kg", "amount": 1.0, "line_no": 10, "context": ("air",)},
+        {"name": "b", "unit": "kg", "amount": 2, "line_no": 11, "negative": True},
+    ]
+    store = ColumnarStore(rows)
+    assert store.columns["amount"].dtype == np.float64
+    assert store.columns["name"].dtype == np.int32
+    assert store.columns["line_no"].dtype == np.int8
+    assert store.strings == ["a", "b", "kg"]
+    assert set(store.masks) == {"context", "negative"}
+
+    edges = ColumnarEdges(store, 0, 2)
+    assert edges == rows
+    assert edges[-1]["amount"] == 2.0 and type(edges[-1]["amount"]) is float
+    assert "negative" not in edges[0]
+    assert edges[0]["context"] == ("air",)
+    assert edges[1:] == [rows[1]]
+    with pytest.raises(IndexError):
+        edges[2]
+    with pytest.raises(KeyError):
+        edges[0]["negative"]
+
+
+def test_columnar_row_changes():
+    rows = [{"name": "a", "amount": 1.0, "line_no": 1}, {"name": "b", "amount": 2.0, "line_no": 2}]
+    edges = ColumnarEdges(ColumnarStore(deepcopy(rows)), 0, 2)
+
+    edges[0]["amount"] = 4
+    edges[0]["name"] = "c"
+    edges[0]["line_no"] = 100_000
+    edges[1]["uncertainty type"] = 2
+    edges[1]["name"] = None
+    del edges[0]["line_no"]
+    edges[0].update({"loc": 0.5})
+    rows[0].update({"amount": 4, "name": "c", "loc": 0.5})
+    del rows[0]["line_no"]
+    rows[1].update({"uncertainty type": 2, "name": None})
+
+    assert edges == rows
+    assert edges[1] | {"extra": 1} == rows[1] | {"extra": 1}
+    assert deepcopy(edges[1]) == rows[1] and type(deepcopy(edges[1])) is dict
+    assert pickle.loads(pickle.dumps(edges)) == rows
@@ -1,6 +1,17 @@
+import csv
+import random
+
+import ftfy
 import pytest
 
-from bw_simapro_csv.csv_reader import BeKindRewind, clean
+from bw_simapro_csv.csv_reader import (
+    CONTROL_CHARACTERS,
+    UNDEFINED,
+    WARNING_CHARS,
+    BeKindRewind,
+    StringPool,
+    clean,
+)
 
 
 def test_rewindable_generator():
@@ -50,3 +61,108 @@ def test_clean():
     assert clean("Â\x8dg") == "Âg"
     assert clean("CO2\x1a") == "CO2"
     assert clean("CO2") == "CO\n2"
+
+
+def reference_clean(s: str) -> str:
+    """`clean` before the translation table and ASCII fast path were added"""
+    s = s.replace("\x7f", "\n")
+    s = UNDEFINED.sub("", s)
+    s = CONTROL_CHARACTERS.sub("", s)
+    if any(char in s for char in WARNING_CHARS):
+        s = ftfy.fix_text(s)
+    return s.strip()
+
+
+def test_clean_matches_reference_random():
+    alphabet = (
+        "ab Z09;.,-_()\t\n\r\x00\x01\x0b\x1a\x1f\x7f\x81\x8d\x8f\x90\x9d" + WARNING_CHARS + "éüß²µ"
+    )
+    rng = random.Random(42)
+    for _ in range(5000):
+        s = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        assert clean(s) == reference_clean(s), repr(s)
+
+
+def test_clean_matches_reference_fixtures(fixtures_dir):
+    for filepath in fixtures_dir.iterdir():
+        if filepath.suffix not in {".csv", ".txt"}:
+            continue
+        with open(filepath, encoding="sloppy-windows-1252") as f:
+            for line in csv.reader(f, delimiter=";"):
+                for elem in line:
+                    assert clean(elem) == reference_clean(elem)
+
+
+def test_rewindable_generator_cache():
+    a = iter([(" kg ", "Undefined", "0"), ("kg", "Undefined", "0"), (" kg ", "x" * 100, "0")])
+    r = BeKindRewind(a)
+    first, second, third = next(r), next(r), next(r)
+    assert first == second == ["kg", "Undefined", "0"]
+    assert first[0] is third[0]
+    assert first[1] is second[1]
+    assert " kg " in r.cache
+    assert "x" * 100 not in r.cache
+
+
+def test_rewindable_generator_string_pool():
+    name = "Electricity, medium voltage {RoW}| market for electricity | Cut-off, U"
+    pool = StringPool()
+    first = BeKindRewind(iter([[name + " ", "kg", "0,5"]]), pool=pool)
+    second = BeKindRewind(iter([[" " + name, "kg", "0,7"], ["kg", name, "0,5"]]), pool=pool)
+    a, b, c = next(first), next(second), next(second)
+    assert a[0] == b[0] == c[1] == name
+    assert a[0] is b[0] is c[1]
+    assert a[1] is b[1]
+    assert len(pool) == 2
+    # The second `kg` of `second` comes from its cache, and doesn't go through the pool
+    assert pool.hits == 3
+    assert "0,5" not in pool.strings
+
+
+def test_rewindable_generator_pool_hits_only_for_pooled_strings():
+    pool = StringPool()
+    r = BeKindRewind(iter([["0,5", "kg"], ["0,5", "kg"], ["0,5", "kg"]]), pool=pool)
+    next(r)
+    r.pooling = False
+    next(r)
+    next(r)
+    assert len(pool) == 1
+    assert pool.hits == 0
+
+
+def test_string_pool_bounded():
+    pool = StringPool(max_entries=1)
+    assert pool.intern("a") == "a"
+    assert pool.intern("b") == "b"
+    assert len(pool) == 1
+    assert pool.intern("a") == "a" and pool.hits == 1
+
+
+def test_string_pool_view():
+    pool = StringPool()
+    name = pool.intern("".join(["Carbon dioxide", ", fossil"]))
+    view = pool.view()
+    assert view.intern("Carbon dioxide, fossil") is name
+    assert view.intern("Methane") == "Methane"
+    assert len(pool) == len(view) == 1
+
+
+def test_rewindable_generator_pooling_paused():
+    pool = StringPool()
+    reader = BeKindRewind(iter([["kg"], ["Methane"]]), pool=pool)
+    next(reader)
+    reader.pooling = False
+    next(reader)
+    assert list(pool.strings) == ["kg"]
+
+
+def test_lazy_string_pool_only_global_blocks(fixtures_dir):
+    from bw_simapro_csv import SimaProCSV
+
+    spcsv = SimaProCSV(fixtures_dir / "process.csv", lazy=True)
+    assert "my product" not in spcsv.string_pool.strings
+    size = len(spcsv.string_pool)
+    assert size
+    list(spcsv)
+    list(spcsv)
+    assert len(spcsv.string_pool) == size
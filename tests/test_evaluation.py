@@ -0,0 +1,194 @@
+import pytest
+from bw2parameters import Interpreter, MissingName, ParameterSet
+from bw2parameters.errors import ParameterError, SelfReference
+
+from bw_simapro_csv import SimaProCSV
+from bw_simapro_csv.blocks import Process
+from bw_simapro_csv.evaluation import (
+    CompiledInterpreter,
+    ScopedInterpreter,
+    compile_formula,
+    evaluate_parameters,
+    get_interpreter,
+)
+
+
+@pytest.mark.parametrize(
+    "formula",
+    [
+        "(SP_A * SP_B) + 1.5",
+        "SP_A ** -2",
+        "((SP_A) if (SP_B > 2) else (0))",
+        "sqrt(SP_A) + abs(-SP_B) + log(10)",
+        "SP_A > 1 and SP_B < 10",
+    ],
+)
+def test_compiled_matches_asteval(formula):
+    symbols = {"SP_A": 4.0, "SP_B": 3}
+    reference = Interpreter()
+    reference.add_symbols(symbols)
+    assert CompiledInterpreter(symbols)(formula) == reference(formula)
+
+
+@pytest.mark.parametrize("formula", ["SP_MISSING * 2", "2 +* 3", " SP_A / 4"])
+def test_compiled_missing_name(formula):
+    with pytest.raises(MissingName):
+        CompiledInterpreter()(formula)
+
+
+@pytest.mark.parametrize(
+    "formula",
+    ["yield", "import os", "(lambda: 1)()", "SP_A.real", "__import__('os')", "'foo'", "[1, 2]", ""],
+)
+def test_compiled_not_supported(formula):
+    with pytest.raises(NotImplementedError):
+        CompiledInterpreter({"SP_A": 1})(formula)
+
+
+@pytest.mark.parametrize("formula", ["2**200000", "9**9**9", "SP_A ** (SP_A * 10001)"])
+def test_compiled_exponent_limit(formula):
+    symbols = {"SP_A": 1}
+    reference = Interpreter()
+    reference.add_symbols(symbols)
+    with pytest.raises(RuntimeError, match="max exponent is 10000"):
+        reference(formula)
+    with pytest.raises(RuntimeError, match="max exponent is 10000"):
+        CompiledInterpreter(symbols)(formula)
+
+
+def test_compiled_zero_division():
+    with pytest.raises(ZeroDivisionError):
+        CompiledInterpreter()("1 / 0")
+
+
+def test_compiled_formula_cache():
+    compile_formula.cache_clear()
+    CompiledInterpreter({"A": 1})("A + 1")
+    CompiledInterpreter({"A": 2})("A + 1")
+    assert compile_formula.cache_info().hits == 1
+
+
+def test_compiled_parameter_set():
+    params = {
+        "SP_C": {"formula": "SP_B * 2"},
+        "SP_B": {"formula": "SP_A + 1"},
+    }
+    ps = ParameterSet(params, {"SP_A": 1}, interpreter=CompiledInterpreter())
+    assert ps.order == ["SP_A", "SP_B", "SP_C"]
+    assert ps.evaluate() == {"SP_A": 1, "SP_B": 2, "SP_C": 4}
+
+
+@pytest.mark.parametrize("evaluator", ["asteval", "compiled"])
+def test_scoped_interpreter_local(evaluator):
+    interpreter = ScopedInterpreter({"SP_A": 1, "SP_B": 2}, evaluator=evaluator)
+    with interpreter.local({"SP_A": 10, "SP_C": 3}) as scope:
+        assert scope is interpreter
+        interpreter.add_symbols({"SP_D": 4})
+        assert interpreter("SP_A + SP_B + SP_C + SP_D") == 19
+    assert interpreter("SP_A + SP_B") == 3
+    assert "SP_C" not in interpreter.symtable
+    assert "SP_D" not in interpreter.symtable
+
+
+def test_scoped_interpreter_remove_local_symbol():
+    interpreter = ScopedInterpreter({"SP_A": 1})
+    with interpreter.local({"SP_B": 2}):
+        interpreter.add_symbols({"SP_C": 3})
+        interpreter.remove_symbols(["SP_B", "SP_C"])
+        assert "SP_B" not in interpreter.symtable
+        assert "SP_C" not in interpreter.symtable
+    assert interpreter.user_defined_symbols() == {"SP_A"}
+
+
+def test_scoped_interpreter_remove_global_symbol():
+    interpreter = ScopedInterpreter({"SP_A": 1, "SP_B": 2})
+    with interpreter.local({"SP_B": 20}):
+        interpreter.remove_symbols(["SP_A", "SP_B"])
+        assert "SP_A" not in interpreter.symtable
+        assert "SP_B" not in interpreter.symtable
+    assert interpreter.symtable["SP_A"] == 1
+    assert interpreter.symtable["SP_B"] == 2
+    with interpreter.local():
+        assert interpreter("SP_A + SP_B") == 3
+
+
+def test_scoped_interpreter_restores_after_error():
+    interpreter = ScopedInterpreter({"SP_A": 1})
+    with pytest.raises(MissingName):
+        with interpreter.local({"SP_A": 2}):
+            interpreter("SP_A + SP_MISSING")
+    assert interpreter.symtable["SP_A"] == 1
+
+
+def test_scoped_interpreter_parameter_set():
+    interpreter = ScopedInterpreter({"SP_A": 1})
+    params = {
+        "SP_C": {"formula": "SP_B * 2"},
+        "SP_B": {"formula": "SP_A + 1"},
+    }
+    with interpreter.local():
+        ps = ParameterSet(params, interpreter=interpreter)
+        assert ps.order == ["SP_B", "SP_C"]
+        assert ps.evaluate() == {"SP_B": 2, "SP_C": 4}
+        assert interpreter.get_unknown_symbols("SP_A + SP_C + SP_E") == {"SP_E"}
+    assert interpreter.user_defined_symbols() == {"SP_A"}
+
+
+@pytest.mark.parametrize("evaluator", ["asteval", "compiled"])
+def test_evaluate_parameters(evaluator):
+    interpreter = ScopedInterpreter({"SP_A": 1, "SP_B": 10}, evaluator=evaluator)
+    params = [
+        {"name": "SP_C", "formula": "SP_B + SP_D"},
+        {"name": "SP_B", "formula": "SP_A + 1"},
+        {"name": "SP_D", "formula": "SP_B * 2"},
+    ]
+    with interpreter.local():
+        evaluate_parameters(params, interpreter)
+        assert [o["amount"] for o in params] == [6, 2, 4]
+        assert interpreter("SP_C") == 6
+    assert interpreter.user_defined_symbols() == {"SP_A", "SP_B"}
+    assert interpreter("SP_B") == 10
+
+
+@pytest.mark.parametrize(
+    "params, error",
+    [
+        ([{"name": "SP_A", "formula": "SP_A + 1"}], SelfReference),
+        ([{"name": "SP_A", "formula": "SP_Z + 1"}], ParameterError),
+        (
+            [{"name": "SP_A", "formula": "SP_B + 1"}, {"name": "SP_B", "formula": "SP_A + 1"}],
+            ParameterError,
+        ),
+        ([{"name": "SP A", "formula": "1"}], ValueError),
+    ],
+)
+def test_evaluate_parameters_errors(params, error):
+    interpreter = ScopedInterpreter({"SP_X": 1})
+    with pytest.raises(error):
+        with interpreter.local():
+            evaluate_parameters(params, interpreter)
+    assert interpreter.user_defined_symbols() == {"SP_X"}
+
+
+def test_get_interpreter():
+    assert isinstance(get_interpreter(), Interpreter)
+    assert isinstance(get_interpreter("compiled"), CompiledInterpreter)
+    with pytest.raises(ValueError):
+        get_interpreter("foo")
+
+
+def test_evaluator_option_error(fixtures_dir):
+    with pytest.raises(ValueError):
+        SimaProCSV(fixtures_dir / "process.csv", evaluator="foo")
+
+
+@pytest.mark.parametrize("filename", ["process.csv", "project_params.csv", "allocation.csv"])
+def test_compiled_evaluator_same_result(fixtures_dir, filename):
+    default = SimaProCSV(fixtures_dir / filename)
+    compiled = SimaProCSV(fixtures_dir / filename, evaluator="compiled")
+    assert [b.parsed for b in default.blocks] == [b.parsed for b in compiled.blocks]
+    for a, b in zip(default.blocks, compiled.blocks):
+        if isinstance(a, Process):
+            assert {k: v.parsed for k, v in a.blocks.items()} == {
+                k: v.parsed for k, v in b.blocks.items()
+            }
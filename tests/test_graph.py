@@ -0,0 +1,144 @@
+import math
+from io import StringIO
+
+import pytest
+from bw2parameters.errors import ParameterError
+from stats_arrays import UndefinedUncertainty
+
+from bw_simapro_csv import SimaProCSV
+from bw_simapro_csv.graph import ExchangeNode, ParameterGraph, ParameterNode
+
+
+def test_parameter_graph_project_params(fixtures_dir):
+    spcsv = SimaProCSV(fixtures_dir / "project_params.csv")
+    graph = spcsv.parameter_graph
+    assert graph is spcsv.parameter_graph
+    parameter = ParameterNode(None, "SP_VARIABLE_NAME")
+    exchange = ExchangeNode(1, "Materials/fuels", 0, "formula")
+    assert graph.plan == [parameter, exchange]
+    assert graph.dependencies[exchange] == {parameter}
+    assert graph.objects[exchange]["name"] == "Watermelon"
+    assert graph.downstream([parameter]) == [exchange]
+    assert graph.downstream([exchange]) == []
+
+
+def test_parameter_graph_global_scopes(fixtures_dir):
+    spcsv = SimaProCSV(fixtures_dir / "process.csv")
+    graph = spcsv.parameter_graph
+    db_input = ParameterNode(None, "SP_DB_INPUT_PARAM")
+    assert set(graph.downstream([db_input])) == {
+        ParameterNode(None, "SP_DB_CALC_PARAM"),
+        ParameterNode(None, "SP_PROJ_CALC_PARAM"),
+    }
+
+
+def test_parameter_graph_plan_order(fixtures_dir):
+    for filename in ("process.csv", "project_params.csv", "waste.csv", "allocation.csv"):
+        graph = SimaProCSV(fixtures_dir / filename).parameter_graph
+        position = {node: index for index, node in enumerate(graph.plan)}
+        assert len(position) == len(graph)
+        for node, dependencies in graph.dependencies.items():
+            assert all(position[dependency] < position[node] for dependency in dependencies)
+
+
+def test_parameter_graph_local_shadows_global():
+    graph = ParameterGraph()
+    graph.scopes[3] = {}
+    graph.add_parameter(None, {"name": "SP_A", "amount": 1})
+    graph.add_parameter(3, {"name": "SP_A", "amount": 2})
+    graph.add_parameter(3, {"name": "SP_B", "formula": "SP_A * 2"})
+    graph.link()
+    graph.sort()
+    assert graph.dependencies[ParameterNode(3, "SP_B")] == {ParameterNode(3, "SP_A")}
+    assert graph.downstream([ParameterNode(None, "SP_A")]) == []
+
+
+def test_parameter_graph_circular():
+    graph = ParameterGraph()
+    graph.add_parameter(None, {"name": "SP_A", "formula": "SP_B + 1"})
+    graph.add_parameter(None, {"name": "SP_B", "formula": "SP_A + 1"})
+    graph.link()
+    with pytest.raises(ParameterError):
+        graph.sort()
+
+
+def test_parameter_graph_unknown_node(fixtures_dir):
+    graph = SimaProCSV(fixtures_dir / "process.csv").parameter_graph
+    with pytest.raises(KeyError):
+        graph.downstream([ParameterNode(None, "SP_MISSING")])
+
+
+def process_csv_with(fixtures_dir, old: str, new: str) -> StringIO:
+    text = (fixtures_dir / "process.csv").read_text(encoding="sloppy-windows-1252")
+    assert old in text
+    return StringIO(text.replace(old, new))
+
+
+def test_global_parameters_resolved_in_dependency_order(fixtures_dir):
+    # A database parameter which uses a project parameter
+    stream = process_csv_with(
+        fixtures_dir, "db_calc_param;db_input_param * 3", "db_calc_param;proj_calc_param + 1"
+    )
+    spcsv = SimaProCSV(stream)
+    assert spcsv.global_params["SP_PROJ_CALC_PARAM"] == 4
+    assert spcsv.global_params["SP_DB_CALC_PARAM"] == 5
+
+    spcsv.update_parameters({"db_input_param": 3})
+    assert spcsv.global_params["SP_DB_CALC_PARAM"] == 13
+
+
+def test_global_parameters_circular(fixtures_dir):
+    stream = process_csv_with(
+        fixtures_dir, "db_calc_param;db_input_param * 3", "db_calc_param;proj_calc_param + 1"
+    )
+    stream = StringIO(
+        stream.getvalue().replace(
+            "proj_calc_param;db_input_param *4", "proj_calc_param;db_calc_param * 4"
+        )
+    )
+    with pytest.raises(ParameterError):
+        SimaProCSV(stream)
+
+
+def test_update_parameters(fixtures_dir):
+    spcsv = SimaProCSV(fixtures_dir / "process.csv")
+    graph = spcsv.parameter_graph
+    changed = spcsv.update_parameters({"db_input_param": 2})
+    assert changed == [
+        ParameterNode(None, "SP_DB_CALC_PARAM"),
+        ParameterNode(None, "SP_PROJ_CALC_PARAM"),
+    ]
+    assert graph.objects[ParameterNode(None, "SP_DB_CALC_PARAM")]["amount"] == 6
+    assert graph.objects[ParameterNode(None, "SP_PROJ_CALC_PARAM")]["amount"] == 8
+    parameter = graph.objects[ParameterNode(None, "SP_DB_INPUT_PARAM")]
+    assert parameter["amount"] == 2
+    assert parameter["loc"] == pytest.approx(math.log(2))
+    assert spcsv.global_params["SP_DB_CALC_PARAM"] == 6
+
+
+def test_update_parameters_exchanges(fixtures_dir):
+    spcsv = SimaProCSV(fixtures_dir / "project_params.csv")
+    exchange = spcsv.parameter_graph.objects[ExchangeNode(1, "Materials/fuels", 0, "formula")]
+    others = [
+        obj
+        for block in spcsv.blocks[1].blocks.values()
+        for obj in getattr(block, "parsed", [])
+        if isinstance(obj, dict) and obj is not exchange
+    ]
+    untouched = [dict(obj) for obj in others]
+    amount = exchange["amount"]
+    assert spcsv.update_parameters({"SP_VARIABLE_NAME": 3}) == [
+        ExchangeNode(1, "Materials/fuels", 0, "formula")
+    ]
+    assert exchange["amount"] == pytest.approx(amount * 3)
+    assert exchange["uncertainty type"] == UndefinedUncertainty.id
+    assert exchange["loc"] == exchange["amount"]
+    assert others == untouched
+
+
+def test_update_parameters_errors(fixtures_dir):
+    spcsv = SimaProCSV(fixtures_dir / "process.csv")
+    with pytest.raises(KeyError):
+        spcsv.update_parameters({"missing": 1})
+    with pytest.raises(ValueError):
+        spcsv.update_parameters({"db_calc_param": 1})
@@ -0,0 +1,125 @@
+import shutil
+
+import pytest
+
+from bw_simapro_csv import SimaProCSV
+from bw_simapro_csv.blocks import EmptyBlock, Process
+from bw_simapro_csv.index import index_filepath
+
+
+@pytest.fixture
+def allocation_copy(fixtures_dir, tmp_path):
+    # Index sidecar files are written next to the source file
+    filepath = tmp_path / "allocation.csv"
+    shutil.copy(fixtures_dir / "allocation.csv", filepath)
+    return filepath
+
+
+def test_block_index_entries(allocation_copy):
+    indexed = SimaProCSV.open_indexed(allocation_copy)
+
+    entries = indexed.block_index["blocks"]
+    assert [entry["type"] for entry in entries] == ["Process", "Process", "System description"]
+    assert [entry["identifier"] for entry in entries[:2]] == [
+        "ReCenter000033915300046",
+        "ReCenter000033915302504",
+    ]
+    # Empty `Process name` values aren't stored
+    assert not any("name" in entry for entry in entries)
+    assert index_filepath(allocation_copy).is_file()
+
+
+def test_block_index_process_name(fixtures_dir, tmp_path):
+    filepath = tmp_path / "process.csv"
+    shutil.copy(fixtures_dir / "process.csv", filepath)
+    indexed = SimaProCSV.open_indexed(filepath)
+
+    entry = indexed.block_index["blocks"][0]
+    assert entry["identifier"] == "DefaultX25250700002"
+    assert entry["name"] == "Test process"
+
+
+def test_block_index_offsets(allocation_copy):
+    indexed = SimaProCSV.open_indexed(allocation_copy)
+    raw = allocation_copy.read_bytes()
+    for entry in indexed.block_index["blocks"]:
+        assert raw[entry["offset"] :].startswith(entry["type"].encode("utf-8"))
+        assert len(raw[: entry["offset"]].splitlines()) + 1 == entry["line_no"]
+
+
+def test_get_process(allocation_copy, block_data):
+    eager = SimaProCSV(allocation_copy)
+    indexed = SimaProCSV.open_indexed(allocation_copy)
+    expected = [block for block in eager.blocks if isinstance(block, Process)]
+
+    assert block_data([indexed.get_process("ReCenter000033915302504")]) == block_data(expected[1:])
+    assert block_data([indexed.get_process("ReCenter000033915300046")]) == block_data(expected[:1])
+    with pytest.raises(KeyError):
+        indexed.get_process("missing")
+
+
+def test_indexed_iteration_matches_eager(allocation_copy, block_data):
+    eager = SimaProCSV(allocation_copy)
+    indexed = SimaProCSV.open_indexed(allocation_copy)
+
+    assert not any(isinstance(block, Process) for block in indexed.blocks)
+    assert block_data(indexed) == block_data(eager.blocks)
+    assert indexed.global_params == eager.global_params
+
+
+@pytest.mark.parametrize(
+    "filename",
+    [
+        "allocation.csv",
+        "cas_missing_check_number.csv",
+        "damagecategory.txt",
+        "external_documents_and_literature_references.csv",
+        "header.csv",
+        "header_translations.csv",
+        "inventory.csv",
+        "method_end.csv",
+        "minimal_header.csv",
+        "process.csv",
+        "process_identifiers.csv",
+        "process_with_invalid_lognormal_scale.csv",
+        "project_params.csv",
+        "python_builtin_as_unit_name.csv",
+        "stages.csv",
+        "waste.csv",
+        "waste_scenario.csv",
+        "weird_units.csv",
+    ],
+)
+def test_block_index_boundaries_match_eager(fixtures_dir, tmp_path, filename):
+    # `build_block_index` has its own copy of the block boundary rules of `get_next_block`
+    filepath = tmp_path / filename
+    shutil.copy(fixtures_dir / filename, filepath)
+    eager = SimaProCSV(filepath)
+    indexed = SimaProCSV.open_indexed(filepath)
+
+    # Blocks without any rows aren't kept by the eager reader
+    given = [
+        entry["line_no"]
+        for entry in indexed.block_index["blocks"]
+        if indexed.read_block(entry) is not EmptyBlock
+    ]
+    assert given == eager._block_line_nos
+
+
+def test_block_index_reused_and_rebuilt(allocation_copy):
+    SimaProCSV.open_indexed(allocation_copy)
+    sidecar = index_filepath(allocation_copy)
+    sidecar.write_text(sidecar.read_text().replace("ReCenter000033915302504", "cached"))
+
+    assert SimaProCSV.open_indexed(allocation_copy).get_process("cached")
+
+    with open(allocation_copy, "a") as f:
+        f.write("\n")
+    assert SimaProCSV.open_indexed(allocation_copy).get_process("ReCenter000033915302504")
+
+
+def test_indexed_requires_path(fixtures_dir):
+    from io import StringIO
+
+    with pytest.raises(ValueError):
+        SimaProCSV(StringIO((fixtures_dir / "allocation.csv").read_text()), indexed=True)
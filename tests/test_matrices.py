@@ -0,0 +1,150 @@
+import json
+
+import numpy as np
+import pytest
+
+from bw_simapro_csv import SimaProCSV
+
+pytest.importorskip("scipy")
+
+from bw_simapro_csv.matrices import (
+    allocation_factors,
+    characterization_factors,
+    demand_vector,
+    inventory,
+)
+
+EMISSION = (("Emissions to air", "low. pop."), "(+-)-Citronellol", "kg", "26489-01-0")
+
+
+def test_inventory_matrices_allocation(fixtures_dir):
+    matrices = SimaProCSV(fixtures_dir / "allocation.csv").to_matrices()
+    assert [(a["process"], a["allocation_factor"]) for a in matrices.activities] == [
+        ("ReCenter000033915300046", 1.0),
+        ("ReCenter000033915302504", pytest.approx(0.958)),
+        ("ReCenter000033915302504", pytest.approx(0.042)),
+    ]
+    assert matrices.technosphere.shape == (3, 3)
+    assert np.allclose(matrices.technosphere.toarray()[:, 0], [1, -0.388, -0.771])
+    assert np.allclose(matrices.technosphere.diagonal(), [1, 6250, 3125])
+    assert matrices.unlinked == {}
+
+
+def test_inventory_matrices_biosphere(fixtures_dir):
+    matrices = SimaProCSV(fixtures_dir / "process.csv").to_matrices()
+    assert matrices.technosphere.toarray().tolist() == [[0.5]]
+    assert matrices.biosphere.shape == (8, 1)
+    assert matrices.biosphere[matrices.flows.index(EMISSION), 0] == 1.0
+    assert matrices.unlinked == {
+        "Soy oil, refined, at plant/kg/RNA": 1,
+        "Electricity, biomass, at power plant/US": 1,
+        "Wool, at field/US": 1,
+        "Dummy, Disposal, msw, to sanitary landfill/kg/GLO": 1,
+    }
+    result = inventory(matrices, demand_vector(matrices, "my product"))
+    assert result[matrices.flows.index(EMISSION)] == 2.0
+    with pytest.raises(KeyError):
+        demand_vector(matrices, "missing")
+
+
+def test_inventory_matrices_waste_treatment(fixtures_dir):
+    matrices = SimaProCSV(fixtures_dir / "waste.csv").to_matrices()
+    assert matrices.technosphere[0, 0] < 0
+
+
+def test_inventory_matrices_lazy(fixtures_dir):
+    eager = SimaProCSV(fixtures_dir / "allocation.csv").to_matrices()
+    lazy = SimaProCSV(fixtures_dir / "allocation.csv", lazy=True).to_matrices()
+    assert lazy.activities == eager.activities
+    assert (lazy.technosphere != eager.technosphere).nnz == 0
+
+
+def test_inventory_matrices_save(fixtures_dir, tmp_path):
+    from scipy import sparse
+
+    matrices = SimaProCSV(fixtures_dir / "process.csv").to_matrices()
+    matrices.save(tmp_path / "out")
+    assert (sparse.load_npz(tmp_path / "out" / "biosphere.npz") != matrices.biosphere).nnz == 0
+    index = json.loads((tmp_path / "out" / "index.json").read_text(encoding="utf-8"))
+    assert index["activities"] == matrices.activities
+    assert len(index["flows"]) == 8
+
+
+def test_allocation_factors():
+    assert allocation_factors("Products", [{"allocation": 30}]) == [1.0]
+    assert allocation_factors("Products", [{"allocation": 30}, {"allocation": 10}]) == [0.75, 0.25]
+    assert allocation_factors("Products", [{}, {}]) == [0.5, 0.5]
+    assert allocation_factors("Waste treatment", [{}, {}, {}, {}]) == [0.25] * 4
+
+
+def test_to_matrices_stages_error(fixtures_dir):
+    with pytest.raises(TypeError):
+        SimaProCSV(fixtures_dir / "stages.csv").to_matrices()
+
+
+def test_method_matrices_weighting(fixtures_dir):
+    (method,) = SimaProCSV(fixtures_dir / "method_end.csv").to_matrices()
+    assert method.name == "some method"
+    assert method.impact_categories == [{"name": "Noise", "unit": "UBP"}]
+    assert method.flows[0] == (
+        ("Non material emissions", ""),
+        "Noise, aircraft, freight",
+        "tkm",
+        None,
+    )
+    assert method.characterization.toarray().tolist() == [[1, 2, 3, 4, 5, 6]]
+    assert method.damage is None
+    assert list(method.normalization_weighting) == ["ws 1", "ws 2"]
+    assert method.normalization_weighting["ws 1"]["normalized"] is None
+    assert method.normalization_weighting["ws 1"]["weighted"].toarray().tolist() == [
+        [1, 2, 3, 4, 5, 6]
+    ]
+
+
+def test_method_matrices_damage(fixtures_dir):
+    (method,) = SimaProCSV(fixtures_dir / "damagecategory.txt").to_matrices()
+    assert [obj["name"] for obj in method.damage_categories] == [
+        "NORM - Human Health",
+        "NORM - Ecosystems",
+    ]
+    assert method.characterization.shape == (4, len(method.flows))
+    assert method.damage.shape == (2, len(method.flows))
+    characterization = method.characterization.toarray()
+    assert np.allclose(method.damage.toarray()[0], 1.51 * characterization[0])
+    assert np.allclose(method.damage.toarray()[1], 0.5 * characterization[1:].sum(axis=0))
+
+
+def test_method_matrices_aligned(fixtures_dir):
+    flows = [
+        (("Emissions to soil", ""), "Lead-210", "kBq", None),
+        (("Emissions to air", "urban"), "Lead-210", "kBq", None),
+        (("Emissions to water", ""), "Lead-210", "Bq", None),
+    ]
+    (method,) = SimaProCSV(fixtures_dir / "damagecategory.txt").to_matrices(flows=flows)
+    assert method.flows == flows
+    assert method.characterization.shape == (4, 3)
+    assert method.characterization[:, 1].toarray().ravel().tolist() == [
+        1.28e-06,
+        1.71e-03,
+        pytest.approx(0.0112e3),
+        6.57e-02,
+    ]
+    assert method.characterization[:, [0, 2]].nnz == 0
+
+    inventory = np.array([0, 2, 1])
+    assert np.allclose(method.damage @ inventory, 2 * method.damage[:, 1].toarray().ravel())
+
+
+def test_characterization_factors():
+    cfs = [
+        {"context": ("Air", "(unspecified)"), "name": "a", "unit": "kg", "factor": 1},
+        {"context": ("Air", "urban"), "name": "a", "unit": "kg", "factor": 2},
+        {"context": ("Raw", ""), "name": "b", "unit": "kg", "cas_number": "50-00-0", "factor": 3},
+    ]
+    flows = [
+        (("Emissions to air", "rural"), "a", "kg", None),
+        (("Emissions to air", "urban"), "a", "kg", None),
+        (("Resources", ""), "b", "kg", None),
+        (("Resources", ""), "b", "m3", None),
+    ]
+    assert characterization_factors(cfs, flows) == {0: 1, 1: 2, 2: 3}
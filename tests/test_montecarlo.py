@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+from bw2parameters.errors import ParameterError
+
+from bw_simapro_csv import SimaProCSV
+from bw_simapro_csv.blocks import Process
+from bw_simapro_csv.montecarlo import evaluate_vectorized, evaluation_order
+from bw_simapro_csv.uncertainty import as_stats_arrays_dict, has_uncertainty
+
+
+def exchanges(spcsv):
+    return [
+        obj
+        for process in spcsv.blocks
+        if isinstance(process, Process)
+        for block in process.blocks.values()
+        if getattr(block, "has_formula", None)
+        for obj in block.parsed
+    ]
+
+
+def test_sample_exchanges_shape(fixtures_dir):
+    spcsv = SimaProCSV(fixtures_dir / "process.csv")
+    array, index = spcsv.sample_exchanges(iterations=50, seed=1)
+    assert array.shape == (13, 50)
+    assert len(index) == 13
+    assert index[0] == {
+        "process": "DefaultX25250700002",
+        "block": "Products",
+        "name": "my product",
+        "line_no": 93,
+    }
+
+
+def test_sample_exchanges_seed(fixtures_dir):
+    spcsv = SimaProCSV(fixtures_dir / "project_params.csv")
+    first, _ = spcsv.sample_exchanges(iterations=20, seed=42)
+    second, _ = spcsv.sample_exchanges(iterations=20, seed=42)
+    assert np.array_equal(first, second)
+
+
+def test_sample_exchanges_deterministic_values(fixtures_dir):
+    spcsv = SimaProCSV(fixtures_dir / "process.csv")
+    array, _ = spcsv.sample_exchanges(iterations=10, seed=1)
+    for obj, row in zip(exchanges(spcsv), array):
+        if not has_uncertainty(obj):
+            assert np.allclose(row, obj["amount"])
+        else:
+            assert row.std() > 0
+
+
+def test_sample_exchanges_formulas(fixtures_dir):
+    spcsv = SimaProCSV(fixtures_dir / "project_params.csv")
+    (parameter,) = [
+        obj
+        for block in spcsv.blocks
+        for obj in getattr(block, "parsed", [])
+        if isinstance(obj, dict) and obj.get("name") == "SP_VARIABLE_NAME"
+    ]
+    parameter.update({"uncertainty type": 2, "loc": 0.0, "scale": 0.5})
+    array, _ = spcsv.sample_exchanges(iterations=5000, seed=1)
+    for obj, row in zip(exchanges(spcsv), array):
+        if obj.get("formula"):
+            assert np.median(row) == pytest.approx(obj["amount"], rel=0.05)
+            assert row.std() > 0
+        else:
+            assert np.allclose(row, obj["amount"])
+
+
+def test_evaluate_vectorized_conditionals():
+    symbols = {"SP_A": np.array([1.0, 2.0, 3.0]), "SP_B": 2}
+    expected = [0, 4, 6]
+    assert np.array_equal(
+        evaluate_vectorized("((SP_A * SP_B) if (SP_A > 1) else (0))", symbols, 3), expected
+    )
+    assert np.array_equal(
+        evaluate_vectorized("(SP_A * SP_B) * (1 < SP_A <= 3 and not SP_B > 5)", symbols, 3),
+        expected,
+    )
+    assert np.array_equal(evaluate_vectorized("max(SP_A, SP_B)", symbols, 3), [2, 2, 3])
+
+
+def test_evaluate_vectorized_broadcasts_constants():
+    assert np.array_equal(evaluate_vectorized("2 * 3", {}, 4), [6, 6, 6, 6])
+
+
+def test_evaluation_order():
+    params = [
+        {"name": "SP_C", "formula": "SP_B + SP_GLOBAL"},
+        {"name": "SP_B", "formula": "SP_A * 2"},
+        {"name": "SP_A", "formula": "1"},
+    ]
+    assert [obj["name"] for obj in evaluation_order(params)] == ["SP_A", "SP_B", "SP_C"]
+
+
+def test_evaluation_order_circular():
+    params = [{"name": "SP_A", "formula": "SP_B"}, {"name": "SP_B", "formula": "SP_A"}]
+    with pytest.raises(ParameterError):
+        evaluation_order(params)
+
+
+def test_as_stats_arrays_dict():
+    assert as_stats_arrays_dict({"uncertainty type": 0, "loc": 1.0, "amount": 2.0}) == {
+        "uncertainty_type": 0,
+        "loc": 2.0,
+        "negative": False,
+    }
+    assert as_stats_arrays_dict(
+        {"uncertainty type": 4, "loc": 1.0, "minimum": 0.5, "maximum": 2.0, "amount": 1.0}
+    ) == {"uncertainty_type": 4, "loc": 1.0, "minimum": 0.5, "maximum": 2.0, "negative": False}
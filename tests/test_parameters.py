@@ -1,4 +1,18 @@
-from bw_simapro_csv.parameters import compile_iff_re, fix_iff_formula, fix_leading_zero_formula
+import ast
+import random
+
+import pytest
+from astunparse import unparse
+
+from bw_simapro_csv.parameters import (
+    FormulaSubstitutor,
+    OnlySelectedUppercase,
+    compile_iff_re,
+    fix_iff_formula,
+    fix_leading_zero_formula,
+    rewrite_arithmetic_formula,
+    substitute_names,
+)
 from bw_simapro_csv.utils import normalize_number_in_formula
 
 
@@ -85,3 +99,73 @@ def test_leading_zero_formula():
         assert fix_leading_zero_formula(g) == e
     for g, e in zip(given, expected):
         assert fix_leading_zero_formula("foo " + g) == "foo " + e
+
+
+def ast_substitution(formula: str, substitutions: dict) -> str:
+    parsed = ast.parse(formula)
+    OnlySelectedUppercase(substitutions).visit(parsed)
+    return unparse(parsed).strip()
+
+
+@pytest.mark.parametrize(
+    "formula",
+    [
+        "a",
+        "(a)",
+        "4.8*foo/(7*0.9-3)",
+        "-a**-2",
+        "a ** b ** 2",
+        "a-b-c",
+        "a/b*c",
+        "+1.50 - -.5e3",
+        "2e3*(foo+1)",
+        "1000000000000000000000*a",
+    ],
+)
+def test_rewrite_arithmetic_formula_matches_ast(formula):
+    substitutions = {"A": "SP_A", "FOO": "SP_FOO"}
+    assert rewrite_arithmetic_formula(formula, substitutions) == ast_substitution(
+        formula, substitutions
+    )
+
+
+@pytest.mark.parametrize(
+    "formula",
+    ["", " a", "a // 2", "a > 1", "007", "1e400", "a b", "(a", "a)", "2a", "None", "µ * 2"],
+)
+def test_rewrite_arithmetic_formula_falls_back(formula):
+    assert rewrite_arithmetic_formula(formula, {}) is None
+
+
+def test_formula_substitutor_matches_ast_random():
+    substitutions = {"A": "SP_A", "FOO": "SP_FOO"}
+    atoms = ["a", "foo", "b_2", "1", "1.50", ".5", "2e3", "0", "x"]
+    rng = random.Random(42)
+
+    def formula(depth=0):
+        choice = rng.random()
+        if depth > 3 or choice < 0.3:
+            return rng.choice(atoms)
+        if choice < 0.45:
+            return rng.choice(["-", "+"]) + formula(depth + 1)
+        if choice < 0.6:
+            return "(" + formula(depth + 1) + ")"
+        return formula(depth + 1) + rng.choice(["+", " - ", "*", " / ", "**"]) + formula(depth + 1)
+
+    for _ in range(2000):
+        given = formula()
+        assert FormulaSubstitutor(substitutions)(given) == ast_substitution(given, substitutions)
+
+
+def test_formula_substitutor_cache_key_uses_relevant_substitutions():
+    substitute_names.cache_clear()
+    FormulaSubstitutor({"A": "SP_A", "B": "SP_B"})("a * c")
+    assert FormulaSubstitutor({"A": "SP_A", "D": "SP_D"})("a * c") == "(SP_A * C)"
+    assert substitute_names.cache_info().hits == 1
+    assert FormulaSubstitutor({"A": "DB_A"})("a * c") == "(DB_A * C)"
+    assert substitute_names.cache_info().misses == 2
+
+
+def test_formula_substitutor_syntax_error():
+    with pytest.raises(SyntaxError):
+        FormulaSubstitutor({})("a +* (")
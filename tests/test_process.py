@@ -1,6 +1,8 @@
 import pytest
 
+from bw_simapro_csv import SimaProCSV
 from bw_simapro_csv.blocks import GenericBiosphere, Process
+from bw_simapro_csv.blocks.generic_biosphere import build_flow_index
 from bw_simapro_csv.errors import WasteModelMismatch
 
 
@@ -56,6 +58,64 @@ def test_supplement_biosphere_edges():
     assert p.blocks["Emissions to air"].parsed == expected
 
 
+def test_supplement_biosphere_edges_flow_index():
+    class O:
+        pass
+
+    class P(Process):
+        def __init__(self):
+            pass
+
+    o = O()
+    o.parsed = [{"name": "first"}, {"name": "second", "comment": "already here"}]
+    p = P()
+    p.blocks = {"Resources": o}
+    flow_index = {
+        ("Resources", "first"): {"name": "first", "cas_number": "7732-18-5"},
+        ("Resources", "second"): {"name": "second", "comment": "this"},
+        ("Emissions to air", "first"): {"name": "first", "comment": "wrong context"},
+    }
+    p.supplement_biosphere_edges(flow_index=flow_index)
+    assert o.parsed == [
+        {"name": "first", "cas_number": "7732-18-5"},
+        {"name": "second", "comment": "already here ⧺ this"},
+    ]
+
+
+def test_build_flow_index():
+    class B(GenericBiosphere):
+        def __init__(self, category, parsed):
+            self.category = category
+            self.parsed = parsed
+
+    blocks = [
+        B("Airborne emissions", [{"name": "a", "cas_number": "1", "comment": "first"}]),
+        B("Raw materials", [{"name": "a", "cas_number": None, "comment": ""}]),
+        B("Unknown", [{"name": "b", "comment": "ignored"}]),
+        B(
+            "Airborne emissions",
+            [
+                {"name": "a", "cas_number": None, "comment": "second"},
+                {"name": "c", "comment": "overwritten"},
+                {"name": "c", "comment": "last"},
+            ],
+        ),
+    ]
+    assert build_flow_index(blocks) == {
+        ("Emissions to air", "a"): {"name": "a", "cas_number": "1", "comment": "first ⧺ second"},
+        ("Resources", "a"): {"name": "a", "cas_number": None, "comment": ""},
+        ("Emissions to air", "c"): {"name": "c", "comment": "last"},
+    }
+    # Source objects aren't changed
+    assert blocks[0].parsed[0]["comment"] == "first"
+
+
+def test_flow_index(fixtures_dir):
+    spcsv = SimaProCSV(fixtures_dir / "process.csv")
+    assert spcsv.flow_index is spcsv.flow_index
+    assert spcsv.flow_index[("Emissions to air", "(+-)-Citronellol")]["cas_number"] == "26489-01-0"
+
+
 def test_check_waste_production_model_consistency_products():
     class O:
         pass
@@ -0,0 +1,68 @@
+import json
+import tracemalloc
+
+from bw_simapro_csv import SimaProCSV
+from bw_simapro_csv.profiling import NullProfiler, Profiler
+
+
+def test_profile_disabled_by_default(fixtures_dir):
+    sp = SimaProCSV(fixtures_dir / "allocation.csv")
+    assert isinstance(sp.profiler, NullProfiler)
+    assert sp.timings is None
+
+
+def test_profile_stages_and_blocks(fixtures_dir):
+    sp = SimaProCSV(fixtures_dir / "allocation.csv", profile=True)
+    sp.to_brightway()
+    timings = sp.timings
+    assert list(timings["stages"]) == [
+        "header",
+        "read_blocks",
+        "resolve_parameters",
+        "normalize_units",
+        "to_brightway",
+    ]
+    for record in timings["stages"].values():
+        assert record["calls"] == 1
+        assert record["wall_time"] >= 0
+        assert record["cpu_time"] >= 0
+    assert timings["stages"]["read_blocks"]["items"] == len(sp.blocks)
+    assert timings["stages"]["read_blocks"]["pooled_strings"] > 0
+    # A single reader gets repeated cells from its own cache, not from the pool
+    assert timings["stages"]["read_blocks"]["reused_strings"] == 0
+    assert timings["stages"]["resolve_parameters"]["items"] == 2
+    assert timings["stages"]["to_brightway"]["items"] == 4
+    assert timings["blocks"]["Process"]["count"] == 2
+    assert timings["blocks"]["Process"]["lines"] > 0
+
+
+def test_profile_accumulates_stage_calls():
+    profiler = Profiler()
+    for _ in range(3):
+        with profiler.stage("foo") as stage:
+            stage["items"] = 2
+            stage["other"] = 1
+    assert profiler.stages["foo"]["calls"] == 3
+    assert profiler.stages["foo"]["items"] == 6
+    assert profiler.stages["foo"]["other"] == 3
+    assert profiler.stages["foo"]["tracemalloc_peak"] is None
+
+
+def test_profile_tracemalloc_peak():
+    profiler = Profiler()
+    tracemalloc.start()
+    try:
+        with profiler.stage("foo"):
+            data = [0] * 100_000
+        del data
+    finally:
+        tracemalloc.stop()
+    assert profiler.stages["foo"]["tracemalloc_peak"] >= 800_000
+
+
+def test_profile_to_json(fixtures_dir, tmp_path):
+    sp = SimaProCSV(fixtures_dir / "allocation.csv", profile=True)
+    assert json.loads(sp.profiler.to_json())["stages"]["header"]["calls"] == 1
+    assert sp.profiler.to_json(tmp_path / "timings.json") == tmp_path / "timings.json"
+    with open(tmp_path / "timings.json") as f:
+        assert json.load(f) == sp.timings
@@ -0,0 +1,113 @@
+import pickle
+from copy import copy, deepcopy
+
+import pytest
+
+from bw_simapro_csv import SimaProCSV
+from bw_simapro_csv.blocks import DatabaseInputParameters, Process, TechnosphereEdges
+from bw_simapro_csv.records import Exchange, Parameter, Record
+
+
+def rows(spcsv):
+    return [
+        (label, block.parsed)
+        for process in spcsv.iter_blocks()
+        if isinstance(process, Process)
+        for label, block in process.blocks.items()
+        if isinstance(block.parsed, list)
+    ]
+
+
+@pytest.mark.parametrize("filename", ["process.csv", "project_params.csv", "waste_scenario.csv"])
+def test_records_match_dict_storage(fixtures_dir, filename):
+    expected = SimaProCSV(fixtures_dir / filename)
+    given = SimaProCSV(fixtures_dir / filename, storage="records")
+    assert rows(given) == rows(expected)
+    for process in filter(lambda b: isinstance(b, Process), given.blocks):
+        for label, block in process.blocks.items():
+            if label in ("Input parameters", "Calculated parameters"):
+                assert all(isinstance(obj, Parameter) for obj in block.parsed)
+            elif getattr(block, "has_formula", None):
+                assert all(isinstance(obj, Exchange) for obj in block.parsed)
+
+
+def test_records_created_by_parser():
+    block = TechnosphereEdges(
+        [(3, ["Steel", "kg", "2", "Lognormal", "1,1", "0", "0", "comment"])],
+        {"decimal_separator": "."},
+        "Materials/fuels",
+        records=True,
+    )
+    (edge,) = block.parsed
+    assert type(edge) is Exchange and edge.amount == 2 and edge.field1 == "1,1"
+    assert not hasattr(edge, "_extra")
+
+
+def test_records_no_extra_keys_after_resolving(fixtures_dir):
+    spcsv = SimaProCSV(fixtures_dir / "process.csv", storage="records")
+    edges = [obj for _, parsed in rows(spcsv) for obj in parsed if isinstance(obj, Exchange)]
+    assert edges and not any(hasattr(obj, "_extra") for obj in edges)
+    assert not any("field1" in obj for obj in edges)
+
+
+def test_records_global_parameters(fixtures_dir):
+    spcsv = SimaProCSV(fixtures_dir / "process.csv", storage="records")
+    block = next(b for b in spcsv.blocks if isinstance(b, DatabaseInputParameters))
+    assert block.parsed and all(isinstance(obj, Parameter) for obj in block.parsed)
+
+
+def test_records_lazy(fixtures_dir):
+    expected = SimaProCSV(fixtures_dir / "process.csv")
+    given = SimaProCSV(fixtures_dir / "process.csv", lazy=True, storage="records")
+    assert rows(given) == rows(expected)
+
+
+def test_records_to_brightway(fixtures_dir):
+    data = SimaProCSV(fixtures_dir / "project_params.csv", storage="records").to_brightway()
+    exchanges = [exc for process in data["processes"] for exc in process["exchanges"]]
+    assert exchanges and all(type(exc) is dict for exc in exchanges)
+    assert all(type(param) is dict for param in data["database_parameters"])
+
+
+def test_records_update_parameters(fixtures_dir):
+    expected = SimaProCSV(fixtures_dir / "project_params.csv")
+    given = SimaProCSV(fixtures_dir / "project_params.csv", storage="records")
+    changed = given.update_parameters({"SP_VARIABLE_NAME": 3})
+    assert changed and changed == expected.update_parameters({"SP_VARIABLE_NAME": 3})
+    assert rows(given) == rows(expected)
+
+
+def test_record_mapping_protocol():
+    data = {"name": "a", "amount": 2.0, "uncertainty type": 0, "line_no": 7, "other": "x"}
+    record = Exchange(data)
+    assert record == data and data == record
+    assert record.amount == 2.0 and record.uncertainty_type == 0
+    assert "unit" not in record and "other" in record
+    assert record.get("unit") is None
+    assert len(record) == 5
+    assert record.to_dict() == data and type(record.to_dict()) is dict
+    assert record | {"type": "biosphere"} == data | {"type": "biosphere"}
+    assert {"type": "biosphere"} | record == data | {"type": "biosphere"}
+    with pytest.raises(KeyError):
+        record["unit"]
+    with pytest.raises(AttributeError):
+        record.unit
+
+    record["unit"] = "kg"
+    del record["line_no"]
+    del record["other"]
+    assert not hasattr(record, "_extra")
+    with pytest.raises(KeyError):
+        del record["line_no"]
+    assert record == {"name": "a", "amount": 2.0, "uncertainty type": 0, "unit": "kg"}
+
+    assert not hasattr(record, "__dict__")
+    for other in (copy(record), deepcopy(record), pickle.loads(pickle.dumps(record))):
+        assert type(other) is Exchange and other == record and other is not record
+
+
+def test_record_extra_keys_only_when_needed():
+    record = Parameter({"name": "a", "amount": 1})
+    assert not hasattr(record, "_extra")
+    assert isinstance(record, Record)
+    assert repr(record) == "Parameter({'name': 'a', 'amount': 1})"
@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+from bw_simapro_csv import SimaProCSV
+from bw_simapro_csv.sqlite import INDEXES, TABLES
+
+
+def rows(filepath, query: str) -> list:
+    connection = sqlite3.connect(filepath)
+    try:
+        return connection.execute(query).fetchall()
+    finally:
+        connection.close()
+
+
+def test_to_sqlite_processes(fixtures_dir, tmp_path):
+    filepath = tmp_path / "out.sqlite"
+    assert SimaProCSV(fixtures_dir / "process.csv").to_sqlite(filepath) == filepath
+
+    assert rows(filepath, "SELECT identifier, name, geography FROM processes") == [
+        ("DefaultX25250700002", "Test process", "Mixed data")
+    ]
+    assert rows(filepath, "SELECT COUNT(*) FROM exchanges") == [(13,)]
+    assert rows(
+        filepath,
+        "SELECT compartment, subcompartment, cas_number, amount, uncertainty_type "
+        "FROM exchanges WHERE name = '(+-)-Citronellol'",
+    ) == [("Emissions to air", "low. pop.", "26489-01-0", 1.0, 2)]
+    assert rows(
+        filepath,
+        "SELECT e.amount, p.identifier FROM exchanges e JOIN processes p ON e.process_id = p.id "
+        "WHERE e.block = 'Products'",
+    ) == [(0.5, "DefaultX25250700002")]
+    assert rows(
+        filepath, "SELECT scope, kind, name, process_id FROM parameters ORDER BY line_no"
+    ) == [
+        ("process", "input", "SP_INPUT_PARAM", 1),
+        ("process", "calculated", "SP_CALC_PARAM", 1),
+        ("database", "input", "SP_DB_INPUT_PARAM", None),
+        ("database", "calculated", "SP_DB_CALC_PARAM", None),
+        ("project", "input", "SP_PROJ_INPUT_PARAM", None),
+        ("project", "calculated", "SP_PROJ_CALC_PARAM", None),
+    ]
+    assert rows(filepath, "SELECT context FROM flows WHERE name = 'Acids'") == [("Resources",)]
+    assert rows(filepath, "SELECT conversion, reference_unit FROM units WHERE name = 'g'") == [
+        (0.001, "kg")
+    ]
+    assert rows(filepath, "SELECT value FROM metadata WHERE key = 'project'") == [('"Test"',)]
+
+    indexes = {
+        name for (name,) in rows(filepath, "SELECT name FROM sqlite_master WHERE name LIKE 'idx_%'")
+    }
+    assert len(indexes) == sum(len(columns) for columns in INDEXES.values())
+
+
+def test_to_sqlite_methods(fixtures_dir, tmp_path):
+    filepath = tmp_path / "out.sqlite"
+    SimaProCSV(fixtures_dir / "damagecategory.txt").to_sqlite(filepath)
+    assert rows(filepath, "SELECT method, name, unit FROM impact_categories LIMIT 1") == [
+        ("DC Test", "NORM - HH - Releases", "man.SV")
+    ]
+    assert rows(
+        filepath,
+        "SELECT c.compartment, c.name, c.factor FROM characterization_factors c "
+        "JOIN impact_categories i ON c.impact_category_id = i.id "
+        "WHERE i.name = 'NORM - HH - Releases' ORDER BY c.line_no",
+    ) == [("Air", "Lead-210", 1.28e-06), ("Water", "Lead-210", 4.03e-09)]
+
+
+@pytest.mark.parametrize("kwargs", [{"lazy": True}, {"storage": "records"}])
+def test_to_sqlite_same_rows(fixtures_dir, tmp_path, kwargs):
+    expected, given = tmp_path / "expected.sqlite", tmp_path / "given.sqlite"
+    SimaProCSV(fixtures_dir / "process.csv").to_sqlite(expected)
+    SimaProCSV(fixtures_dir / "process.csv", **kwargs).to_sqlite(given, batch_size=2)
+    for table in TABLES:
+        if table != "metadata":
+            query = f"SELECT * FROM {table} ORDER BY id"
+            assert rows(given, query) == rows(expected, query)
+
+
+def test_to_sqlite_replaces_file(fixtures_dir, tmp_path):
+    filepath = tmp_path / "out.sqlite"
+    spcsv = SimaProCSV(fixtures_dir / "allocation.csv")
+    spcsv.to_sqlite(filepath)
+    spcsv.to_sqlite(filepath)
+    assert rows(filepath, "SELECT COUNT(*) FROM processes") == [(2,)]
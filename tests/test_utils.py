@@ -3,6 +3,7 @@ import math
 import pytest
 
 from bw_simapro_csv.utils import (
+    LineCursor,
     add_amount_or_formula,
     asnumber,
     get_key_multiline_values,
@@ -64,6 +65,40 @@ def test_jump_to_nonempty():
     assert jump_to_nonempty(data) == [(3, ["bar"])]
 
 
+def test_line_cursor():
+    data = [(0, []), (1, [None, ""]), (2, ["foo"]), (3, ["bar"])]
+    cursor = LineCursor(data)
+    assert cursor
+    assert cursor.skip_empty().peek() == (2, ["foo"])
+    assert cursor.peek(1) == (3, ["bar"])
+    assert cursor.pop() == (2, ["foo"])
+    cursor.rewind()
+    assert list(cursor) == [(2, ["foo"]), (3, ["bar"])]
+    assert not cursor
+    with pytest.raises(IndexError):
+        cursor.peek()
+    assert len(data) == 4
+
+
+def test_line_cursor_skip_empty_to_end():
+    cursor = LineCursor([(0, []), (1, [""])])
+    assert not cursor.skip_empty()
+    assert list(cursor) == []
+
+
+def test_get_key_multilines_value_cursor():
+    given = [
+        (0, ["Metadata"]),
+        (1, ["Header"]),
+        (2, ["data", 1]),
+        (3, []),
+    ]
+    cursor = LineCursor(given, position=1)
+    assert list(get_key_multiline_values(cursor, [])) == [("Header", [(2, ["data", 1])])]
+    assert not cursor
+    assert len(given) == 4
+
+
 def test_get_key_multilines_value():
     given = [
         (0, []),
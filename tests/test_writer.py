@@ -0,0 +1,112 @@
+import datetime
+import json
+import math
+
+import pytest
+
+from bw_simapro_csv import SimaProCSV
+from bw_simapro_csv.writer import JSONEncoder, orjson, write_brightway_json
+
+SERIALIZERS = [
+    "json",
+    pytest.param("orjson", marks=pytest.mark.skipif(orjson is None, reason="orjson")),
+]
+
+
+@pytest.fixture
+def data():
+    return {
+        "database": {"name": "db", "created": datetime.datetime(2024, 1, 2, 3, 4, 5)},
+        "project_parameters": [{"name": "p", "amount": 1.5}],
+        "processes": [
+            {"code": "a", "type": "process", "exchanges": [{"name": "ö", "input": ("db", "b")}]},
+            {"code": "c", "type": "multifunctional", "exchanges": []},
+        ],
+        "products": [{"code": "b", "type": "product"}],
+    }
+
+
+def expected(data: dict) -> dict:
+    """`data` after a round trip through JSON"""
+    return json.loads(json.dumps(data, default=lambda obj: obj.isoformat()))
+
+
+def interleaved(data: dict) -> list:
+    """Datasets in the order of `iter_brightway_datasets`, with products after their process"""
+    return data["processes"][:1] + data["products"] + data["processes"][1:]
+
+
+@pytest.mark.parametrize("serializer", SERIALIZERS)
+def test_write_brightway_json(tmp_path, data, serializer):
+    filepath = tmp_path / "out.json"
+    metadata = {k: v for k, v in data.items() if k not in ("processes", "products")}
+    counts = write_brightway_json(
+        filepath, metadata, iter(interleaved(data)), serializer=serializer
+    )
+    assert counts == {"processes": 2, "products": 1}
+    assert json.loads(filepath.read_text(encoding="utf-8")) == expected(data)
+    assert b"\n" not in filepath.read_bytes()
+
+
+def test_write_brightway_json_products_spill_to_disk(tmp_path, data, monkeypatch):
+    monkeypatch.setattr("bw_simapro_csv.writer.PRODUCT_BUFFER_SIZE", 1)
+    data["products"] = [{"code": str(i), "type": "product"} for i in range(3)]
+    filepath = tmp_path / "out.json"
+    metadata = {k: v for k, v in data.items() if k not in ("processes", "products")}
+    write_brightway_json(filepath, metadata, interleaved(data))
+    assert json.loads(filepath.read_text(encoding="utf-8")) == expected(data)
+
+
+def test_write_brightway_json_no_products(tmp_path, data):
+    filepath = tmp_path / "out.json"
+    data["products"] = []
+    metadata = {k: v for k, v in data.items() if k not in ("processes", "products")}
+    write_brightway_json(filepath, metadata, data["processes"])
+    assert json.loads(filepath.read_text(encoding="utf-8")) == expected(data)
+
+
+@pytest.mark.parametrize("serializer", SERIALIZERS)
+def test_write_brightway_json_lines(tmp_path, data, serializer):
+    filepath = tmp_path / "out.jsonl"
+    metadata = {k: v for k, v in data.items() if k not in ("processes", "products")}
+    write_brightway_json(
+        filepath, metadata, interleaved(data), json_lines=True, serializer=serializer
+    )
+    lines = [json.loads(line) for line in filepath.read_text(encoding="utf-8").splitlines()]
+    data = expected(data)
+    assert lines[0] == {k: v for k, v in data.items() if k not in ("processes", "products")}
+    assert lines[1:] == interleaved(data)
+
+
+def test_json_encoder_compact():
+    assert JSONEncoder()({"a": [1, "ü"]}) == '{"a":[1,"ü"]}'.encode("utf-8")
+    assert JSONEncoder()(math.nan) == b"NaN"
+
+
+def test_json_encoder_serializer_error():
+    with pytest.raises(ValueError):
+        JSONEncoder("ujson")
+
+
+def test_json_encoder_orjson_missing(monkeypatch):
+    monkeypatch.setattr("bw_simapro_csv.writer.orjson", None)
+    with pytest.raises(ImportError):
+        JSONEncoder("orjson")
+
+
+@pytest.mark.parametrize("json_lines", [False, True])
+def test_to_brightway_filepath(fixtures_dir, tmp_path, json_lines):
+    spcsv = SimaProCSV(fixtures_dir / "allocation.csv")
+    filepath = tmp_path / "out.json"
+    assert spcsv.to_brightway(filepath, json_lines=json_lines) == filepath
+    if json_lines:
+        lines = [json.loads(line) for line in filepath.read_text(encoding="utf-8").splitlines()]
+        metadata, datasets = lines[0], lines[1:]
+    else:
+        metadata = json.loads(filepath.read_text(encoding="utf-8"))
+        datasets = metadata.pop("processes") + metadata.pop("products")
+    data = spcsv.to_brightway()
+    assert metadata["database"] == expected(data)["database"]
+    assert sorted(ds["type"] for ds in datasets) == sorted(
+        ds["type"] for ds in data["processes"] + data["products"]
+    )
@@ -1,6 +1,14 @@
+from loguru import logger
+
 from bw_simapro_csv import SimaProCSV
 from bw_simapro_csv.blocks import GenericBiosphere
-from bw_simapro_csv.cas import calculate_check_digit, validate_cas_string
+from bw_simapro_csv.cas import (
+    calculate_check_digit,
+    calculate_check_digits,
+    cas_warnings,
+    validate_cas_string,
+    validate_cas_strings,
+)
 
 
 def test_calculate_check_digit():
@@ -21,6 +29,43 @@ def test_validate_cas_string():
     assert validate_cas_string("7782424") is None
 
 
+def test_calculate_check_digits():
+    numbers = ["773218", "778240", "0000778240", "123456789012", "1", ""]
+    expected = [calculate_check_digit(number) for number in numbers]
+    assert calculate_check_digits(numbers).tolist() == expected
+    assert calculate_check_digits([]).tolist() == []
+
+
+def test_validate_cas_strings():
+    given = [
+        "7782425",
+        "007782425",
+        "  7782-42-5\n",
+        "1228284-64-",
+        "",
+        None,
+        float("NaN"),
+        "7782-425",
+        "7782424",
+        "7782425",
+    ]
+    assert validate_cas_strings(given) == [validate_cas_string(value) for value in given]
+
+
+def test_validate_cas_string_warns_once():
+    messages = []
+    handler = logger.add(messages.append, level="WARNING")
+    cas_warnings.clear()
+    try:
+        validate_cas_strings(["7782424", "7782424", "1228284-64-"])
+        validate_cas_string("7782424")
+        validate_cas_string(" 1228284-64-")
+    finally:
+        logger.remove(handler)
+    assert len(messages) == 2
+    assert "last digit should be 5" in messages[0]
+
+
 def test_cas_in_file(fixtures_dir):
     obj = SimaProCSV(fixtures_dir / "cas_missing_check_number.csv")
     blocks = [
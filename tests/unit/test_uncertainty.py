@@ -9,7 +9,11 @@ from stats_arrays import (
     UniformUncertainty,
 )
 
-from bw_simapro_csv.uncertainty import clean_simapro_uncertainty_fields, distribution
+from bw_simapro_csv.uncertainty import (
+    clean_simapro_uncertainty_fields,
+    distribution,
+    update_distribution_amount,
+)
 
 
 def test_clean_simapro_uncertainty_fields():
@@ -362,3 +366,54 @@ def test_distribution_unknown_distribution():
     }
     with pytest.raises(ValueError):
         distribution(**given)
+
+
+def test_update_distribution_amount_undefined():
+    given = {"uncertainty type": UndefinedUncertainty.id, "loc": 2.0, "amount": 2.0}
+    expected = {"uncertainty type": UndefinedUncertainty.id, "loc": 5, "amount": 5}
+    assert update_distribution_amount(given, 5) == expected
+
+
+def test_update_distribution_amount_lognormal():
+    given = {
+        "uncertainty type": LognormalUncertainty.id,
+        "scale": 0.5,
+        "loc": 0.0,
+        "negative": False,
+        "amount": 1.0,
+    }
+    update_distribution_amount(given, -2)
+    assert given["loc"] == pytest.approx(math.log(2))
+    assert given["scale"] == 0.5
+    assert given["negative"]
+    assert given["amount"] == -2
+
+
+def test_update_distribution_amount_triangular():
+    given = {
+        "uncertainty type": TriangularUncertainty.id,
+        "minimum": 1.0,
+        "maximum": 4.0,
+        "loc": 2.0,
+        "negative": False,
+        "amount": 2.0,
+    }
+    update_distribution_amount(given, 3)
+    assert given["minimum"] == 1.5
+    assert given["maximum"] == 6
+    assert given["loc"] == given["amount"] == 3
+
+
+def test_update_distribution_amount_zero():
+    given = {
+        "uncertainty type": NormalUncertainty.id,
+        "scale": 0.5,
+        "loc": 2.0,
+        "negative": False,
+        "amount": 2.0,
+    }
+    assert update_distribution_amount(given, 0) == {
+        "uncertainty type": UndefinedUncertainty.id,
+        "loc": 0,
+        "amount": 0,
+    }